@@ -0,0 +1,344 @@
+"""
+CHI LIMITED - QUERY PLAN CHECK
+Runs EXPLAIN QUERY PLAN over every shipped query and flags the expensive plans
+
+The catalog is every analytical and fact view, the bridge and summary refresh
+statements of src/database.py, the queries of sql/sample_queries.py and the
+statements of sql/*.sql. Plans are taken on an empty copy of the schema that
+src/database.py defines, loaded with the planner statistics of a built
+database, so they follow the current code and the real data sizes without
+reloading anything.
+
+A plan is flagged for full scans of fact tables and for temp B-trees (sorts
+for GROUP BY / ORDER BY / DISTINCT); scans come with a suggested composite
+(or covering) index. The hot queries (the analytical views, the summary and
+bridge refreshes and sql/sample_queries.py) must never scan the large fact
+and bridge tables; one that does, or no longer prepares, fails the check
+(exit 1). Against a saved baseline, any query that starts scanning a fact
+table, or stops preparing, is a regression too.
+
+The sql/*.sql files are written for SQL Server and are planned as
+translated by translate_tsql() (the same translation sql/run_sql.py runs);
+statements SQLite still cannot prepare are listed as skipped. The check
+needs a built database with planner statistics and exits 1 without one.
+
+Usage:
+    python benchmarks/query_plans.py --save-baseline   # record the current plans
+    python benchmarks/query_plans.py                   # exits 1 on a hot-query scan or a new fact-table scan
+    python benchmarks/query_plans.py --show            # print every plan
+"""
+
+import argparse
+import ast
+import json
+import os
+import re
+import sqlite3
+import sys
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO / 'src'))
+
+from database import (BRIDGE_BUILD, FACT_VIEWS, SUMMARY_REFRESH, TABLES, VIEWS, build_bridge, create_indexes,
+                      create_summaries, create_tables, create_views, script_statements, translate_tsql)
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Database whose planner statistics (sqlite_stat1) the plans are taken with
+DB_PATH = REPO / 'chi_limited.db'
+
+BASELINE_PATH = REPO / 'benchmarks' / 'query_plans_baseline.json'
+RESULTS_PATH = REPO / 'benchmarks' / 'query_plans.json'
+
+# Tables whose full scans are flagged (grow with weeks x products x regions)
+FACT_TABLES = {table for table in TABLES if table.startswith(('fact_', 'bridge_'))}
+
+# Tables the hot queries may never scan in full (fact_promotions stays small)
+LARGE_TABLES = {'fact_sales', 'fact_inventory', 'bridge_promo_week'}
+
+# Sources of the hot queries, besides the analytical views
+HOT_SOURCES = ('database.py', 'sample_queries.py')
+
+# Suggested indexes cover the whole query when they need at most this many columns
+COVERING_MAX_COLUMNS = 6
+
+# ============================================================================
+# CATALOG
+# ============================================================================
+
+def sample_queries(path=REPO / 'sql' / 'sample_queries.py'):
+    """(name, sql) of the ``queryN = \"\"\"...\"\"\"`` strings, read without running the script"""
+    tree = ast.parse(path.read_text())
+    return [(f"{path.name}:{node.targets[0].id}", node.value.value) for node in tree.body
+            if isinstance(node, ast.Assign) and isinstance(node.targets[0], ast.Name)
+            and node.targets[0].id.startswith('query') and isinstance(node.value, ast.Constant)]
+
+
+def catalog():
+    """Every query to check: (name, source, sql)"""
+    queries = [(name, 'view', f"SELECT * FROM {name}") for name in [*VIEWS, *FACT_VIEWS]]
+    queries += [(f"bridge_build:{i}", 'database.py', sql) for i, sql in enumerate(BRIDGE_BUILD)]
+    queries += [(f"summary_refresh:{i}", 'database.py', sql) for i, sql in enumerate(SUMMARY_REFRESH)]
+    queries += [(name, 'sample_queries.py', sql) for name, sql in sample_queries()]
+    for path in sorted((REPO / 'sql').glob('*.sql')):
+        queries += [(f"{path.name}:{line}", path.name, translate_tsql(sql))
+                    for line, sql in script_statements(path.read_text(errors='replace'))]
+    return queries
+
+# ============================================================================
+# PLANS
+# ============================================================================
+
+def plan_database(stats_db):
+    """In-memory database with the current schema and the planner statistics of ``stats_db``"""
+    conn = sqlite3.connect(':memory:')
+    create_tables(conn)
+    build_bridge(conn)
+    create_indexes(conn)
+    create_summaries(conn)
+    create_views(conn)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS refresh_weeks (week_key INTEGER PRIMARY KEY)")
+
+    copied = 0
+    if stats_db and os.path.exists(stats_db):
+        conn.execute("ATTACH DATABASE ? AS stats", (str(stats_db),))
+        has_stats = conn.execute("SELECT COUNT(*) FROM stats.sqlite_master WHERE name = 'sqlite_stat1'").fetchone()[0]
+        if has_stats:
+            conn.execute("DELETE FROM main.sqlite_stat1")
+            copied = conn.execute("""
+                INSERT INTO main.sqlite_stat1
+                SELECT s.tbl, s.idx, s.stat FROM stats.sqlite_stat1 s
+                WHERE s.tbl IN (SELECT name FROM main.sqlite_master WHERE type = 'table')
+                  AND (s.idx IS NULL OR s.idx IN (SELECT name FROM main.sqlite_master WHERE type = 'index')
+                       OR s.idx = s.tbl)
+            """).rowcount
+        conn.commit()
+        conn.execute("DETACH DATABASE stats")
+        conn.execute("ANALYZE sqlite_schema")  # reload the copied statistics
+    return conn, copied
+
+
+def table_aliases(sql):
+    """Alias (or bare name) -> table for the FROM / JOIN clauses of ``sql`` and the views it reads"""
+    views = {**VIEWS, **FACT_VIEWS}
+    aliases = {}
+    for name, alias in re.findall(r'\b(?:FROM|JOIN)\s+(\w+)(?:\s+(?:AS\s+)?(\w+))?', sql, re.IGNORECASE):
+        if alias.upper() in ('', 'ON', 'WHERE', 'JOIN', 'GROUP', 'ORDER', 'LEFT', 'INNER', 'CROSS', 'LIMIT'):
+            alias = name
+        aliases.setdefault(alias, name)
+        aliases.setdefault(name, name)
+        if name in views:
+            for inner, table in table_aliases(views[name]).items():
+                aliases.setdefault(inner, table)
+    return aliases
+
+
+def explain(conn, sql):
+    """Plan rows (detail text) of ``sql``"""
+    return [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+
+
+def findings(plan, aliases):
+    """Fact tables scanned in full and temp B-trees of one plan"""
+    scans, btrees = set(), []
+    for detail in plan:
+        scan = re.match(r'SCAN (\w+)', detail)
+        if scan and aliases.get(scan.group(1), scan.group(1)) in FACT_TABLES:
+            scans.add(aliases.get(scan.group(1), scan.group(1)))
+        if detail.startswith('USE TEMP B-TREE FOR '):
+            btrees.append(detail[len('USE TEMP B-TREE FOR '):])
+    return sorted(scans), btrees
+
+
+def existing_indexes(conn, table):
+    """Column lists of the indexes on a table"""
+    return [[info[2] for info in conn.execute(f"PRAGMA index_info({index[1]})")]
+            for index in conn.execute(f"PRAGMA index_list({table})")]
+
+
+def suggest_index(conn, sql, table, aliases):
+    """CREATE INDEX for a scanned table: equality, range then GROUP BY columns, covering when small"""
+    names = [alias for alias, name in aliases.items() if name == table]
+    ref = r'\b(?:' + '|'.join(map(re.escape, names)) + r')\.(\w+)'
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+
+    def referenced(pattern, text=sql):
+        return [column for column in re.findall(pattern, text, re.IGNORECASE) if column in columns]
+
+    equality = referenced(ref + r'\s*(?:=|IN\b)') + referenced(r'=\s*' + ref)
+    ranges = referenced(ref + r'\s*(?:BETWEEN|<|>)')
+    group = re.search(r'\bGROUP\s+BY\s+(.*?)(?:\bHAVING\b|\bORDER\b|\bLIMIT\b|\)|$)', sql, re.IGNORECASE | re.DOTALL)
+    grouping = referenced(ref, group.group(1)) if group else []
+    key = list(dict.fromkeys(equality + ranges + grouping))
+    rest = [column for column in dict.fromkeys(referenced(ref)) if column not in key]
+    if not key and not rest:
+        return None
+    covering = len(key) + len(rest) <= COVERING_MAX_COLUMNS
+    index_columns = key + rest if covering or not key else key
+    if any(existing[:len(index_columns)] == index_columns for existing in existing_indexes(conn, table)):
+        return None
+    name = f"idx_{table.replace('fact_', '')}_{'_'.join(column.replace('_key', '') for column in index_columns)}"
+    kind = 'covering' if covering else 'composite'
+    return kind, f"CREATE INDEX {name} ON {table}({', '.join(index_columns)})"
+
+
+def check_plans(conn):
+    """Plan and findings of every catalog query, keyed by name"""
+    results = {}
+    for name, source, sql in catalog():
+        try:
+            plan = explain(conn, sql)
+        except sqlite3.Error as exc:
+            results[name] = {'source': source, 'error': str(exc)}
+            continue
+        aliases = table_aliases(sql)
+        scans, btrees = findings(plan, aliases)
+        suggestions = [s for s in (suggest_index(conn, sql, table, aliases) for table in scans) if s]
+        results[name] = {'source': source, 'plan': plan, 'fact_scans': scans, 'temp_btrees': btrees,
+                         'suggested_indexes': [statement for _, statement in suggestions]}
+    return results
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def hot_query_scans(results):
+    """Hot queries that scan a large table in full or do not prepare (always failures)"""
+    failures = []
+    for name, r in results.items():
+        if not (r['source'] in HOT_SOURCES or name in VIEWS):
+            continue
+        if 'error' in r:
+            failures.append(f"{name}: does not prepare ({r['error']})")
+            continue
+        failures += [f"{name}: scans {table} in full" for table in r['fact_scans'] if table in LARGE_TABLES]
+    return failures
+
+
+def has_tables(db_path):
+    """Whether ``db_path`` is a built database (a file with tables in it)"""
+    if not os.path.exists(db_path):
+        return False
+    conn = sqlite3.connect(Path(db_path).resolve().as_uri() + '?mode=ro', uri=True)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'").fetchone()[0] > 0
+    except sqlite3.DatabaseError:
+        return False
+    finally:
+        conn.close()
+
+
+def compare(results, baseline):
+    """New fact-table scans and newly failing queries (regressions), new temp B-trees (warnings)"""
+    regressions, warnings = [], []
+    for name, before in baseline.items():
+        after = results.get(name)
+        if after is None or 'error' in before:
+            continue
+        if 'error' in after:
+            regressions.append(f"{name}: no longer prepares ({after['error']})")
+            continue
+        for table in sorted(set(after['fact_scans']) - set(before['fact_scans'])):
+            regressions.append(f"{name}: now scans {table} in full")
+        new_btrees = list(after['temp_btrees'])
+        for btree in before['temp_btrees']:
+            if btree in new_btrees:
+                new_btrees.remove(btree)
+        warnings += [f"{name}: new temp B-tree for {btree}" for btree in new_btrees]
+    return regressions, warnings
+
+
+def report(results, show=False):
+    checked = [r for r in results.values() if 'error' not in r]
+    skipped = {name: r for name, r in results.items() if 'error' in r}
+    print(f"🔎 {len(checked)} queries planned, {len(skipped)} skipped (not valid SQLite against this schema)")
+    print()
+    for name, r in results.items():
+        if 'error' in r:
+            continue
+        flagged = r['fact_scans'] or r['temp_btrees']
+        if not (flagged or show):
+            continue
+        print(f"   {name}")
+        if show:
+            for detail in r['plan']:
+                print(f"      | {detail}")
+        for table in r['fact_scans']:
+            print(f"      ⚠️  full scan of {table}")
+        for btree in r['temp_btrees']:
+            print(f"      ⚠️  temp B-tree for {btree}")
+        for statement in r['suggested_indexes']:
+            print(f"      💡 {statement}")
+    if skipped:
+        print()
+        print("   Skipped:")
+        for name, r in skipped.items():
+            print(f"      {name}: {r['error']}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the query plans of the CHI Limited queries")
+    parser.add_argument('--db', type=Path, default=DB_PATH,
+                        help="built database whose planner statistics are used (default: chi_limited.db)")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="store these plans as the new baseline")
+    parser.add_argument('--show', action='store_true', help="print every plan, not only the flagged ones")
+    args = parser.parse_args(argv)
+
+    print("="*80)
+    print("CHI LIMITED - QUERY PLANS")
+    print("="*80)
+
+    if not has_tables(args.db):
+        print(f"❌ {args.db} is missing or has no tables; build it first with sql/create_database.py")
+        return 1
+    conn, copied = plan_database(args.db)
+    if not copied:
+        print(f"❌ No planner statistics in {args.db}; rebuild it with sql/create_database.py (which runs ANALYZE)")
+        return 1
+    print(f"📈 Planner statistics: {copied} entries from {args.db}")
+    results = check_plans(conn)
+    conn.close()
+    report(results, args.show)
+
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump(results, f, indent=2)
+    print()
+    print(f"📁 Plans saved to: {RESULTS_PATH.relative_to(REPO)}")
+
+    failures = hot_query_scans(results)
+    if failures:
+        print(f"❌ {len(failures)} hot quer{'y' if len(failures) == 1 else 'ies'} without an index to use:")
+        for failure in failures:
+            print(f"   {failure}")
+    else:
+        print(f"✅ No hot query scans {', '.join(sorted(LARGE_TABLES))} in full")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved to: {args.baseline}")
+        return 1 if failures else 0
+
+    if not args.baseline.exists():
+        print("ℹ️  No baseline to compare with; record one with --save-baseline")
+        return 1 if failures else 0
+
+    with open(args.baseline) as f:
+        regressions, warnings = compare(results, json.load(f))
+    for warning in warnings:
+        print(f"   ⚠️  {warning}")
+    if not regressions:
+        print("✅ No query regressed to a fact-table scan")
+        return 1 if failures else 0
+    print(f"❌ {len(regressions)} plan regression(s) against the baseline:")
+    for regression in regressions:
+        print(f"   {regression}")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
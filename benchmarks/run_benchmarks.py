@@ -0,0 +1,350 @@
+"""
+CHI LIMITED - BENCHMARK SUITE
+Times every pipeline stage at several dataset scales and compares with a baseline
+
+Stages: full generation to disk, then dimension / promotion / sales / inventory
+generation on their own, the create_database.py load, a full rebuild of the
+summary tables, the five analytical views, sample_queries.py and the feature
+steps of notebook 04. Each stage runs in a fresh process, so its peak memory
+(max RSS) is its own. With duckdb installed, the load, summary and view
+stages also run on a DuckDB build of the same files (duckdb_* stages).
+
+Usage:
+    python benchmarks/run_benchmarks.py                          # small + default scales
+    python benchmarks/run_benchmarks.py --scales default large
+    python benchmarks/run_benchmarks.py --save-baseline          # record this machine's baseline
+
+Timings only compare on the machine that recorded them, so no baseline is
+committed: the first run on a machine skips the comparison until one is saved.
+"""
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO / 'src'))
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Dataset scales (generate_data.py options)
+SCALES = {
+    'small': ['--weeks', '52'],
+    'default': [],
+    'large': ['--weeks', '520', '--sku-multiplier', '4', '--region-multiplier', '2'],
+}
+
+STAGES = ['generate', 'dimensions', 'promotions', 'sales', 'inventory', 'load', 'direct_build',
+          'duckdb_load', 'summaries', 'duckdb_summaries', 'views', 'duckdb_views', 'sample_queries', 'features']
+
+# The duckdb_* stages run by default only where duckdb is installed
+DEFAULT_STAGES = [stage for stage in STAGES
+                  if not stage.startswith('duckdb_') or importlib.util.find_spec('duckdb')]
+
+VIEWS = ['v_weekly_revenue_by_category', 'v_regional_performance', 'v_promotional_effectiveness',
+         'v_inventory_health', 'v_seasonal_performance']
+
+BASELINE_PATH = REPO / 'benchmarks' / 'baseline.json'  # per machine, not committed (see .gitignore)
+RESULTS_PATH = REPO / 'benchmarks' / 'results.json'
+
+# A stage regresses when it is this much slower (or bigger) than the baseline,
+# beyond a small absolute slack that absorbs the noise of sub-second stages
+TOLERANCE = 0.25
+SLACK = {'seconds': 0.25, 'peak_mb': 10}
+
+# ============================================================================
+# STAGES (each runs in its own process; returns the number of rows handled)
+# ============================================================================
+
+def scale_args(scale):
+    """Parsed generate_data options of a scale"""
+    import generate_data
+    return generate_data.parse_args(SCALES[scale] + ['--workers', '1'])
+
+def stage_generate(scale, workdir):
+    """Full generation of all six tables to data/raw/ (sales + inventory rows)"""
+    import generate_data
+    data_dir = os.path.join(workdir, 'data', 'raw')
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_data.main(SCALES[scale] + ['--workers', '1', '--output-dir', data_dir])
+    state = generate_data.load_state(data_dir)
+    sales_rows = state['next_transaction'] - 1
+    return sales_rows + sales_rows // len(state['channels'])
+
+def stage_dimensions(scale, workdir):
+    import generate_data as g
+    args = scale_args(scale)
+    df_product = g.generate_product_dim(g.scale_catalog(g.PRODUCTS, args.sku_multiplier, g.derive_product))
+    df_geography = g.generate_geography_dim(g.scale_catalog(g.REGIONS, args.region_multiplier, g.derive_region))
+    df_time = g.generate_time_dim(args.start_date, args.weeks)
+    return len(df_product) + len(df_geography) + len(df_time)
+
+def stage_promotions(scale, workdir):
+    import generate_data as g
+    args = scale_args(scale)
+    df_time = g.generate_time_dim(args.start_date, args.weeks)
+    products = g.scale_catalog(g.PRODUCTS, args.sku_multiplier, g.derive_product)
+    regions = g.scale_catalog(g.REGIONS, args.region_multiplier, g.derive_region)
+    return len(g.generate_promotions(df_time, products, regions, args.channels, args.promos_per_year, seed=args.seed))
+
+def stage_sales(scale, workdir):
+    import generate_data as g
+    args = scale_args(scale)
+    rows = 0
+    for df_sales in g.iter_sales(num_weeks=args.weeks, start_date=args.start_date,
+                                 products=g.scale_catalog(g.PRODUCTS, args.sku_multiplier, g.derive_product),
+                                 regions=g.scale_catalog(g.REGIONS, args.region_multiplier, g.derive_region),
+                                 channels=args.channels, seed=args.seed):
+        rows += len(df_sales)
+    return rows
+
+def stage_inventory(scale, workdir):
+    """Inventory recurrence alone, over the weekly units of the generated sales"""
+    import numpy as np
+    import generate_data as g
+    from table_io import read_table
+    data_dir = os.path.join(workdir, 'data', 'raw')
+    df_time = read_table(data_dir, 'dim_time')
+    df_product = read_table(data_dir, 'dim_product')
+    df_geography = read_table(data_dir, 'dim_geography')
+    units = read_table(data_dir, 'fact_sales', columns=['units_sold'])['units_sold'].to_numpy()
+    weekly_units = units.reshape(len(df_time), len(df_product), len(df_geography), -1).sum(axis=3).astype(np.int64)
+
+    start = time.perf_counter()
+    df_inventory, _ = g.simulate_inventory(df_time, df_product, df_geography, weekly_units, g.shard_rng(0, 1, 0))
+    return len(df_inventory), time.perf_counter() - start
+
+def stage_load(scale, workdir):
+    """sql/create_database.py on the generated files"""
+    from database import connect
+    run_script(REPO / 'sql' / 'create_database.py', workdir)
+    with connect(os.path.join(workdir, 'chi_limited.db')) as conn:
+        return sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                   for table in ['dim_product', 'dim_geography', 'dim_time',
+                                 'fact_sales', 'fact_promotions', 'fact_inventory'])
+
+def stage_direct_build(scale, workdir):
+    """Generation straight into SQLite with no files (compare with generate + load)"""
+    import generate_data
+    from database import connect
+    db_path = os.path.join(workdir, 'direct.db')
+    with contextlib.redirect_stdout(io.StringIO()):
+        generate_data.main(SCALES[scale] + ['--workers', '1', '--database', db_path, '--format', 'none'])
+    with connect(db_path) as conn:
+        return sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+                   for table in ['dim_product', 'dim_geography', 'dim_time',
+                                 'fact_sales', 'fact_promotions', 'fact_inventory'])
+
+def stage_duckdb_load(scale, workdir):
+    """sql/create_database.py --engine duckdb on the generated files"""
+    from database import connect
+    run_script(REPO / 'sql' / 'create_database.py', workdir, '--engine', 'duckdb')
+    conn = connect(os.path.join(workdir, 'chi_limited.duckdb'), 'duckdb')
+    rows = sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+               for table in ['dim_product', 'dim_geography', 'dim_time',
+                             'fact_sales', 'fact_promotions', 'fact_inventory'])
+    conn.close()
+    return rows
+
+def rebuild_summaries(db_path, engine):
+    """Re-aggregate every week of the summary tables (rows = fact rows scanned)"""
+    from database import connect, refresh_summaries
+    conn = connect(db_path, engine)
+    refresh_summaries(conn, full=True)
+    rows = sum(conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in ['fact_sales', 'fact_inventory'])
+    conn.close()
+    return rows
+
+def stage_summaries(scale, workdir):
+    """Full rebuild of the summary tables (the seasonal, regional, promo and inventory aggregations)"""
+    return rebuild_summaries(os.path.join(workdir, 'chi_limited.db'), 'sqlite')
+
+def stage_duckdb_summaries(scale, workdir):
+    return rebuild_summaries(os.path.join(workdir, 'chi_limited.duckdb'), 'duckdb')
+
+def stage_views(scale, workdir):
+    """Full result of each analytical view"""
+    from database import connect
+    with connect(os.path.join(workdir, 'chi_limited.db')) as conn:
+        return sum(len(conn.execute(f"SELECT * FROM {view}").fetchall()) for view in VIEWS)
+
+def stage_duckdb_views(scale, workdir):
+    from database import connect
+    conn = connect(os.path.join(workdir, 'chi_limited.duckdb'), 'duckdb')
+    rows = sum(len(conn.execute(f"SELECT * FROM {view}").fetchall()) for view in VIEWS)
+    conn.close()
+    return rows
+
+def stage_sample_queries(scale, workdir):
+    """sql/sample_queries.py (rows = fact_sales rows it aggregates)"""
+    from database import connect
+    run_script(REPO / 'sql' / 'sample_queries.py', workdir)
+    with connect(os.path.join(workdir, 'chi_limited.db')) as conn:
+        return conn.execute("SELECT COUNT(*) FROM fact_sales").fetchone()[0]
+
+def stage_features(scale, workdir):
+    """The feature steps of notebook 04 (merge, promo flag, lags, rolling, EWMA, growth)"""
+    import numpy as np
+    import pandas as pd
+    from promo_index import PromoIndex
+    from database import connect
+
+    with connect(os.path.join(workdir, 'chi_limited.db')) as conn:
+        df_sales = pd.read_sql_query("SELECT * FROM v_fact_sales", conn)
+        df_time = pd.read_sql_query("SELECT * FROM dim_time", conn)
+        df_product = pd.read_sql_query("SELECT * FROM dim_product", conn)
+        df_geography = pd.read_sql_query("SELECT * FROM dim_geography", conn)
+        df_promotions = pd.read_sql_query("SELECT * FROM v_fact_promotions", conn)
+
+    df_time['week_start_date'] = pd.to_datetime(df_time['week_start_date'])
+    df_full = (df_sales
+               .merge(df_time[['week_id', 'week_start_date', 'year', 'quarter', 'month_number', 'month_name',
+                               'week_of_year', 'season', 'festive_period', 'is_holiday_week']], on='week_id', how='left')
+               .merge(df_product[['product_id', 'product_name', 'category', 'brand']], on='product_id', how='left')
+               .merge(df_geography[['region_id', 'region_name', 'wealth_index']], on='region_id', how='left'))
+
+    promo_index = PromoIndex(df_promotions, df_time['week_id'])
+    df_full['is_promo'] = (promo_index.lookup(df_full['week_id'], df_full['product_id'],
+                                              df_full['region_id'], df_full['channel_id']) >= 0).astype(int)
+
+    df_full['month_sin'] = np.sin(2 * np.pi * df_full['week_start_date'].dt.month / 12)
+    df_full = df_full.sort_values(['product_id', 'region_id', 'channel_id', 'week_start_date'])
+    units = df_full.groupby(['product_id', 'region_id', 'channel_id'])['units_sold']
+    for lag in [1, 2, 4, 8, 12, 26, 52]:
+        df_full[f'units_sold_lag_{lag}'] = units.shift(lag)
+    for window in [4, 8, 12]:
+        df_full[f'rolling_mean_{window}wk'] = units.transform(lambda x: x.rolling(window=window, min_periods=1).mean())
+        df_full[f'rolling_std_{window}wk'] = units.transform(lambda x: x.rolling(window=window, min_periods=1).std())
+    df_full['ewma_4'] = units.transform(lambda x: x.ewm(span=4, adjust=False).mean())
+    df_full['units_sold_wow_growth'] = units.pct_change()
+    df_full['units_sold_yoy_growth'] = units.pct_change(periods=52)
+    df_full = pd.concat([df_full, pd.get_dummies(df_full['season'], prefix='season'),
+                         pd.get_dummies(df_full['festive_period'], prefix='festive')], axis=1)
+    return len(df_full)
+
+def run_script(path, workdir, *args):
+    """Run one of the repo scripts from ``workdir`` (they use relative paths)"""
+    subprocess.run([sys.executable, str(path), *args], cwd=workdir, check=True,
+                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+# ============================================================================
+# RUNNER
+# ============================================================================
+
+def run_stage(stage, scale, workdir):
+    """Run one stage in a child process: rows, wall seconds and peak RSS in MB"""
+    proc = subprocess.Popen([sys.executable, __file__, '--child', stage, scale, workdir],
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    out, err = proc.communicate()
+    if proc.returncode:
+        raise RuntimeError(f"Stage {stage} ({scale}) failed:\n{err}")
+    result = json.loads(out.strip().splitlines()[-1])
+    result['peak_mb'] = round(result.pop('max_rss_kb') / 1024, 1)
+    result['rows_per_sec'] = round(result['rows'] / result['seconds']) if result['seconds'] else None
+    return result
+
+def child(stage, scale, workdir):
+    """Child-process side of run_stage: time the stage and report as JSON"""
+    import resource
+    import generate_data, promo_index, table_io  # keep import time out of the measurement
+    start = time.perf_counter()
+    outcome = globals()[f'stage_{stage}'](scale, workdir)
+    seconds = time.perf_counter() - start
+    rows, seconds = outcome if isinstance(outcome, tuple) else (outcome, seconds)
+
+    # Scripts run as grandchildren; their memory counts towards the stage (ru_maxrss is in KB on Linux)
+    max_rss = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                  resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    print(json.dumps({'rows': int(rows), 'seconds': round(seconds, 3), 'max_rss_kb': max_rss}))
+
+def run_scale(scale, stages):
+    """All stages for one scale, in a scratch directory"""
+    workdir = tempfile.mkdtemp(prefix=f'chi_bench_{scale}_')
+    results = {}
+    try:
+        for stage in stages:
+            results[stage] = run_stage(stage, scale, workdir)
+            r = results[stage]
+            print(f"   {stage:<16} {r['seconds']:>9.2f}s {r['rows']:>12,} rows "
+                  f"{r['rows_per_sec'] or 0:>12,} rows/s {r['peak_mb']:>9,.1f} MB")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Stages slower or bigger than the baseline by more than ``tolerance``"""
+    regressions = []
+    for scale, stages in results.items():
+        for stage, r in stages.items():
+            base = baseline.get(scale, {}).get(stage)
+            if base is None:
+                continue
+            for metric, slack in SLACK.items():
+                if r[metric] > base[metric] * (1 + tolerance) + slack:
+                    regressions.append((scale, stage, metric, base[metric], r[metric]))
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the CHI Limited pipeline stages")
+    parser.add_argument('--scales', nargs='+', choices=list(SCALES), default=['small', 'default'])
+    parser.add_argument('--stages', nargs='+', choices=STAGES, default=DEFAULT_STAGES,
+                        help="stages to run; later stages need 'generate' (and 'load') first")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_PATH)
+    parser.add_argument('--save-baseline', action='store_true', help="store this run as the new baseline")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help=f"allowed slowdown / memory growth before a stage is flagged (default: {TOLERANCE})")
+    parser.add_argument('--child', nargs=3, metavar=('STAGE', 'SCALE', 'WORKDIR'), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        return child(*args.child)
+
+    print("="*80)
+    print("CHI LIMITED - BENCHMARKS")
+    print("="*80)
+
+    results = {}
+    for scale in args.scales:
+        print()
+        print(f"⏱️  Scale: {scale} {' '.join(SCALES[scale]) or '(defaults)'}")
+        results[scale] = run_scale(scale, args.stages)
+
+    with open(RESULTS_PATH, 'w') as f:
+        json.dump(results, f, indent=2)
+    print()
+    print(f"📁 Results saved to: {RESULTS_PATH.relative_to(REPO)}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(results, f, indent=2)
+        print(f"📌 Baseline saved to: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"ℹ️  Skipped the regression check: no baseline at {args.baseline}")
+        print("   Record this machine's with: python benchmarks/run_benchmarks.py --save-baseline")
+        return 0
+
+    with open(args.baseline) as f:
+        regressions = compare(results, json.load(f), args.tolerance)
+    if not regressions:
+        print(f"✅ No regressions against the baseline (tolerance {args.tolerance:.0%})")
+        return 0
+    print(f"❌ {len(regressions)} regression(s) against the baseline (tolerance {args.tolerance:.0%}):")
+    for scale, stage, metric, before, after in regressions:
+        print(f"   {scale}/{stage}: {metric} {before:,.2f} -> {after:,.2f} ({after / before - 1:+.0%})")
+    return 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,13 +1,61 @@
 """
 CHI LIMITED - SQL DATABASE CREATION SCRIPT
-Creates SQLite database with star schema
+Creates SQLite (or DuckDB) database with star schema
+
+Facts reference the dimensions by integer surrogate keys assigned during the
+load (natural ids stay on the dimensions; see src/database.py).
+
+Tables are streamed into the database in chunks (--chunk-rows), so memory use
+stays flat however large the generated files are.
+
+By default the tables are bulk-loaded: SQLite journaling and syncing are
+relaxed for the load, all rows go in through batched executemany inside one
+transaction, and the indexes are built once the data is in.
+--standard-load keeps the original path (indexes first, DataFrame.to_sql).
+Either way ANALYZE runs after the load, so the planner statistics describe
+the loaded tables.
+
+This is a full rebuild. Week fingerprints of the loaded facts are recorded,
+so later runs of sql/update_database.py only load new or changed data. The
+finished SQLite database is left in WAL mode, so reports reading it (see
+src/query_pool.py) are not blocked while an update writes.
+
+--engine duckdb builds the same tables, summary tables and views in a DuckDB
+file instead (columnar, vectorized multi-core scans; needs duckdb).
+
+--partition-by-year keeps the fact rows of each calendar year in a file of
+their own (chi_limited_2023.db, ...) attached to chi_limited.db, so old years
+can be frozen and compacted (sql/partitions.py) and scanned in parallel
+(see YearPartitions in src/database.py).
+
+Every build step and the SQL it runs are timed with their plans (see
+src/query_log.py); steps and statements over --slow-ms go to
+logs/slow_queries.jsonl, everything to --query-log.
+
+Usage:
+    python sql/create_database.py
+    python sql/create_database.py --standard-load
+    python sql/create_database.py --chunk-rows 50000 --cache-mb 64   # small VM
+    python sql/create_database.py --engine duckdb                    # chi_limited.duckdb
+    python sql/create_database.py --partition-by-year                # + chi_limited_<year>.db
+    python sql/create_database.py --query-log logs/create_database.jsonl
 """
 
-import sqlite3
+import argparse
 import pandas as pd
 import os
+import sys
 from pathlib import Path
 
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from database import (BULK_PRAGMAS, CACHE_MB, DB_PATHS, ENGINES, FACT_VIEWS, FINGERPRINT_TABLES, INDEXES, LOAD_ORDER,
+                      PARTITIONED_TABLES, SUMMARY_TABLES, TABLES, VIEWS, SurrogateKeys, WeekFingerprints,
+                      YearPartitions, build_bridge, bulk_mode, bump_data_version, connect, create_indexes,
+                      create_load_state, create_summaries, create_views, incremental_mode, insert_rows, normal_mode,
+                      table_ddl, update_statistics)
+from query_log import SLOW_LOG_PATH, SLOW_MS, QueryLog
+from table_io import file_digest, iter_table, table_path
+
 print("="*80)
 print("CHI LIMITED - DATABASE CREATION STARTING...")
 print("="*80)
@@ -17,28 +65,61 @@ print()
 # CONFIGURATION
 # ============================================================================
 
-# Database file location
-DB_PATH = 'chi_limited.db'
+# Database file location (per engine)
+DB_PATH = DB_PATHS['sqlite']
 
-# CSV files location
+# Generated tables location (CSV files or Parquet datasets)
 DATA_DIR = 'data/raw/'
 
+# Rows parsed and inserted per chunk (bounds the loader's memory)
+CHUNK_ROWS = 200_000
+
+parser = argparse.ArgumentParser(description="Create the CHI Limited SQLite star schema from the generated tables")
+parser.add_argument('--engine', choices=ENGINES, default='sqlite',
+                    help="database engine; duckdb writes chi_limited.duckdb (default: sqlite)")
+parser.add_argument('--db', help=f"database file (default: {DB_PATHS['sqlite']}, or {DB_PATHS['duckdb']} for DuckDB)")
+parser.add_argument('--standard-load', action='store_true',
+                    help="create indexes first and insert with DataFrame.to_sql (slower; no bulk-load tuning)")
+parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                    help=f"rows read and inserted per chunk (default: {CHUNK_ROWS:,})")
+parser.add_argument('--cache-mb', type=int, default=CACHE_MB,
+                    help=f"SQLite page cache for the bulk load, in MB (default: {CACHE_MB})")
+parser.add_argument('--partition-by-year', action='store_true',
+                    help="store each year's fact rows in its own attached file (SQLite)")
+parser.add_argument('--slow-ms', type=float, default=SLOW_MS,
+                    help=f"steps and statements taking at least this long go to the slow-query log (default: {SLOW_MS})")
+parser.add_argument('--slow-log', default=SLOW_LOG_PATH, help=f"slow-query log (default: {SLOW_LOG_PATH})")
+parser.add_argument('--query-log', help="also record every step and statement to this JSON-lines file")
+args = parser.parse_args()
+if args.standard_load and args.engine != 'sqlite':
+    parser.error("--standard-load is only available for SQLite")
+if args.partition_by_year and args.engine != 'sqlite':
+    parser.error("--partition-by-year is only available for SQLite")
+ENGINE = args.engine
+DB_PATH = args.db or DB_PATHS[ENGINE]
+BULK_LOAD = not args.standard_load
+PARTITIONED = args.partition_by_year
+CHUNK_ROWS = args.chunk_rows
+log = QueryLog(args.query_log, args.slow_log, args.slow_ms)
+
 # ============================================================================
 # STEP 1: CREATE DATABASE CONNECTION
 # ============================================================================
 
 print("📂 Creating database connection...")
 
-# Delete existing database if it exists (fresh start)
-if os.path.exists(DB_PATH):
-    os.remove(DB_PATH)
-    print(f"   ✓ Removed old database file")
+# Delete existing database if it exists (fresh start), with any WAL left by an update
+replacing = os.path.exists(DB_PATH)
 
-# Create new connection
-conn = sqlite3.connect(DB_PATH)
-cursor = conn.cursor()
+# Create new connection (connect() removes the old files first)
+conn = connect(DB_PATH, ENGINE, fresh=True)
+if replacing:
+    print(f"   ✓ Removed old database file")
 
-print(f"   ✓ Connected to: {DB_PATH}")
+print(f"   ✓ Connected to: {DB_PATH} ({ENGINE})")
+if BULK_LOAD and ENGINE == 'sqlite':
+    bulk_mode(conn, cache_mb=args.cache_mb)
+    print(f"   ✓ Bulk-load mode ({', '.join(p.split()[1] for p in BULK_PRAGMAS)})")
 print()
 
 # ============================================================================
@@ -47,108 +128,15 @@ print()
 
 print("🏗️  Creating database tables...")
 
-# --- DIM_PRODUCT ---
-cursor.execute("""
-    CREATE TABLE dim_product (
-        product_id TEXT PRIMARY KEY,
-        product_name TEXT NOT NULL,
-        brand TEXT NOT NULL,
-        category TEXT NOT NULL,
-        pack_size_ml INTEGER,
-        pack_format TEXT,
-        target_segment TEXT,
-        unit_price_ngn_2024 REAL NOT NULL,
-        cogs_percentage REAL
-    )
-""")
-print("   ✓ Created table: dim_product")
-
-# --- DIM_GEOGRAPHY ---
-cursor.execute("""
-    CREATE TABLE dim_geography (
-        region_id TEXT PRIMARY KEY,
-        region_name TEXT NOT NULL,
-        urbanization_index REAL,
-        population_millions REAL,
-        wealth_index REAL
-    )
-""")
-print("   ✓ Created table: dim_geography")
-
-# --- DIM_TIME ---
-cursor.execute("""
-    CREATE TABLE dim_time (
-        week_id TEXT PRIMARY KEY,
-        week_start_date TEXT NOT NULL,
-        week_end_date TEXT NOT NULL,
-        month_name TEXT NOT NULL,
-        month_number INTEGER,
-        quarter TEXT NOT NULL,
-        year INTEGER NOT NULL,
-        week_of_year INTEGER NOT NULL,
-        is_holiday_week INTEGER DEFAULT 0,
-        season TEXT NOT NULL,
-        festive_period TEXT DEFAULT 'Regular'
-    )
-""")
-print("   ✓ Created table: dim_time")
-
-# --- FACT_SALES ---
-cursor.execute("""
-    CREATE TABLE fact_sales (
-        transaction_id TEXT PRIMARY KEY,
-        week_id TEXT NOT NULL,
-        product_id TEXT NOT NULL,
-        region_id TEXT NOT NULL,
-        channel_id TEXT NOT NULL,
-        units_sold INTEGER NOT NULL DEFAULT 0,
-        revenue_ngn REAL NOT NULL DEFAULT 0,
-        cost_of_goods_sold REAL NOT NULL DEFAULT 0,
-        promo_discount_ngn REAL DEFAULT 0,
-        baseline_demand INTEGER,
-        FOREIGN KEY (week_id) REFERENCES dim_time(week_id),
-        FOREIGN KEY (product_id) REFERENCES dim_product(product_id),
-        FOREIGN KEY (region_id) REFERENCES dim_geography(region_id)
-    )
-""")
-print("   ✓ Created table: fact_sales")
-
-# --- FACT_PROMOTIONS ---
-cursor.execute("""
-    CREATE TABLE fact_promotions (
-        promo_id TEXT PRIMARY KEY,
-        product_id TEXT NOT NULL,
-        region_id TEXT NOT NULL,
-        channel_id TEXT NOT NULL,
-        promo_type TEXT NOT NULL,
-        discount_percentage REAL NOT NULL,
-        promo_start_week TEXT NOT NULL,
-        promo_end_week TEXT NOT NULL,
-        promo_cost_ngn REAL NOT NULL DEFAULT 0,
-        incremental_volume_target INTEGER,
-        FOREIGN KEY (product_id) REFERENCES dim_product(product_id),
-        FOREIGN KEY (region_id) REFERENCES dim_geography(region_id)
-    )
-""")
-print("   ✓ Created table: fact_promotions")
-
-# --- FACT_INVENTORY ---
-cursor.execute("""
-    CREATE TABLE fact_inventory (
-        inventory_id INTEGER PRIMARY KEY AUTOINCREMENT,
-        week_id TEXT NOT NULL,
-        product_id TEXT NOT NULL,
-        region_id TEXT NOT NULL,
-        opening_stock_units INTEGER NOT NULL DEFAULT 0,
-        closing_stock_units INTEGER NOT NULL DEFAULT 0,
-        stockout_days INTEGER DEFAULT 0,
-        inventory_holding_cost_ngn REAL DEFAULT 0,
-        FOREIGN KEY (week_id) REFERENCES dim_time(week_id),
-        FOREIGN KEY (product_id) REFERENCES dim_product(product_id),
-        FOREIGN KEY (region_id) REFERENCES dim_geography(region_id)
-    )
-""")
-print("   ✓ Created table: fact_inventory")
+with log.step(conn, 'create tables'):
+    for table_name in TABLES:
+        if PARTITIONED and table_name in PARTITIONED_TABLES:
+            continue  # created in each year's file once the calendar is loaded
+        for ddl in table_ddl(table_name, ENGINE):
+            conn.execute(ddl)
+        print(f"   ✓ Created table: {table_name}")
+    create_load_state(conn, ENGINE)
+    partitions = YearPartitions.create(conn) if PARTITIONED else None
 
 # Commit table creation
 conn.commit()
@@ -158,171 +146,129 @@ print()
 # STEP 3: CREATE INDEXES (For faster queries)
 # ============================================================================
 
-print("⚡ Creating indexes for performance...")
-
-indexes = [
-    "CREATE INDEX idx_product_category ON dim_product(category)",
-    "CREATE INDEX idx_time_year ON dim_time(year)",
-    "CREATE INDEX idx_time_festive ON dim_time(festive_period)",
-    "CREATE INDEX idx_sales_week ON fact_sales(week_id)",
-    "CREATE INDEX idx_sales_product ON fact_sales(product_id)",
-    "CREATE INDEX idx_sales_region ON fact_sales(region_id)",
-    "CREATE INDEX idx_promo_product ON fact_promotions(product_id)",
-    "CREATE INDEX idx_inventory_week ON fact_inventory(week_id)",
-]
-
-for idx_sql in indexes:
-    cursor.execute(idx_sql)
-    
-conn.commit()
-print(f"   ✓ Created {len(indexes)} indexes")
-print()
+# Built before the load in standard mode; after it (one sort per index) in bulk mode
+def build_indexes():
+    print("⚡ Creating indexes for performance...")
+    with log.step(conn, 'create indexes'):
+        create_indexes(conn, ENGINE, analyze=False)  # statistics once the data is in (step 5)
+    print(f"   ✓ Created {len(INDEXES)} indexes")
+    print()
+
+if not BULK_LOAD:
+    build_indexes()
 
 # ============================================================================
-# STEP 4: LOAD DATA FROM CSV FILES
+# STEP 4: LOAD DATA FROM GENERATED FILES
 # ============================================================================
 
-print("📥 Loading data from CSV files...")
+print("📥 Loading data from generated files...")
 
-# Helper function to load CSV
-def load_csv_to_table(csv_file, table_name):
-    """Load CSV file into SQL table"""
-    csv_path = os.path.join(DATA_DIR, csv_file)
+# Helper function to load one table (CSV, or Parquet when generated with --format parquet)
+def load_table(table_name):
+    """Stream a generated table into the SQL table of the same name, chunk by chunk"""
+    path = table_path(DATA_DIR, table_name)
     
-    if not os.path.exists(csv_path):
-        print(f"   ❌ File not found: {csv_path}")
+    if not os.path.exists(path):
+        print(f"   ❌ File not found: {path}")
         return 0
     
-    # Read CSV
-    df = pd.read_csv(csv_path)
+    row_count = 0
+    for chunk in iter_table(DATA_DIR, table_name, CHUNK_ROWS):
+        # Natural keys -> integer surrogate keys (may add dim_channel rows first)
+        for target, rows in keys.frames(table_name, chunk):
+            # Load to SQL
+            if partitions and target in PARTITIONED_TABLES:
+                partitions.insert(target, rows)
+            elif BULK_LOAD:
+                insert_rows(conn, target, rows, ENGINE)
+            else:
+                rows.to_sql(target, conn, if_exists='append', index=False)
+            if target in FINGERPRINT_TABLES:
+                fingerprints.add(target, rows)
+        row_count += len(chunk)
+        print(f"   ⏳ {table_name}: {row_count:,} rows...", end='\r', flush=True)
     
-    # Load to SQL
-    df.to_sql(table_name, conn, if_exists='append', index=False)
+    # Where sql/update_database.py picks up from next time
+    if table_name in FINGERPRINT_TABLES:
+        fingerprints.save(conn, table_name)
+        if path.endswith('.csv'):
+            conn.execute("INSERT INTO load_sources VALUES (?, ?, ?)",
+                           (table_name, os.path.getsize(path), file_digest(path).hexdigest()))
     
-    row_count = len(df)
     print(f"   ✓ Loaded {row_count:,} rows into {table_name}")
     return row_count
 
-# Load all tables
+# Load all tables (one transaction in bulk mode)
+if BULK_LOAD:
+    conn.execute("BEGIN")
+keys = SurrogateKeys()
+fingerprints = WeekFingerprints()
 total_rows = 0
-total_rows += load_csv_to_table('dim_product.csv', 'dim_product')
-total_rows += load_csv_to_table('dim_geography.csv', 'dim_geography')
-total_rows += load_csv_to_table('dim_time.csv', 'dim_time')
-total_rows += load_csv_to_table('fact_promotions.csv', 'fact_promotions')
-total_rows += load_csv_to_table('fact_sales.csv', 'fact_sales')
-total_rows += load_csv_to_table('fact_inventory.csv', 'fact_inventory')
+for table_name in LOAD_ORDER:
+    if partitions and table_name == PARTITIONED_TABLES[0]:
+        # One file per year of the loaded calendar (attached between transactions)
+        conn.commit()
+        with log.step(conn, 'partition by year'):
+            partitions.add([year for (year,) in conn.execute("SELECT DISTINCT year FROM dim_time")],
+                           indexed=not BULK_LOAD)
+        if BULK_LOAD:
+            bulk_mode(conn, ENGINE, args.cache_mb)  # for the new files too
+            conn.execute("BEGIN")
+        print(f"   ✓ Partitioned facts by year: {', '.join(map(str, partitions.years))}")
+    # One record per table: tracing every row of the batched inserts would cost more than the load
+    with log.step(conn, f"load {table_name}", trace=False) as record:
+        record['rows'] = load_table(table_name)
+    total_rows += record['rows']
+conn.commit()
 
 print()
 print(f"   📊 Total rows loaded: {total_rows:,}")
+
+# Promotion x covered week, so promo analysis joins sales by equality
+with log.step(conn, 'build bridge'):
+    build_bridge(conn)
+bridge_rows = log.fetchall(conn, "SELECT COUNT(*) FROM bridge_promo_week", name='count bridge_promo_week')[0][0]
+print(f"   ✓ Built bridge_promo_week ({bridge_rows:,} promotion weeks)")
 print()
 
+if BULK_LOAD:
+    build_indexes()
+    normal_mode(conn, ENGINE)
+
 # ============================================================================
-# STEP 5: CREATE ANALYTICAL VIEWS
+# STEP 5: BUILD SUMMARY TABLES AND ANALYTICAL VIEWS
 # ============================================================================
 
+# The views read small pre-aggregated tables; triggers on the fact tables
+# record changed weeks for refresh_summaries() (see src/database.py)
+print("📐 Building summary tables...")
+with log.step(conn, 'build summaries'):
+    create_summaries(conn, ENGINE)
+for summary_name in SUMMARY_TABLES:
+    count = log.fetchall(conn, f"SELECT COUNT(*) FROM {summary_name}", name=f"count {summary_name}")[0][0]
+    print(f"   ✓ {summary_name:<25} {count:>10,} rows")
+
+# Statistics of the loaded tables, in both load modes: the planner relies on them for every query
+with log.step(conn, 'analyze'):
+    update_statistics(conn, ENGINE)
+print("   ✓ Planner statistics updated (ANALYZE)")
+print()
+
 print("👁️  Creating analytical views...")
 
-# --- View 1: Weekly Revenue by Category ---
-cursor.execute("""
-    CREATE VIEW v_weekly_revenue_by_category AS
-    SELECT 
-        t.week_id,
-        t.week_start_date,
-        t.year,
-        t.quarter,
-        p.category,
-        SUM(s.revenue_ngn) AS total_revenue,
-        SUM(s.units_sold) AS total_units,
-        SUM(s.cost_of_goods_sold) AS total_cogs,
-        SUM(s.revenue_ngn - s.cost_of_goods_sold) AS gross_profit,
-        ROUND(100.0 * SUM(s.revenue_ngn - s.cost_of_goods_sold) / 
-              NULLIF(SUM(s.revenue_ngn), 0), 2) AS gross_margin_pct
-    FROM fact_sales s
-    JOIN dim_product p ON s.product_id = p.product_id
-    JOIN dim_time t ON s.week_id = t.week_id
-    GROUP BY t.week_id, t.week_start_date, t.year, t.quarter, p.category
-    ORDER BY t.week_start_date, p.category
-""")
-print("   ✓ Created view: v_weekly_revenue_by_category")
-
-# --- View 2: Regional Performance ---
-cursor.execute("""
-    CREATE VIEW v_regional_performance AS
-    SELECT 
-        g.region_name,
-        COUNT(DISTINCT s.week_id) AS weeks_of_data,
-        SUM(s.revenue_ngn) AS total_revenue,
-        SUM(s.units_sold) AS total_units,
-        ROUND(AVG(s.revenue_ngn), 2) AS avg_transaction_revenue
-    FROM fact_sales s
-    JOIN dim_geography g ON s.region_id = g.region_id
-    GROUP BY g.region_id, g.region_name
-    ORDER BY total_revenue DESC
-""")
-print("   ✓ Created view: v_regional_performance")
-
-# --- View 3: Promotional Effectiveness ---
-cursor.execute("""
-    CREATE VIEW v_promotional_effectiveness AS
-    SELECT 
-        p.promo_id,
-        p.promo_type,
-        p.discount_percentage,
-        pr.category,
-        SUM(s.revenue_ngn) AS promo_revenue,
-        SUM(s.units_sold) AS promo_units,
-        SUM(s.units_sold - s.baseline_demand) AS incremental_units,
-        p.promo_cost_ngn,
-        ROUND(SUM(s.revenue_ngn) / NULLIF(p.promo_cost_ngn, 0), 2) AS roi
-    FROM fact_promotions p
-    JOIN fact_sales s ON s.product_id = p.product_id 
-        AND s.region_id = p.region_id 
-        AND s.week_id BETWEEN p.promo_start_week AND p.promo_end_week
-    JOIN dim_product pr ON p.product_id = pr.product_id
-    GROUP BY p.promo_id, p.promo_type, p.discount_percentage, pr.category, p.promo_cost_ngn
-    HAVING incremental_units > 0
-    ORDER BY roi DESC
-""")
-print("   ✓ Created view: v_promotional_effectiveness")
-
-# --- View 4: Inventory Health ---
-cursor.execute("""
-    CREATE VIEW v_inventory_health AS
-    SELECT 
-        p.product_name,
-        p.category,
-        g.region_name,
-        SUM(i.stockout_days) AS total_stockout_days,
-        ROUND(AVG(i.closing_stock_units), 0) AS avg_closing_stock,
-        SUM(i.inventory_holding_cost_ngn) AS total_holding_cost
-    FROM fact_inventory i
-    JOIN dim_product p ON i.product_id = p.product_id
-    JOIN dim_geography g ON i.region_id = g.region_id
-    GROUP BY p.product_id, p.product_name, p.category, g.region_id, g.region_name
-    ORDER BY total_stockout_days DESC
-""")
-print("   ✓ Created view: v_inventory_health")
-
-# --- View 5: Seasonal Performance ---
-cursor.execute("""
-    CREATE VIEW v_seasonal_performance AS
-    SELECT 
-        t.season,
-        t.festive_period,
-        p.category,
-        COUNT(DISTINCT s.week_id) AS weeks,
-        SUM(s.revenue_ngn) AS total_revenue,
-        ROUND(AVG(s.revenue_ngn), 2) AS avg_weekly_revenue,
-        SUM(s.units_sold) AS total_units
-    FROM fact_sales s
-    JOIN dim_time t ON s.week_id = t.week_id
-    JOIN dim_product p ON s.product_id = p.product_id
-    GROUP BY t.season, t.festive_period, p.category
-    ORDER BY t.season, p.category, total_revenue DESC
-""")
-print("   ✓ Created view: v_seasonal_performance")
+with log.step(conn, 'create views'):
+    create_views(conn)
+for view_name in [*VIEWS, *FACT_VIEWS]:
+    print(f"   ✓ Created view: {view_name}")
 
+# New data version: results cached from an earlier database are not reused
+bump_data_version(conn)
 conn.commit()
+
+# WAL from now on: report queries (src/query_pool.py) keep reading while an update writes
+if ENGINE == 'sqlite':
+    incremental_mode(conn)
+
 print()
 
 # ============================================================================
@@ -332,28 +278,34 @@ print()
 print("✅ Verifying database...")
 
 # Check table row counts
-tables = ['dim_product', 'dim_geography', 'dim_time', 'fact_sales', 'fact_promotions', 'fact_inventory']
+tables = ['dim_product', 'dim_geography', 'dim_time', 'dim_channel', 'fact_sales', 'fact_promotions', 'fact_inventory']
 
 print()
 print("📊 Table Row Counts:")
 print("-" * 50)
 for table in tables:
-    cursor.execute(f"SELECT COUNT(*) FROM {table}")
-    count = cursor.fetchone()[0]
+    count = log.fetchall(conn, f"SELECT COUNT(*) FROM {table}", name=f"count {table}")[0][0]
     print(f"   {table:<25} {count:>10,} rows")
 
 print()
 
 # Test a sample query
-cursor.execute("""
+sample_query = """
     SELECT category, SUM(revenue_ngn) as total_revenue 
     FROM fact_sales s
-    JOIN dim_product p ON s.product_id = p.product_id
+    JOIN dim_product p ON s.product_key = p.product_key
     GROUP BY category
     ORDER BY total_revenue DESC
-""")
+"""
+if partitions:
+    # SQLite materializes a union view under a join and GROUP BY: aggregate each year file, then combine
+    with log.step(conn, 'revenue by category (per year file)') as record:
+        totals = partitions.map(sample_query).groupby('category')['total_revenue'].sum()
+        results = list(totals.sort_values(ascending=False).items())
+        record['rows'] = len(results)
+else:
+    results = log.fetchall(conn, sample_query, name='revenue by category')
 
-results = cursor.fetchall()
 print("💰 Revenue by Category:")
 print("-" * 50)
 for category, revenue in results:
@@ -372,9 +324,14 @@ print("✅ DATABASE CREATION COMPLETE!")
 print("="*80)
 print()
 print(f"📁 Database saved as: {DB_PATH}")
-print(f"📊 Total tables: 6 (3 dimensions + 3 facts)")
-print(f"👁️  Total views: 5 (analytical views)")
-print(f"⚡ Total indexes: {len(indexes)}")
+print(f"📊 Total tables: 7 (4 dimensions + 3 facts, integer surrogate keys)")
+print(f"📐 Summary tables: {len(SUMMARY_TABLES) - 1} (refreshed by week with refresh_summaries)")
+print(f"👁️  Total views: {len(VIEWS)} analytical + {len(FACT_VIEWS)} natural-key fact views")
+print(f"⚡ Total indexes: {len(INDEXES)}")
+if partitions:
+    print(f"🗂️  Fact partitions: {len(partitions.years)} year files ({partitions.path(min(partitions.years))}, ...)")
+if log.slow:
+    print(f"🐢 Slow steps and statements (>= {args.slow_ms:g} ms): {len(log.slow)}, logged to {args.slow_log}")
 print()
 print("🎉 Ready for Day 3: Exploratory Data Analysis!")
 print("="*80)
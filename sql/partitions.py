@@ -0,0 +1,78 @@
+"""
+CHI LIMITED - FACT PARTITIONS
+Lists, freezes and thaws the year files of a partitioned database
+
+A database built with create_database.py --partition-by-year keeps the fact
+rows of each calendar year in a file of its own (see YearPartitions in
+src/database.py). Freezing a year that will not change again compacts its
+file (VACUUM), refreshes its statistics and attaches it read-only from then
+on; sql/update_database.py refuses rows for a frozen year until it is thawed.
+The listing counts the rows of every year on its own connection, in parallel.
+
+Usage:
+    python sql/partitions.py
+    python sql/partitions.py --freeze 2022 2023
+    python sql/partitions.py --thaw 2023
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from database import YearPartitions, connect, is_partitioned
+
+# Database file location
+DB_PATH = 'chi_limited.db'
+
+parser = argparse.ArgumentParser(description="List, freeze and thaw the year files of a partitioned CHI Limited database")
+parser.add_argument('--db', default=DB_PATH, help=f"SQLite database (default: {DB_PATH})")
+parser.add_argument('--freeze', nargs='+', type=int, default=[], metavar='YEAR',
+                    help="compact these years and make them read-only")
+parser.add_argument('--thaw', nargs='+', type=int, default=[], metavar='YEAR',
+                    help="make these years writable again")
+parser.add_argument('--workers', type=int, help="connections counting rows in parallel (default: one per CPU)")
+args = parser.parse_args()
+
+if not os.path.exists(args.db):
+    print(f"❌ {args.db} not found; build it first with sql/create_database.py --partition-by-year")
+    sys.exit(1)
+
+conn = connect(args.db)
+if not is_partitioned(conn):
+    print(f"❌ {args.db} is not partitioned; rebuild it with sql/create_database.py --partition-by-year")
+    sys.exit(1)
+partitions = YearPartitions(conn)
+
+for year, frozen in [(year, True) for year in args.freeze] + [(year, False) for year in args.thaw]:
+    start = time.perf_counter()
+    before = os.path.getsize(partitions.path(year)) if year in partitions.years else 0
+    try:
+        partitions.freeze(year, frozen)
+    except ValueError as exc:
+        print(f"❌ {exc}")
+        sys.exit(1)
+    if frozen:
+        after = os.path.getsize(partitions.path(year))
+        print(f"🧊 Froze {year}: {before / 1e6:,.1f} MB -> {after / 1e6:,.1f} MB "
+              f"in {time.perf_counter() - start:.2f}s")
+    else:
+        print(f"💧 Thawed {year}")
+
+start = time.perf_counter()
+counts = partitions.map("SELECT (SELECT COUNT(*) FROM fact_sales) AS sales_rows, "
+                        "(SELECT COUNT(*) FROM fact_inventory) AS inventory_rows", workers=args.workers)
+elapsed = time.perf_counter() - start
+
+print()
+print(f"{'Year':<6} {'File':<28} {'Size MB':>9} {'Sales rows':>12} {'Inventory rows':>15}  State")
+print("-" * 85)
+for row in counts.itertuples(index=False):
+    path = partitions.path(row.partition)
+    print(f"{row.partition:<6} {os.path.basename(path):<28} {os.path.getsize(path) / 1e6:>9,.1f} "
+          f"{row.sales_rows:>12,} {row.inventory_rows:>15,}  {'frozen' if partitions.years[row.partition] else 'open'}")
+print()
+print(f"📊 {len(counts)} year files counted in {elapsed:.3f}s")
+conn.close()
@@ -0,0 +1,39 @@
+"""
+CHI LIMITED - SUMMARY TABLE REFRESH
+Brings the summary tables behind the analytical views up to date
+
+Triggers on the fact tables record every week whose rows were inserted,
+updated or deleted since the last refresh; only those weeks (for inventory,
+their years) are re-aggregated, and the data version is stamped in the
+same transaction so cached query results never outlive the summaries.
+
+Usage:
+    python sql/refresh_summaries.py                          # weeks changed since the last refresh
+    python sql/refresh_summaries.py --weeks 2024-W10 2024-W11
+    python sql/refresh_summaries.py --full                   # rebuild every week
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from database import connect, refresh_summaries
+
+# Database file location
+DB_PATH = 'chi_limited.db'
+
+parser = argparse.ArgumentParser(description="Refresh the CHI Limited summary tables for changed weeks")
+parser.add_argument('--db', default=DB_PATH, help=f"SQLite database (default: {DB_PATH})")
+parser.add_argument('--weeks', nargs='+', metavar='WEEK_ID',
+                    help="refresh these weeks instead of the ones recorded as changed")
+parser.add_argument('--full', action='store_true', help="re-aggregate every week")
+args = parser.parse_args()
+
+conn = connect(args.db)
+start = time.perf_counter()
+refreshed = refresh_summaries(conn, weeks=args.weeks, full=args.full)  # stamps a new data version
+conn.close()
+
+print(f"📐 Refreshed {refreshed} week(s) of summary data in {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,80 @@
+"""
+CHI LIMITED - SQL SCRIPT RUNNER
+Runs the SQL Server scripts in sql/*.sql on the local SQLite or DuckDB database
+
+Each statement is translated by translate_tsql() in src/database.py (TOP,
+TRY_CAST, fact tables read through the natural-key v_fact_* views) and run
+on its own; statements the engine still cannot run are reported and skipped.
+The statements are independent reads, so they run concurrently over a pool
+of read-only connections (src/query_pool.py) and are printed in script order.
+Each statement is timed with its plan (src/query_log.py); those over
+--slow-ms go to logs/slow_queries.jsonl, all of them to --query-log.
+
+Usage:
+    python sql/run_sql.py sql/business_insights.sql
+    python sql/run_sql.py sql/*.sql --engine duckdb --rows 5
+    python sql/run_sql.py sql/*.sql --workers 1     # one statement at a time
+    python sql/run_sql.py sql/*.sql --query-log logs/queries.jsonl
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from database import DB_PATHS, ENGINES, script_statements, translate_tsql
+from query_log import SLOW_LOG_PATH, SLOW_MS, QueryLog
+from query_pool import QueryPool
+
+parser = argparse.ArgumentParser(description="Run the sql/*.sql scripts on the CHI Limited database")
+parser.add_argument('scripts', nargs='+', type=Path, help=".sql files to run")
+parser.add_argument('--engine', choices=ENGINES, default='sqlite', help="database engine (default: sqlite)")
+parser.add_argument('--db', help="database file (default: chi_limited.db, or chi_limited.duckdb for DuckDB)")
+parser.add_argument('--rows', type=int, default=10, help="rows printed per result (default: 10)")
+parser.add_argument('--workers', type=int, help="statements run at the same time (default: one per CPU)")
+parser.add_argument('--slow-ms', type=float, default=SLOW_MS,
+                    help=f"statements taking at least this long go to the slow-query log (default: {SLOW_MS})")
+parser.add_argument('--slow-log', default=SLOW_LOG_PATH, help=f"slow-query log (default: {SLOW_LOG_PATH})")
+parser.add_argument('--query-log', help="also record every statement to this JSON-lines file")
+args = parser.parse_args()
+
+db_path = args.db or DB_PATHS[args.engine]
+if not os.path.exists(db_path):
+    print(f"❌ {db_path} not found; build it first with sql/create_database.py")
+    sys.exit(1)
+
+log = QueryLog(args.query_log, args.slow_log, args.slow_ms)
+
+start = time.perf_counter()
+with QueryPool(db_path, args.engine, size=args.workers, log=log) as pool:
+    # Every statement of every script is queued at once; results are read back in order
+    scripts = [(script, [pool.submit(f"{script.name}:{line}", translate_tsql(statement, args.engine))
+                         for line, statement in script_statements(script.read_text(errors='replace'))])
+               for script in args.scripts]
+
+    ran, skipped, busy = 0, [], 0.0
+    for script, futures in scripts:
+        print("="*80)
+        print(f"📜 {script}")
+        print("="*80)
+        for future in futures:
+            result = future.result()
+            busy += result.seconds
+            if result.error is not None:
+                exc = result.error
+                skipped.append((result.name, str(exc.__cause__ or exc).splitlines()[0]))  # pandas wraps the engine's error
+                print(f"⚠️  {result.name}: skipped ({skipped[-1][1]})")
+                continue
+            ran += 1
+            print(f"📊 {result.name}: {len(result.frame):,} rows in {result.seconds:.3f}s")
+            print(result.frame.head(args.rows).to_string(index=False))
+            print()
+
+print("="*80)
+print(f"✅ {ran} statements run on {args.engine}, {len(skipped)} skipped")
+print(f"⏱️  {time.perf_counter() - start:.2f}s on {pool.size} connection(s) (sum of statement times {busy:.2f}s)")
+if log.slow:
+    print(f"🐢 {len(log.slow)} slow statements (>= {args.slow_ms:g} ms) logged to {args.slow_log}")
+print("="*80)
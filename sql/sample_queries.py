@@ -1,13 +1,56 @@
 """
 CHI LIMITED - SAMPLE ANALYTICAL QUERIES
 Practice SQL queries for business insights
-"""
 
-import sqlite3
-import pandas as pd
+The queries run concurrently over a pool of read-only connections (see
+src/query_pool.py), so the report takes about as long as its slowest query.
+Results are cached in .query_cache/ until the next load changes the data
+(see src/query_cache.py), so repeated runs on unchanged data return at once.
+Queries that reach the database are timed with their plan (src/query_log.py);
+those over --slow-ms go to logs/slow_queries.jsonl, all of them to --query-log.
+
+Usage:
+    python sql/sample_queries.py
+    python sql/sample_queries.py --engine duckdb   # on chi_limited.duckdb
+    python sql/sample_queries.py --no-cache        # always query the database
+    python sql/sample_queries.py --workers 1       # one query at a time
+    python sql/sample_queries.py --no-cache --query-log logs/queries.jsonl --slow-ms 100
+"""
 
-# Connect to database
-conn = sqlite3.connect('chi_limited.db')
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from database import DB_PATHS, ENGINES
+from query_cache import QueryCache
+from query_log import SLOW_LOG_PATH, SLOW_MS, QueryLog
+from query_pool import QueryPool
+
+# Cached query results (kept until a load changes the data version)
+CACHE_DIR = '.query_cache'
+
+parser = argparse.ArgumentParser(description="Run the CHI Limited sample analytical queries")
+parser.add_argument('--engine', choices=ENGINES, default='sqlite', help="database engine (default: sqlite)")
+parser.add_argument('--db', help="database file (default: chi_limited.db, or chi_limited.duckdb for DuckDB)")
+parser.add_argument('--cache-dir', default=CACHE_DIR, help=f"query result cache (default: {CACHE_DIR})")
+parser.add_argument('--no-cache', action='store_true', help="run every query on the database")
+parser.add_argument('--workers', type=int, help="queries run at the same time (default: one per CPU)")
+parser.add_argument('--slow-ms', type=float, default=SLOW_MS,
+                    help=f"queries taking at least this long go to the slow-query log (default: {SLOW_MS})")
+parser.add_argument('--slow-log', default=SLOW_LOG_PATH, help=f"slow-query log (default: {SLOW_LOG_PATH})")
+parser.add_argument('--query-log', help="also record every query to this JSON-lines file")
+args = parser.parse_args()
+
+db_path = args.db or DB_PATHS[args.engine]
+if not os.path.exists(db_path):
+    print(f"❌ {db_path} not found; build it first with sql/create_database.py")
+    sys.exit(1)
+
+cache = None if args.no_cache else QueryCache(directory=args.cache_dir)
+log = QueryLog(args.query_log, args.slow_log, args.slow_ms)
 
 print("="*80)
 print("CHI LIMITED - ANALYTICAL QUERIES")
@@ -18,9 +61,6 @@ print()
 # QUERY 1: Top 10 Products by Revenue
 # ============================================================================
 
-print("📊 QUERY 1: Top 10 Products by Revenue")
-print("-" * 80)
-
 query1 = """
     SELECT 
         p.product_name,
@@ -28,23 +68,16 @@ query1 = """
         SUM(s.revenue_ngn) AS total_revenue,
         SUM(s.units_sold) AS total_units
     FROM fact_sales s
-    JOIN dim_product p ON s.product_id = p.product_id
-    GROUP BY p.product_id, p.product_name, p.category
+    JOIN dim_product p ON s.product_key = p.product_key
+    GROUP BY p.product_key, p.product_name, p.category
     ORDER BY total_revenue DESC
     LIMIT 10
 """
 
-df1 = pd.read_sql_query(query1, conn)
-print(df1.to_string(index=False))
-print()
-
 # ============================================================================
 # QUERY 2: Revenue by Region and Year
 # ============================================================================
 
-print("📊 QUERY 2: Revenue by Region and Year")
-print("-" * 80)
-
 query2 = """
     SELECT 
         g.region_name,
@@ -52,23 +85,16 @@ query2 = """
         SUM(s.revenue_ngn) AS total_revenue,
         ROUND(AVG(s.revenue_ngn), 2) AS avg_revenue_per_transaction
     FROM fact_sales s
-    JOIN dim_geography g ON s.region_id = g.region_id
-    JOIN dim_time t ON s.week_id = t.week_id
+    JOIN dim_geography g ON s.region_key = g.region_key
+    JOIN dim_time t ON s.week_key = t.week_key
     GROUP BY g.region_name, t.year
     ORDER BY g.region_name, t.year
 """
 
-df2 = pd.read_sql_query(query2, conn)
-print(df2.to_string(index=False))
-print()
-
 # ============================================================================
 # QUERY 3: Promotional ROI by Type
 # ============================================================================
 
-print("📊 QUERY 3: Promotional ROI by Type")
-print("-" * 80)
-
 query3 = """
     SELECT 
         promo_type,
@@ -81,17 +107,10 @@ query3 = """
     ORDER BY avg_roi DESC
 """
 
-df3 = pd.read_sql_query(query3, conn)
-print(df3.to_string(index=False))
-print()
-
 # ============================================================================
 # QUERY 4: Seasonal Revenue Patterns
 # ============================================================================
 
-print("📊 QUERY 4: Seasonal Revenue Patterns")
-print("-" * 80)
-
 query4 = """
     SELECT 
         season,
@@ -105,17 +124,10 @@ query4 = """
     LIMIT 10
 """
 
-df4 = pd.read_sql_query(query4, conn)
-print(df4.to_string(index=False))
-print()
-
 # ============================================================================
 # QUERY 5: Products with High Stockout Frequency
 # ============================================================================
 
-print("📊 QUERY 5: Products with High Stockout Frequency")
-print("-" * 80)
-
 query5 = """
     SELECT 
         product_name,
@@ -129,17 +141,10 @@ query5 = """
     LIMIT 15
 """
 
-df5 = pd.read_sql_query(query5, conn)
-print(df5.to_string(index=False))
-print()
-
 # ============================================================================
 # QUERY 6: Month-over-Month Growth
 # ============================================================================
 
-print("📊 QUERY 6: Month-over-Month Growth Rate")
-print("-" * 80)
-
 query6 = """
     WITH monthly_revenue AS (
         SELECT 
@@ -147,7 +152,7 @@ query6 = """
             t.month_name,
             SUM(s.revenue_ngn) AS revenue
         FROM fact_sales s
-        JOIN dim_time t ON s.week_id = t.week_id
+        JOIN dim_time t ON s.week_key = t.week_key
         GROUP BY t.year, t.month_name, t.month_number
         ORDER BY t.year, t.month_number
     )
@@ -162,35 +167,56 @@ query6 = """
     ORDER BY year, month_name
 """
 
-df6 = pd.read_sql_query(query6, conn)
-print(df6.head(15).to_string(index=False))
-print()
-
 # ============================================================================
 # QUERY 7: Channel Performance Comparison
 # ============================================================================
 
-print("📊 QUERY 7: Modern Trade vs Traditional Trade")
-print("-" * 80)
-
 query7 = """
     SELECT 
-        channel_id,
-        COUNT(DISTINCT product_id) AS num_products,
-        SUM(revenue_ngn) AS total_revenue,
-        SUM(units_sold) AS total_units,
-        ROUND(AVG(revenue_ngn / NULLIF(units_sold, 0)), 2) AS avg_price_per_unit
-    FROM fact_sales
-    GROUP BY channel_id
+        c.channel_id,
+        COUNT(DISTINCT s.product_key) AS num_products,
+        SUM(s.revenue_ngn) AS total_revenue,
+        SUM(s.units_sold) AS total_units,
+        ROUND(AVG(s.revenue_ngn / NULLIF(s.units_sold, 0)), 2) AS avg_price_per_unit
+    FROM fact_sales s
+    JOIN dim_channel c ON s.channel_key = c.channel_key
+    GROUP BY c.channel_id
 """
 
-df7 = pd.read_sql_query(query7, conn)
-print(df7.to_string(index=False))
-print()
+# ============================================================================
+# RUN THE QUERIES (concurrently) AND PRINT THE REPORT
+# ============================================================================
 
-# Close connection
-conn.close()
+# Title and rows printed (None: all) of each query, in report order
+REPORT = [
+    ("QUERY 1: Top 10 Products by Revenue", query1, None),
+    ("QUERY 2: Revenue by Region and Year", query2, None),
+    ("QUERY 3: Promotional ROI by Type", query3, None),
+    ("QUERY 4: Seasonal Revenue Patterns", query4, None),
+    ("QUERY 5: Products with High Stockout Frequency", query5, None),
+    ("QUERY 6: Month-over-Month Growth Rate", query6, 15),
+    ("QUERY 7: Modern Trade vs Traditional Trade", query7, None),
+]
+
+start = time.perf_counter()
+with QueryPool(db_path, args.engine, size=args.workers, cache=cache, log=log) as pool:
+    results = pool.run([(title, sql) for title, sql, _ in REPORT])
+elapsed = time.perf_counter() - start
+
+for (title, _, rows), result in zip(REPORT, results):
+    print(f"📊 {title} ({result.seconds:.3f}s)")
+    print("-" * 80)
+    if result.error is not None:
+        raise result.error
+    print((result.frame if rows is None else result.frame.head(rows)).to_string(index=False))
+    print()
 
 print("="*80)
 print("✅ All queries executed successfully!")
+print(f"⏱️  {len(results)} queries in {elapsed:.2f}s on {pool.size} connection(s) "
+      f"(slowest {max(r.seconds for r in results):.2f}s, sum {sum(r.seconds for r in results):.2f}s)")
+if cache:
+    print(f"♻️  {cache.hits} of {cache.hits + cache.misses} results from the cache")
+if log.slow:
+    print(f"🐢 {len(log.slow)} slow queries (>= {args.slow_ms:g} ms) logged to {args.slow_log}")
 print("="*80)
\ No newline at end of file
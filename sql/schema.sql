@@ -90,6 +90,7 @@ FROM fact_promotions p
 JOIN fact_sales s 
     ON s.product_id = p.product_id
    AND s.region_id = p.region_id
+   AND s.channel_id = p.channel_id
    AND s.week_id BETWEEN p.promo_start_week AND p.promo_end_week
 JOIN dim_product pr 
     ON p.product_id = pr.product_id
@@ -0,0 +1,224 @@
+"""
+CHI LIMITED - INCREMENTAL DATABASE UPDATE
+Brings an existing chi_limited.db up to date with the generated tables
+
+Dimensions and promotions are upserted: new members get the next surrogate
+keys, changed rows are updated in place, unchanged rows are left alone. Fact
+rows are compared week by week with the fingerprints recorded by the last
+load (see WeekFingerprints in src/database.py): rows of new weeks are
+inserted and weeks whose rows changed are replaced. A CSV file that only grew
+(generate_data.py --append) is read from where the last load stopped, so a
+weekly refresh costs about the size of the new data, not of the history.
+Nothing is deleted here; rebuild with create_database.py for that.
+
+The update runs in one transaction in WAL mode, so readers keep seeing the
+previous state until it commits. The fact-table triggers record the weeks it
+touches and refresh_summaries() re-aggregates only those before the commit.
+An update that changes anything also replaces the data version stamp, which
+invalidates cached query results (see src/query_cache.py).
+
+In a database partitioned by year (create_database.py --partition-by-year)
+fact rows go to the file of their year; a file is added for a new year, and
+rows of a frozen year are refused (thaw it first with sql/partitions.py). The
+commit is then atomic per file, not across the files.
+
+Usage:
+    python sql/update_database.py
+    python sql/update_database.py --data-dir data/raw/ --chunk-rows 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'src'))
+from database import (DIMENSION_KEYS, FINGERPRINT_TABLES, LOAD_ORDER, SurrogateKeys, WeekFingerprints,
+                      YearPartitions, bump_data_version, connect, incremental_mode, insert_rows, is_partitioned,
+                      refresh_summaries, upsert_rows)
+from table_io import file_digest, iter_table, read_table, table_path
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Database file location
+DB_PATH = 'chi_limited.db'
+
+# Generated tables location (CSV files or Parquet datasets)
+DATA_DIR = 'data/raw/'
+
+# Rows parsed and inserted per chunk (bounds the loader's memory)
+CHUNK_ROWS = 200_000
+
+parser = argparse.ArgumentParser(description="Load new and changed data into an existing CHI Limited database")
+parser.add_argument('--db', default=DB_PATH, help=f"SQLite database (default: {DB_PATH})")
+parser.add_argument('--data-dir', default=DATA_DIR, help=f"generated tables (default: {DATA_DIR})")
+parser.add_argument('--chunk-rows', type=int, default=CHUNK_ROWS,
+                    help=f"rows read and inserted per chunk (default: {CHUNK_ROWS:,})")
+args = parser.parse_args()
+DATA_DIR = args.data_dir
+CHUNK_ROWS = args.chunk_rows
+
+print("="*80)
+print("CHI LIMITED - INCREMENTAL UPDATE")
+print("="*80)
+print()
+
+if not os.path.exists(args.db):
+    print(f"❌ {args.db} not found; build it first with sql/create_database.py")
+    sys.exit(1)
+
+conn = connect(args.db)
+
+# Files of the years in the generated calendar (SQLite cannot attach them inside the transaction)
+partitions = YearPartitions(conn) if is_partitioned(conn) else None
+if partitions:
+    partitions.add(read_table(DATA_DIR, 'dim_time')['year'].unique().tolist())
+
+incremental_mode(conn)
+
+# Surrogate keys, week fingerprints and file positions of the last load
+keys = SurrogateKeys.from_database(conn)
+loaded = WeekFingerprints.from_database(conn)
+sources = {table: (size, digest) for table, size, digest
+           in conn.execute("SELECT table_name, size_bytes, digest FROM load_sources")}
+
+start = time.perf_counter()
+conn.execute("BEGIN IMMEDIATE")
+
+# ============================================================================
+# STEP 1: UPSERT DIMENSIONS AND PROMOTIONS
+# ============================================================================
+
+print("🔁 Upserting dimensions and promotions...")
+
+def upsert_table(table_name):
+    """Insert new and update changed rows of a small generated table; returns rows changed per target"""
+    changed = {}
+    for target, rows in keys.frames(table_name, read_table(DATA_DIR, table_name)):
+        key = DIMENSION_KEYS[target][1] if target in DIMENSION_KEYS else 'promo_id'
+        changed[target] = changed.get(target, 0) + upsert_rows(conn, target, rows, key)
+    return changed
+
+changes = {}
+for table_name in LOAD_ORDER:
+    if table_name not in FINGERPRINT_TABLES:
+        changes.update(upsert_table(table_name))
+for table_name, count in changes.items():
+    print(f"   ✓ {table_name:<20} {count:>10,} rows inserted or updated")
+print()
+
+# ============================================================================
+# STEP 2: LOAD NEW AND CHANGED FACT WEEKS
+# ============================================================================
+
+print("📥 Loading new and changed fact rows...")
+
+def insert_facts(table_name, rows):
+    """Insert fact rows, into the files of their years when the database is partitioned"""
+    if partitions:
+        partitions.insert(table_name, rows)
+    else:
+        insert_rows(conn, table_name, rows)
+
+def delete_weeks(table_name, week_keys):
+    """Delete the fact rows of some weeks, from the files of their years when the database is partitioned"""
+    if partitions:
+        partitions.delete_weeks(table_name, week_keys)
+    else:
+        conn.executemany(f"DELETE FROM {table_name} WHERE week_key = ?", [(week_key,) for week_key in week_keys])
+
+def fact_rows(table_name, chunk):
+    """Fact rows of a generated chunk with surrogate keys (channels seen for the first time are added)"""
+    for target, rows in keys.frames(table_name, chunk):
+        if target != table_name:
+            insert_rows(conn, target, rows)
+    return rows
+
+def appended_offset(table_name, path):
+    """(size at the last load, hasher of those bytes) if a CSV file has only grown since, else (None, None)"""
+    if table_name not in sources or not path.endswith('.csv'):
+        return None, None
+    size, digest = sources[table_name]
+    if os.path.getsize(path) < size:
+        return None, None
+    hasher = file_digest(path, size)
+    return (size, hasher) if hasher.hexdigest() == digest else (None, None)
+
+def load_appended(table_name, offset):
+    """Insert the rows appended to a CSV file after ``offset``; returns (rows, weeks touched)"""
+    inserted, weeks = 0, set()
+    for chunk in iter_table(DATA_DIR, table_name, CHUNK_ROWS, offset=offset):
+        rows = fact_rows(table_name, chunk)
+        insert_facts(table_name, rows)
+        loaded.add(table_name, rows)
+        weeks.update(rows['week_key'].unique().tolist())
+        inserted += len(rows)
+    return inserted, sorted(weeks)
+
+def load_changed_weeks(table_name):
+    """Insert the rows of new weeks and replace weeks whose rows changed; returns (rows, weeks touched)"""
+    known = set(loaded.weeks(table_name).tolist())
+    if not known:  # loaded before fingerprints were recorded: compare every week in the table
+        known = {week_key for (week_key,) in conn.execute(f"SELECT DISTINCT week_key FROM {table_name}")}
+    in_files = WeekFingerprints()
+    inserted = 0
+    for chunk in iter_table(DATA_DIR, table_name, CHUNK_ROWS):
+        rows = fact_rows(table_name, chunk)
+        in_files.add(table_name, rows)
+        new = rows[~rows['week_key'].isin(known)]
+        insert_facts(table_name, new)
+        inserted += len(new)
+
+    weeks = in_files.weeks(table_name).tolist()
+    changed = [week_key for week_key in weeks
+               if week_key in known and in_files.get(table_name, week_key) != loaded.get(table_name, week_key)]
+    if changed:
+        delete_weeks(table_name, changed)
+        for chunk in iter_table(DATA_DIR, table_name, CHUNK_ROWS):
+            rows = fact_rows(table_name, chunk)
+            rows = rows[rows['week_key'].isin(changed)]
+            insert_facts(table_name, rows)
+            inserted += len(rows)
+    touched = [week_key for week_key in weeks if week_key not in known] + changed
+    loaded.update(in_files, table_name, touched)
+    return inserted, touched
+
+for table_name in FINGERPRINT_TABLES:
+    path = table_path(DATA_DIR, table_name)
+    offset, hasher = appended_offset(table_name, path)
+    if offset is not None:
+        inserted, weeks = load_appended(table_name, offset)
+        hasher = file_digest(path, start=offset, hasher=hasher)  # continue the digest over the new rows
+        how = f"appended rows only, read from byte {offset:,}"
+    else:
+        inserted, weeks = load_changed_weeks(table_name)
+        hasher = file_digest(path) if path.endswith('.csv') else None
+        how = "weeks compared with the last load"
+    loaded.save(conn, table_name, weeks)
+    if hasher is not None:
+        conn.execute("INSERT OR REPLACE INTO load_sources VALUES (?, ?, ?)",
+                     (table_name, os.path.getsize(path), hasher.hexdigest()))
+    changes[table_name] = inserted
+    print(f"   ✓ {table_name:<20} {inserted:>10,} rows in {len(weeks)} week(s) ({how})")
+print()
+
+# ============================================================================
+# STEP 3: REFRESH SUMMARIES AND COMMIT
+# ============================================================================
+
+# Categories are stored in the weekly category summary: a product change re-aggregates every week
+print("📐 Refreshing summary tables...")
+if any(changes.values()):
+    bump_data_version(conn)  # cached query results of the previous data no longer match
+refreshed = refresh_summaries(conn, full=changes.get('dim_product', 0) > 0)  # commits the update
+conn.execute("PRAGMA optimize")
+conn.close()
+print(f"   ✓ Re-aggregated {refreshed} week(s)")
+print()
+
+print("="*80)
+print(f"✅ DATABASE UPDATED in {time.perf_counter() - start:.2f}s")
+print("="*80)
@@ -0,0 +1,1455 @@
+"""
+CHI LIMITED - DATABASE TARGETS
+Star schema DDL, indexes and views, and the loader shared by create_database.py
+and the direct generator-to-database pipeline
+
+Facts reference the dimensions by INTEGER surrogate keys (week_key follows
+the calendar), so joins and week-range predicates compare small integers;
+the natural ids ('2022-W01', 'SKU001') stay as unique dimension attributes,
+and the v_fact_* views show the facts with natural keys as generated.
+
+SQLite is the main target. DuckDB (optional, pip install duckdb) can be used
+as a local columnar engine with the same tables and views: scans and
+aggregations run vectorized on all cores, with no server involved. Scripts
+pick the engine per run (--engine); connect(), read_sql() and the loader
+functions take the engine or connection and hide the differences.
+"""
+
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from star_schema import parse_transaction_ids
+
+ENGINES = ('sqlite', 'duckdb')
+
+# Default database file of each engine (scripts run from the repository root)
+DB_PATHS = {'sqlite': 'chi_limited.db', 'duckdb': 'chi_limited.duckdb'}
+
+# Star schema tables, in creation order. Dimensions carry an INTEGER surrogate
+# key (their rowid) next to the natural id; facts reference the surrogate keys.
+TABLES = {
+    'dim_product': """
+        CREATE TABLE dim_product (
+            product_key INTEGER PRIMARY KEY,
+            product_id TEXT NOT NULL UNIQUE,
+            product_name TEXT NOT NULL,
+            brand TEXT NOT NULL,
+            category TEXT NOT NULL,
+            pack_size_ml INTEGER,
+            pack_format TEXT,
+            target_segment TEXT,
+            unit_price_ngn_2024 REAL NOT NULL,
+            cogs_percentage REAL
+        )
+    """,
+    'dim_geography': """
+        CREATE TABLE dim_geography (
+            region_key INTEGER PRIMARY KEY,
+            region_id TEXT NOT NULL UNIQUE,
+            region_name TEXT NOT NULL,
+            urbanization_index REAL,
+            population_millions REAL,
+            wealth_index REAL
+        )
+    """,
+    'dim_time': """
+        CREATE TABLE dim_time (
+            week_key INTEGER PRIMARY KEY,
+            week_id TEXT NOT NULL UNIQUE,
+            week_start_date TEXT NOT NULL,
+            week_end_date TEXT NOT NULL,
+            month_name TEXT NOT NULL,
+            month_number INTEGER,
+            quarter TEXT NOT NULL,
+            year INTEGER NOT NULL,
+            week_of_year INTEGER NOT NULL,
+            is_holiday_week INTEGER DEFAULT 0,
+            season TEXT NOT NULL,
+            festive_period TEXT DEFAULT 'Regular'
+        )
+    """,
+    'dim_channel': """
+        CREATE TABLE dim_channel (
+            channel_key INTEGER PRIMARY KEY,
+            channel_id TEXT NOT NULL UNIQUE
+        )
+    """,
+    'fact_sales': """
+        CREATE TABLE fact_sales (
+            transaction_no INTEGER PRIMARY KEY,
+            week_key INTEGER NOT NULL,
+            product_key INTEGER NOT NULL,
+            region_key INTEGER NOT NULL,
+            channel_key INTEGER NOT NULL,
+            units_sold INTEGER NOT NULL DEFAULT 0,
+            revenue_ngn REAL NOT NULL DEFAULT 0,
+            cost_of_goods_sold REAL NOT NULL DEFAULT 0,
+            promo_discount_ngn REAL DEFAULT 0,
+            baseline_demand INTEGER,
+            FOREIGN KEY (week_key) REFERENCES dim_time(week_key),
+            FOREIGN KEY (product_key) REFERENCES dim_product(product_key),
+            FOREIGN KEY (region_key) REFERENCES dim_geography(region_key),
+            FOREIGN KEY (channel_key) REFERENCES dim_channel(channel_key)
+        )
+    """,
+    # Campaigns can be planned past the last loaded week, so the window keeps
+    # its week ids and its week keys are calendar positions, not references
+    'fact_promotions': """
+        CREATE TABLE fact_promotions (
+            promo_id TEXT PRIMARY KEY,
+            product_key INTEGER NOT NULL,
+            region_key INTEGER NOT NULL,
+            channel_key INTEGER NOT NULL,
+            promo_type TEXT NOT NULL,
+            discount_percentage REAL NOT NULL,
+            promo_start_week TEXT NOT NULL,
+            promo_end_week TEXT NOT NULL,
+            start_week_key INTEGER NOT NULL,
+            end_week_key INTEGER NOT NULL,
+            promo_cost_ngn REAL NOT NULL DEFAULT 0,
+            incremental_volume_target INTEGER,
+            FOREIGN KEY (product_key) REFERENCES dim_product(product_key),
+            FOREIGN KEY (region_key) REFERENCES dim_geography(region_key),
+            FOREIGN KEY (channel_key) REFERENCES dim_channel(channel_key)
+        )
+    """,
+    'fact_inventory': """
+        CREATE TABLE fact_inventory (
+            inventory_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            week_key INTEGER NOT NULL,
+            product_key INTEGER NOT NULL,
+            region_key INTEGER NOT NULL,
+            opening_stock_units INTEGER NOT NULL DEFAULT 0,
+            closing_stock_units INTEGER NOT NULL DEFAULT 0,
+            stockout_days INTEGER DEFAULT 0,
+            inventory_holding_cost_ngn REAL DEFAULT 0,
+            FOREIGN KEY (week_key) REFERENCES dim_time(week_key),
+            FOREIGN KEY (product_key) REFERENCES dim_product(product_key),
+            FOREIGN KEY (region_key) REFERENCES dim_geography(region_key)
+        )
+    """,
+    # One row per promotion and loaded week it covers, so sales match
+    # promotions by equality on (week, product, region, channel) instead of a range
+    'bridge_promo_week': """
+        CREATE TABLE bridge_promo_week (
+            promo_id TEXT NOT NULL,
+            week_key INTEGER NOT NULL,
+            product_key INTEGER NOT NULL,
+            region_key INTEGER NOT NULL,
+            channel_key INTEGER NOT NULL,
+            PRIMARY KEY (promo_id, week_key),
+            FOREIGN KEY (promo_id) REFERENCES fact_promotions(promo_id),
+            FOREIGN KEY (week_key) REFERENCES dim_time(week_key)
+        )
+    """,
+}
+
+# Generated tables, dimensions before the facts that reference them
+# (dim_channel has no file; it is filled from the channels the facts use)
+LOAD_ORDER = ['dim_product', 'dim_geography', 'dim_time', 'fact_promotions', 'fact_sales', 'fact_inventory']
+
+# Dimension -> (natural key, surrogate key)
+DIMENSION_KEYS = {
+    'dim_product': ('product_id', 'product_key'),
+    'dim_geography': ('region_id', 'region_key'),
+    'dim_time': ('week_id', 'week_key'),
+    'dim_channel': ('channel_id', 'channel_key'),
+}
+
+# Natural key column in the generated fact tables -> (natural key, surrogate key column)
+FACT_KEYS = {
+    'week_id': ('week_id', 'week_key'),
+    'product_id': ('product_id', 'product_key'),
+    'region_id': ('region_id', 'region_key'),
+    'channel_id': ('channel_id', 'channel_key'),
+}
+
+# Promotion window columns -> calendar position keys stored next to them
+PROMO_WEEK_KEYS = {'promo_start_week': 'start_week_key', 'promo_end_week': 'end_week_key'}
+
+INDEXES = [
+    "CREATE INDEX idx_product_category ON dim_product(category)",
+    "CREATE INDEX idx_time_year ON dim_time(year)",
+    "CREATE INDEX idx_time_festive ON dim_time(festive_period)",
+    "CREATE INDEX idx_sales_week_product_region ON fact_sales(week_key, product_key, region_key, channel_key)",
+    "CREATE INDEX idx_sales_product ON fact_sales(product_key)",
+    "CREATE INDEX idx_sales_region ON fact_sales(region_key)",
+    "CREATE INDEX idx_sales_channel_product ON fact_sales(channel_key, product_key, revenue_ngn, units_sold)",
+    "CREATE INDEX idx_promo_product ON fact_promotions(product_key)",
+    "CREATE INDEX idx_inventory_week ON fact_inventory(week_key)",
+    "CREATE INDEX idx_bridge_week_promo ON bridge_promo_week(week_key, promo_id, product_key, region_key, channel_key)",
+]
+
+# Rebuild of bridge_promo_week from fact_promotions and the loaded calendar
+BRIDGE_BUILD = [
+    "DELETE FROM bridge_promo_week",
+    """
+        INSERT INTO bridge_promo_week
+        SELECT p.promo_id, t.week_key, p.product_key, p.region_key, p.channel_key
+        FROM fact_promotions p
+        JOIN dim_time t ON t.week_key BETWEEN p.start_week_key AND p.end_week_key
+    """,
+]
+
+# Triggers keeping the bridge in step with promotion and calendar changes (SQLite)
+BRIDGE_TRIGGERS = [
+    """
+        CREATE TRIGGER trg_fact_promotions_insert_bridge AFTER INSERT ON fact_promotions BEGIN
+            INSERT INTO bridge_promo_week
+            SELECT NEW.promo_id, week_key, NEW.product_key, NEW.region_key, NEW.channel_key
+            FROM dim_time WHERE week_key BETWEEN NEW.start_week_key AND NEW.end_week_key;
+        END
+    """,
+    """
+        CREATE TRIGGER trg_fact_promotions_delete_bridge AFTER DELETE ON fact_promotions BEGIN
+            DELETE FROM bridge_promo_week WHERE promo_id = OLD.promo_id;
+        END
+    """,
+    """
+        CREATE TRIGGER trg_fact_promotions_update_bridge AFTER UPDATE ON fact_promotions BEGIN
+            DELETE FROM bridge_promo_week WHERE promo_id = OLD.promo_id;
+            INSERT INTO bridge_promo_week
+            SELECT NEW.promo_id, week_key, NEW.product_key, NEW.region_key, NEW.channel_key
+            FROM dim_time WHERE week_key BETWEEN NEW.start_week_key AND NEW.end_week_key;
+        END
+    """,
+    """
+        CREATE TRIGGER trg_dim_time_insert_bridge AFTER INSERT ON dim_time BEGIN
+            INSERT INTO bridge_promo_week
+            SELECT promo_id, NEW.week_key, product_key, region_key, channel_key
+            FROM fact_promotions WHERE NEW.week_key BETWEEN start_week_key AND end_week_key;
+        END
+    """,
+]
+
+# Summary tables: additive aggregates of the facts by week (inventory by year),
+# small enough for the analytical views to roll up in milliseconds. Kept
+# current by refresh_summaries(), which re-aggregates only the changed weeks.
+SUMMARY_TABLES = {
+    'agg_sales_week_category': """
+        CREATE TABLE agg_sales_week_category (
+            week_key INTEGER NOT NULL,
+            category TEXT NOT NULL,
+            revenue_ngn REAL NOT NULL,
+            units_sold INTEGER NOT NULL,
+            cost_of_goods_sold REAL NOT NULL,
+            gross_profit_ngn REAL NOT NULL,
+            sales_rows INTEGER NOT NULL,
+            PRIMARY KEY (week_key, category)
+        )
+    """,
+    'agg_sales_week_region': """
+        CREATE TABLE agg_sales_week_region (
+            week_key INTEGER NOT NULL,
+            region_key INTEGER NOT NULL,
+            revenue_ngn REAL NOT NULL,
+            units_sold INTEGER NOT NULL,
+            sales_rows INTEGER NOT NULL,
+            PRIMARY KEY (week_key, region_key)
+        )
+    """,
+    'agg_promo_week': """
+        CREATE TABLE agg_promo_week (
+            promo_id TEXT NOT NULL,
+            week_key INTEGER NOT NULL,
+            revenue_ngn REAL NOT NULL,
+            units_sold INTEGER NOT NULL,
+            incremental_units INTEGER NOT NULL,
+            PRIMARY KEY (promo_id, week_key)
+        )
+    """,
+    'agg_inventory_year': """
+        CREATE TABLE agg_inventory_year (
+            year INTEGER NOT NULL,
+            product_key INTEGER NOT NULL,
+            region_key INTEGER NOT NULL,
+            stockout_days INTEGER NOT NULL,
+            closing_stock_units INTEGER NOT NULL,
+            inventory_rows INTEGER NOT NULL,
+            holding_cost_ngn REAL NOT NULL,
+            PRIMARY KEY (year, product_key, region_key)
+        )
+    """,
+    'summary_stale_weeks': """
+        CREATE TABLE summary_stale_weeks (
+            week_key INTEGER PRIMARY KEY
+        )
+    """,
+}
+
+# Re-aggregation of the weeks listed in the temp table refresh_weeks
+SUMMARY_REFRESH = [
+    "DELETE FROM agg_sales_week_category WHERE week_key IN (SELECT week_key FROM refresh_weeks)",
+    """
+        INSERT INTO agg_sales_week_category
+        SELECT 
+            s.week_key,
+            p.category,
+            SUM(s.revenue_ngn),
+            SUM(s.units_sold),
+            SUM(s.cost_of_goods_sold),
+            SUM(s.revenue_ngn - s.cost_of_goods_sold),
+            COUNT(*)
+        FROM fact_sales s
+        JOIN dim_product p ON s.product_key = p.product_key
+        WHERE s.week_key IN (SELECT week_key FROM refresh_weeks)
+        GROUP BY s.week_key, p.category
+    """,
+    "DELETE FROM agg_sales_week_region WHERE week_key IN (SELECT week_key FROM refresh_weeks)",
+    """
+        INSERT INTO agg_sales_week_region
+        SELECT s.week_key, s.region_key, SUM(s.revenue_ngn), SUM(s.units_sold), COUNT(*)
+        FROM fact_sales s
+        WHERE s.week_key IN (SELECT week_key FROM refresh_weeks)
+        GROUP BY s.week_key, s.region_key
+    """,
+    "DELETE FROM agg_promo_week WHERE week_key IN (SELECT week_key FROM refresh_weeks)",
+    """
+        INSERT INTO agg_promo_week
+        SELECT 
+            b.promo_id,
+            b.week_key,
+            SUM(s.revenue_ngn),
+            SUM(s.units_sold),
+            SUM(s.units_sold - s.baseline_demand)
+        FROM bridge_promo_week b
+        JOIN fact_sales s ON s.week_key = b.week_key 
+            AND s.product_key = b.product_key 
+            AND s.region_key = b.region_key
+            AND s.channel_key = b.channel_key
+        WHERE b.week_key IN (SELECT week_key FROM refresh_weeks)
+        GROUP BY b.promo_id, b.week_key
+    """,
+    # Inventory is summarised by year: every year touched by a changed week is rebuilt
+    """
+        DELETE FROM agg_inventory_year
+        WHERE year IN (SELECT DISTINCT year FROM dim_time WHERE week_key IN (SELECT week_key FROM refresh_weeks))
+    """,
+    """
+        INSERT INTO agg_inventory_year
+        SELECT 
+            t.year,
+            i.product_key,
+            i.region_key,
+            SUM(i.stockout_days),
+            SUM(i.closing_stock_units),
+            COUNT(*),
+            SUM(i.inventory_holding_cost_ngn)
+        FROM fact_inventory i
+        JOIN dim_time t ON i.week_key = t.week_key
+        WHERE t.year IN (SELECT DISTINCT year FROM dim_time WHERE week_key IN (SELECT week_key FROM refresh_weeks))
+        GROUP BY t.year, i.product_key, i.region_key
+    """,
+]
+
+# Fact table -> week key columns whose weeks a row change makes stale
+# (a promotion covers every week from its start to its end)
+STALE_WEEK_SOURCES = {
+    'fact_sales': "SELECT {row}.week_key",
+    'fact_inventory': "SELECT {row}.week_key",
+    'fact_promotions': "SELECT week_key FROM dim_time WHERE week_key BETWEEN {row}.start_week_key AND {row}.end_week_key",
+}
+
+# Analytical views (over the summary tables)
+VIEWS = {
+    'v_weekly_revenue_by_category': """
+        CREATE VIEW v_weekly_revenue_by_category AS
+        SELECT 
+            t.week_id,
+            t.week_start_date,
+            t.year,
+            t.quarter,
+            a.category,
+            a.revenue_ngn AS total_revenue,
+            a.units_sold AS total_units,
+            a.cost_of_goods_sold AS total_cogs,
+            a.gross_profit_ngn AS gross_profit,
+            ROUND(100.0 * a.gross_profit_ngn / NULLIF(a.revenue_ngn, 0), 2) AS gross_margin_pct
+        FROM agg_sales_week_category a
+        JOIN dim_time t ON a.week_key = t.week_key
+        ORDER BY t.week_start_date, a.category
+    """,
+    'v_regional_performance': """
+        CREATE VIEW v_regional_performance AS
+        SELECT 
+            g.region_name,
+            COUNT(*) AS weeks_of_data,
+            SUM(a.revenue_ngn) AS total_revenue,
+            SUM(a.units_sold) AS total_units,
+            ROUND(SUM(a.revenue_ngn) / SUM(a.sales_rows), 2) AS avg_transaction_revenue
+        FROM agg_sales_week_region a
+        JOIN dim_geography g ON a.region_key = g.region_key
+        GROUP BY g.region_key, g.region_name
+        ORDER BY total_revenue DESC
+    """,
+    'v_promotional_effectiveness': """
+        CREATE VIEW v_promotional_effectiveness AS
+        SELECT 
+            p.promo_id,
+            p.promo_type,
+            p.discount_percentage,
+            pr.category,
+            SUM(a.revenue_ngn) AS promo_revenue,
+            SUM(a.units_sold) AS promo_units,
+            SUM(a.incremental_units) AS incremental_units,
+            p.promo_cost_ngn,
+            ROUND(SUM(a.revenue_ngn) / NULLIF(p.promo_cost_ngn, 0), 2) AS roi
+        FROM fact_promotions p
+        JOIN agg_promo_week a ON a.promo_id = p.promo_id
+        JOIN dim_product pr ON p.product_key = pr.product_key
+        GROUP BY p.promo_id, p.promo_type, p.discount_percentage, pr.category, p.promo_cost_ngn
+        HAVING SUM(a.incremental_units) > 0
+        ORDER BY roi DESC
+    """,
+    'v_inventory_health': """
+        CREATE VIEW v_inventory_health AS
+        SELECT 
+            p.product_name,
+            p.category,
+            g.region_name,
+            SUM(a.stockout_days) AS total_stockout_days,
+            ROUND(1.0 * SUM(a.closing_stock_units) / SUM(a.inventory_rows), 0) AS avg_closing_stock,
+            SUM(a.holding_cost_ngn) AS total_holding_cost
+        FROM agg_inventory_year a
+        JOIN dim_product p ON a.product_key = p.product_key
+        JOIN dim_geography g ON a.region_key = g.region_key
+        GROUP BY p.product_key, p.product_name, p.category, g.region_key, g.region_name
+        ORDER BY total_stockout_days DESC
+    """,
+    'v_seasonal_performance': """
+        CREATE VIEW v_seasonal_performance AS
+        SELECT 
+            t.season,
+            t.festive_period,
+            a.category,
+            COUNT(*) AS weeks,
+            SUM(a.revenue_ngn) AS total_revenue,
+            ROUND(SUM(a.revenue_ngn) / SUM(a.sales_rows), 2) AS avg_weekly_revenue,
+            SUM(a.units_sold) AS total_units
+        FROM agg_sales_week_category a
+        JOIN dim_time t ON a.week_key = t.week_key
+        GROUP BY t.season, t.festive_period, a.category
+        ORDER BY t.season, a.category, total_revenue DESC
+    """,
+}
+
+# The fact tables with natural keys, laid out like the generated files
+FACT_VIEWS = {
+    'v_fact_sales': """
+        CREATE VIEW v_fact_sales AS
+        SELECT 
+            printf('TXN-%06d', s.transaction_no) AS transaction_id,
+            t.week_id,
+            p.product_id,
+            g.region_id,
+            c.channel_id,
+            s.units_sold,
+            s.revenue_ngn,
+            s.cost_of_goods_sold,
+            s.promo_discount_ngn,
+            s.baseline_demand
+        FROM fact_sales s
+        JOIN dim_time t ON s.week_key = t.week_key
+        JOIN dim_product p ON s.product_key = p.product_key
+        JOIN dim_geography g ON s.region_key = g.region_key
+        JOIN dim_channel c ON s.channel_key = c.channel_key
+        ORDER BY s.transaction_no
+    """,
+    'v_fact_promotions': """
+        CREATE VIEW v_fact_promotions AS
+        SELECT 
+            f.promo_id,
+            p.product_id,
+            g.region_id,
+            c.channel_id,
+            f.promo_type,
+            f.discount_percentage,
+            f.promo_start_week,
+            f.promo_end_week,
+            f.promo_cost_ngn,
+            f.incremental_volume_target
+        FROM fact_promotions f
+        JOIN dim_product p ON f.product_key = p.product_key
+        JOIN dim_geography g ON f.region_key = g.region_key
+        JOIN dim_channel c ON f.channel_key = c.channel_key
+        ORDER BY f.promo_id
+    """,
+    'v_fact_inventory': """
+        CREATE VIEW v_fact_inventory AS
+        SELECT 
+            i.inventory_id,
+            t.week_id,
+            p.product_id,
+            g.region_id,
+            i.opening_stock_units,
+            i.closing_stock_units,
+            i.stockout_days,
+            i.inventory_holding_cost_ngn
+        FROM fact_inventory i
+        JOIN dim_time t ON i.week_key = t.week_key
+        JOIN dim_product p ON i.product_key = p.product_key
+        JOIN dim_geography g ON i.region_key = g.region_key
+        ORDER BY i.inventory_id
+    """,
+}
+
+# What the last load read, for incremental updates (sql/update_database.py):
+# row count and checksum of every week of the fact tables (see
+# WeekFingerprints), and the size and digest of each generated CSV file, so a
+# file that only grew is read from where the last load stopped. data_version
+# holds a stamp that every load replaces, for query result caches.
+LOAD_STATE_TABLES = {
+    'load_fingerprints': """
+        CREATE TABLE load_fingerprints (
+            table_name TEXT NOT NULL,
+            week_key INTEGER NOT NULL,
+            row_count INTEGER NOT NULL,
+            checksum BIGINT NOT NULL,
+            PRIMARY KEY (table_name, week_key)
+        )
+    """,
+    'load_sources': """
+        CREATE TABLE load_sources (
+            table_name TEXT PRIMARY KEY,
+            size_bytes INTEGER NOT NULL,
+            digest TEXT NOT NULL
+        )
+    """,
+    'data_version': """
+        CREATE TABLE data_version (
+            version TEXT NOT NULL,
+            loaded_at TEXT NOT NULL
+        )
+    """,
+}
+
+# Generated (natural-key) fact layout -> view presenting it, for SQL written
+# against the files (sql/*.sql)
+NATURAL_FACT_VIEWS = {'fact_sales': 'v_fact_sales', 'fact_promotions': 'v_fact_promotions',
+                      'fact_inventory': 'v_fact_inventory'}
+
+# Fact tables tracked week by week
+FINGERPRINT_TABLES = ('fact_sales', 'fact_inventory')
+
+# Fact tables stored one file per calendar year in a partitioned database
+# (see YearPartitions), and the registry of those files in the main one
+PARTITIONED_TABLES = ('fact_sales', 'fact_inventory')
+PARTITION_TABLES = {
+    'fact_partitions': """
+        CREATE TABLE fact_partitions (
+            year INTEGER PRIMARY KEY,
+            file_name TEXT NOT NULL,
+            frozen INTEGER NOT NULL DEFAULT 0
+        )
+    """,
+}
+
+# A table in a FROM or JOIN clause, with its alias if it has one
+TABLE_REFERENCE = (r'\b(FROM|JOIN)\s+({tables})\b(?:\s+(?:AS\s+)?(?!(?:WHERE|JOIN|INNER|LEFT|RIGHT|FULL|CROSS|'
+                   r'NATURAL|ON|USING|GROUP|ORDER|LIMIT|HAVING|WINDOW|UNION|EXCEPT|INTERSECT)\b)(\w+))?')
+
+# Literal comparisons of the calendar (dim_time year or week_id) a query's facts can be pruned by
+LITERAL = r"(?:\d+|'[^']*')"
+CALENDAR_FILTER = re.compile(rf"\b(?:(\w+)\.)?((?:year|week_id)\s*(?:(?:==?|>=|<=|>|<)\s*{LITERAL}"
+                             rf"|IN\s*\(\s*{LITERAL}(?:\s*,\s*{LITERAL})*\s*\)|BETWEEN\s+{LITERAL}\s+AND\s+{LITERAL}))",
+                             re.IGNORECASE)
+
+# SQLite page cache during a bulk load; index builds sort within a budget of
+# the same size, so a bulk load peaks at about twice this plus one chunk
+CACHE_MB = 256
+
+# SQLite settings while bulk loading, and the ones restored afterwards
+BULK_PRAGMAS = [
+    "PRAGMA journal_mode = MEMORY",
+    "PRAGMA synchronous = OFF",
+    "PRAGMA locking_mode = EXCLUSIVE",
+]
+DEFAULT_PRAGMAS = [
+    "PRAGMA journal_mode = DELETE",
+    "PRAGMA synchronous = FULL",
+    "PRAGMA locking_mode = NORMAL",
+]
+
+# Incremental updates write ahead of the database file, so readers keep
+# seeing the last committed state until the update commits
+INCREMENTAL_PRAGMAS = [
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+]
+
+
+def _require_duckdb():
+    try:
+        import duckdb
+    except ImportError:
+        raise ImportError("The DuckDB target needs duckdb: pip install duckdb") from None
+    return duckdb
+
+
+def connect(db_path, engine='sqlite', fresh=False, read_only=False):
+    """Open a database; ``fresh`` deletes an existing file first.
+
+    The year files of a partitioned SQLite database are attached on opening.
+    A ``read_only`` SQLite connection (mode=ro, files attached read-only too)
+    may be handed between threads, one at a time.
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine!r}; expected one of {ENGINES}")
+    if fresh:
+        for path in (db_path, db_path + '.wal', db_path + '-wal', db_path + '-shm'):
+            if os.path.exists(path):
+                os.remove(path)
+    if engine == 'duckdb':
+        return _require_duckdb().connect(db_path, read_only=read_only)
+    import sqlite3
+    if read_only:
+        conn = sqlite3.connect(Path(db_path).resolve().as_uri() + '?mode=ro', uri=True, check_same_thread=False)
+    else:
+        conn = sqlite3.connect(db_path, uri=True)  # URIs let frozen partitions attach read-only
+    if not fresh and is_partitioned(conn):
+        YearPartitions(conn).attach()
+    return conn
+
+
+def is_partitioned(conn):
+    """Whether a SQLite database keeps its weekly facts in per-year files (see YearPartitions)"""
+    import sqlite3
+    return isinstance(conn, sqlite3.Connection) and conn.execute(
+        "SELECT 1 FROM main.sqlite_master WHERE type = 'table' AND name = 'fact_partitions'").fetchone() is not None
+
+
+def table_ddl(table, engine='sqlite'):
+    """CREATE statement(s) for a table.
+
+    DuckDB gets the same columns without the key constraints: it does not use
+    them for planning, and maintaining them costs most of a bulk load. REAL
+    becomes DOUBLE (REAL is 4 bytes in DuckDB), and inventory rows are
+    numbered from a sequence instead of AUTOINCREMENT.
+    """
+    ddl = {**TABLES, **SUMMARY_TABLES, **LOAD_STATE_TABLES, **PARTITION_TABLES}[table]
+    if engine != 'duckdb':
+        return [ddl]
+    lines = [line for line in ddl.split('\n')
+             if 'FOREIGN KEY' not in line and not line.strip().startswith('PRIMARY KEY')]
+    ddl = re.sub(r',(\s*\))', r'\1', '\n'.join(lines)).replace(' PRIMARY KEY', '').replace(' REAL', ' DOUBLE')
+    if 'AUTOINCREMENT' not in ddl:
+        return [ddl]
+    sequence = f"seq_{table}"
+    return [f"CREATE SEQUENCE {sequence}",
+            ddl.replace("INTEGER AUTOINCREMENT", f"INTEGER DEFAULT nextval('{sequence}')")]
+
+
+def create_tables(conn, engine='sqlite'):
+    for table in TABLES:
+        for statement in table_ddl(table, engine):
+            conn.execute(statement)
+    conn.commit()
+
+
+def create_load_state(conn, engine='sqlite'):
+    for table in LOAD_STATE_TABLES:
+        for statement in table_ddl(table, engine):
+            conn.execute(statement)
+    conn.commit()
+
+
+def bulk_mode(conn, engine='sqlite', cache_mb=CACHE_MB):
+    """Relax durability and enlarge the page cache for a load (SQLite only)"""
+    if engine == 'sqlite':
+        for pragma in BULK_PRAGMAS + [f"PRAGMA cache_size = -{cache_mb * 1024}"]:
+            conn.execute(pragma)
+
+
+def normal_mode(conn, engine='sqlite'):
+    """Restore the default SQLite settings after a bulk load"""
+    if engine == 'sqlite':
+        for pragma in DEFAULT_PRAGMAS:
+            conn.execute(pragma)
+
+
+def incremental_mode(conn):
+    """Switch a SQLite database to WAL for updates and concurrent readers (frozen year files are left as they are)"""
+    frozen = set()
+    if is_partitioned(conn):
+        frozen = {YearPartitions.schema(year) for year, is_frozen in YearPartitions(conn).years.items() if is_frozen}
+    for _, schema, _ in conn.execute("PRAGMA database_list").fetchall():
+        if schema != 'temp' and schema not in frozen:
+            for pragma in INCREMENTAL_PRAGMAS:
+                conn.execute(pragma.replace("PRAGMA ", f"PRAGMA {schema}.", 1))
+
+
+def insert_rows(conn, table, df, engine='sqlite'):
+    """Insert a DataFrame into a table (inside the caller's transaction)"""
+    columns = ', '.join(df.columns)
+    if engine == 'duckdb':
+        conn.register('_chunk', df)
+        conn.execute(f"INSERT INTO {table} ({columns}) SELECT {columns} FROM _chunk")
+        conn.unregister('_chunk')
+        return
+    placeholders = ', '.join('?' * len(df.columns))
+    conn.executemany(f"INSERT INTO {table} ({columns}) VALUES ({placeholders})",
+                     zip(*(df[column].tolist() for column in df.columns)))
+
+
+def upsert_rows(conn, table, df, key):
+    """Insert rows, updating the row with the same ``key`` where a value differs (SQLite).
+
+    Unchanged rows are left alone, so their triggers do not fire. Returns the
+    number of rows inserted or updated.
+    """
+    columns = list(df.columns)
+    values = [column for column in columns if column != key]
+    sql = (f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+           f"ON CONFLICT ({key}) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in values)} "
+           f"WHERE {' OR '.join(f'{c} IS NOT excluded.{c}' for c in values)}")
+    cursor = conn.executemany(sql, zip(*(df[column].tolist() for column in columns)))
+    return max(cursor.rowcount, 0)
+
+
+def create_indexes(conn, engine='sqlite', analyze=True):
+    """Create the indexes (in every year file when partitioned); ``analyze`` also refreshes the planner statistics"""
+    partitions = YearPartitions(conn) if is_partitioned(conn) else None
+    for idx_sql in INDEXES:
+        if partitions and index_table(idx_sql) in PARTITIONED_TABLES:
+            for year in partitions.years:
+                conn.execute(partitions.index_sql(idx_sql, year))
+        else:
+            conn.execute(idx_sql)
+    if analyze:
+        update_statistics(conn, engine)
+    conn.commit()
+
+
+def update_statistics(conn, engine='sqlite'):
+    """Refresh the query planner statistics of every table (run once the data is loaded)"""
+    if engine == 'sqlite':
+        conn.execute("PRAGMA analysis_limit = 1000")  # sampled statistics: enough for the planner, no full scans
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+def reads_partitioned(sql):
+    """The partitioned fact table a statement reads, or None"""
+    match = re.search(r'\b(?:FROM|JOIN)\s+(' + '|'.join(PARTITIONED_TABLES) + r')\b', sql)
+    return match.group(1) if match else None
+
+
+def index_table(idx_sql):
+    """Table a CREATE INDEX statement indexes"""
+    return re.search(r'\bON\s+(\w+)\s*\(', idx_sql).group(1)
+
+
+def build_bridge(conn):
+    """Fill bridge_promo_week from scratch (SQLite keeps it current with triggers afterwards)"""
+    for statement in BRIDGE_BUILD:
+        conn.execute(statement)
+    conn.commit()
+
+
+def stale_week_triggers(table, schema=None):
+    """Triggers recording the weeks of inserted, deleted and updated rows of a table (SQLite).
+
+    With ``schema`` they are TEMP triggers on that attached schema's table:
+    only TEMP triggers may write to another database file.
+    """
+    source = STALE_WEEK_SOURCES[table]
+    name, create, target = f"trg_{table}", "CREATE TRIGGER", table
+    if schema:
+        name, create, target = f"trg_{schema}_{table}", "CREATE TEMP TRIGGER", f"{schema}.{table}"
+    triggers = []
+    for event, rows in [('INSERT', ['NEW']), ('DELETE', ['OLD']), ('UPDATE', ['OLD', 'NEW'])]:
+        body = ' '.join(f"INSERT OR IGNORE INTO summary_stale_weeks {source.format(row=row)};" for row in rows)
+        triggers.append(f"{create} {name}_{event.lower()}_stale AFTER {event} ON {target} BEGIN {body} END")
+    return triggers
+
+
+def maintenance_triggers(partitioned=False):
+    """Triggers keeping the bridge current and recording the weeks of changed fact rows (SQLite).
+
+    The fact tables of a partitioned database get theirs per connection
+    instead (see YearPartitions).
+    """
+    triggers = list(BRIDGE_TRIGGERS)
+    for table in STALE_WEEK_SOURCES:
+        if not (partitioned and table in PARTITIONED_TABLES):
+            triggers += stale_week_triggers(table)
+    return triggers
+
+
+def create_summaries(conn, engine='sqlite'):
+    """Create and fill the summary tables; on SQLite, start maintaining them with triggers"""
+    for table in SUMMARY_TABLES:
+        for statement in table_ddl(table, engine):
+            conn.execute(statement)
+    refresh_summaries(conn, full=True)
+    if engine == 'sqlite':
+        partitioned = is_partitioned(conn)
+        for trigger in maintenance_triggers(partitioned):
+            conn.execute(trigger)
+        if partitioned:
+            YearPartitions(conn).attach()
+    conn.commit()
+
+
+def refresh_summaries(conn, weeks=None, full=False):
+    """Re-aggregate the summary tables for changed weeks; returns the number of weeks refreshed.
+
+    By default the weeks recorded in summary_stale_weeks since the last
+    refresh (SQLite tracks them with triggers); ``weeks`` lists week_ids
+    explicitly instead, and ``full=True`` rebuilds every week. A partitioned
+    database re-aggregates from the year files of those weeks only. A refresh
+    of any week stamps a new data version in the same transaction.
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS refresh_weeks (week_key INTEGER PRIMARY KEY)")
+    conn.execute("DELETE FROM refresh_weeks")
+    if full:
+        conn.execute("INSERT INTO refresh_weeks SELECT week_key FROM dim_time")
+    elif weeks is not None:
+        placeholders = ', '.join('?' * len(weeks))
+        conn.execute(f"INSERT INTO refresh_weeks SELECT week_key FROM dim_time WHERE week_id IN ({placeholders})",
+                     list(weeks))
+    else:
+        conn.execute("INSERT INTO refresh_weeks SELECT week_key FROM summary_stale_weeks")
+    refreshed = conn.execute("SELECT COUNT(*) FROM refresh_weeks").fetchone()[0]
+    partitions = YearPartitions(conn) if is_partitioned(conn) else None
+    if partitions:
+        years = [year for (year,) in conn.execute(
+            "SELECT DISTINCT t.year FROM refresh_weeks r JOIN dim_time t ON t.week_key = r.week_key")]
+    for statement in SUMMARY_REFRESH:
+        for sql in partitions.per_partition(statement, years) if partitions else [statement]:
+            conn.execute(sql)
+    conn.execute("DELETE FROM summary_stale_weeks WHERE week_key IN (SELECT week_key FROM refresh_weeks)")
+    if refreshed:
+        bump_data_version(conn)  # the views now show the changed facts: drop cached results
+    conn.commit()
+    return refreshed
+
+
+def create_views(conn):
+    """Create the views; those over partitioned facts are TEMP views of each connection (see YearPartitions)"""
+    partitioned = is_partitioned(conn)
+    for name, view_sql in [*VIEWS.items(), *FACT_VIEWS.items()]:
+        if not (partitioned and reads_partitioned(view_sql)):
+            conn.execute(view_sql)
+    conn.commit()
+
+
+def mask_sql(sql):
+    """SQL with its string literals and comments blanked out, keeping every other character in place"""
+    return re.sub(r"('(?:[^']|'')*')|--[^\n]*|/\*.*?\*/",
+                  lambda m: ("'{}'" if m.group(1) else ' {} ').format(' ' * (len(m.group(0)) - 2)), sql, flags=re.DOTALL)
+
+
+def pruned(conn, sql):
+    """A query as read_sql() runs it: on a partitioned database, over the year files it needs"""
+    return YearPartitions(conn).prune(sql) if is_partitioned(conn) else sql
+
+
+def read_sql(conn, sql, params=None):
+    """Result of a query as a DataFrame, on either engine"""
+    import sqlite3
+    if isinstance(conn, sqlite3.Connection):
+        return pd.read_sql_query(pruned(conn, sql), conn, params=params)
+    return conn.execute(sql, params).df() if params is not None else conn.execute(sql).df()
+
+
+def bump_data_version(conn):
+    """Stamp the data as changed (inside the loader's transaction); returns the new version.
+
+    The stamp is random, not a counter, so a rebuilt database never repeats
+    the version of an earlier one.
+    """
+    import uuid
+    from datetime import datetime
+    conn.execute(table_ddl('data_version')[0].replace("CREATE TABLE", "CREATE TABLE IF NOT EXISTS", 1))
+    version = uuid.uuid4().hex
+    conn.execute("DELETE FROM data_version")
+    conn.execute("INSERT INTO data_version VALUES (?, ?)", (version, datetime.now().isoformat(timespec='seconds')))
+    return version
+
+
+def data_version(conn):
+    """Version stamp of the data, or None for a database loaded before stamps were written"""
+    try:
+        row = conn.execute("SELECT version FROM data_version").fetchone()
+    except query_errors(engine_of(conn)):
+        return None
+    return row[0] if row else None
+
+
+def engine_of(conn):
+    """Engine of an open connection"""
+    import sqlite3
+    return 'sqlite' if isinstance(conn, sqlite3.Connection) else 'duckdb'
+
+
+def query_errors(engine='sqlite'):
+    """Exception types a failing read_sql() raises on ``engine``"""
+    if engine == 'duckdb':
+        return (_require_duckdb().Error,)
+    import sqlite3
+    return (sqlite3.Error, pd.errors.DatabaseError)
+
+
+def translate_tsql(sql, engine='sqlite'):
+    """A SQL Server statement from sql/*.sql in the dialect of ``engine``.
+
+    TOP n becomes LIMIT n and, on SQLite, TRY_CAST becomes CAST. The files
+    query the facts with natural keys, as generated, so the fact tables are
+    read through the v_fact_* views. A view definition becomes its SELECT
+    (running it must not replace the views of this schema).
+    """
+    sql = re.sub(r'^\s*CREATE\s+(?:OR\s+ALTER\s+)?VIEW\s+\w+\s+AS\s+', '', sql, flags=re.IGNORECASE)
+    match = re.search(r'\bSELECT\s+TOP\s+(\d+)\s', sql, re.IGNORECASE)
+    if match:
+        sql = sql[:match.start()] + 'SELECT ' + sql[match.end():].rstrip() + f"\nLIMIT {match.group(1)}"
+    if engine == 'sqlite':
+        sql = re.sub(r'\bTRY_CAST\s*\(', 'CAST(', sql, flags=re.IGNORECASE)
+    return re.sub(r"(?<!')\b(" + '|'.join(NATURAL_FACT_VIEWS) + r")\b(?!')",
+                  lambda m: NATURAL_FACT_VIEWS[m.group(1)], sql)
+
+
+def script_statements(text):
+    """(first line number, statement) of each statement of a .sql script, comments removed"""
+    statements, current, first_line = [], [], None
+    for number, line in enumerate(text.splitlines(), start=1):
+        code = line.split('--', 1)[0]
+        if code.strip() and first_line is None:
+            first_line = number
+        current.append(code)
+        if code.rstrip().endswith(';'):
+            sql = '\n'.join(current).strip().rstrip(';')
+            if sql:
+                statements.append((first_line, sql))
+            current, first_line = [], None
+    if '\n'.join(current).strip():
+        statements.append((first_line, '\n'.join(current).strip()))
+    return statements
+
+
+def iso_mondays(week_ids):
+    """Monday of each ISO week id ('2023-W07')"""
+    return pd.to_datetime(pd.Index(np.asarray(week_ids, dtype=str)) + '-1', format='%G-W%V-%u')
+
+
+class SurrogateKeys:
+    """Natural key -> integer surrogate key mapping of one database.
+
+    Dimension members are numbered from 1 in the order they are loaded, weeks
+    sorted by start date, so week_key order is calendar order (promotion windows
+    get calendar-position keys, see calendar_keys). Channels have
+    no generated dimension table: dim_channel rows are added, in name order,
+    for channels the first time a fact chunk uses them.
+
+    from_database() picks up the keys of an existing database: dimension rows
+    already there keep their key, new members are numbered after them.
+    """
+
+    def __init__(self):
+        self.members = {natural: pd.Index([], dtype=object) for natural, _ in DIMENSION_KEYS.values()}
+        self.first_monday = None
+
+    @classmethod
+    def from_database(cls, conn):
+        keys = cls()
+        for table, (natural, key) in DIMENSION_KEYS.items():
+            rows = conn.execute(f"SELECT {key}, {natural} FROM {table} ORDER BY {key}").fetchall()
+            if [k for k, _ in rows] != list(range(1, len(rows) + 1)):
+                raise ValueError(f"{table}.{key} is not numbered 1..n; rebuild the database")
+            keys.members[natural] = pd.Index([value for _, value in rows], dtype=object)
+        if len(keys.members['week_id']):
+            keys.first_monday = iso_mondays(keys.members['week_id'][:1])[0]
+        return keys
+
+    def frames(self, table, df):
+        """(table, rows) pairs to insert for a chunk of a generated table, in order"""
+        if table in DIMENSION_KEYS:
+            return [(table, self._dimension(table, df))]
+        frames = []
+        if 'channel_id' in df.columns:
+            channels = pd.Index(pd.unique(np.asarray(df['channel_id'], dtype=str)))
+            new = channels.difference(self.members['channel_id']).sort_values()
+            if len(new):
+                frames.append(('dim_channel', self._dimension('dim_channel', pd.DataFrame({'channel_id': new}))))
+        return frames + [(table, self._fact(df))]
+
+    def _dimension(self, table, df):
+        natural, key = DIMENSION_KEYS[table]
+        if table == 'dim_time':
+            df = df.sort_values('week_start_date', kind='stable')
+        df = df.reset_index(drop=True)
+        values = pd.Index(np.asarray(df[natural], dtype=str))
+        known = len(self.members[natural])
+        keys = self.members[natural].get_indexer(values).astype(np.int64) + 1
+        new = keys == 0
+        keys[new] = np.arange(known + 1, known + 1 + new.sum())
+        self.members[natural] = self.members[natural].append(values[new])
+        if table == 'dim_time' and self.first_monday is None and len(df):
+            self.first_monday = iso_mondays([self.members['week_id'][0]])[0]
+        if table == 'dim_time' and known and (self.calendar_keys(values[new]) != keys[new]).any():
+            raise ValueError("New weeks must continue the loaded calendar week by week; rebuild the database")
+        df.insert(0, key, keys)
+        return df
+
+    def calendar_keys(self, week_ids):
+        """week_key of ISO week ids by calendar position, also for weeks not (yet) in dim_time"""
+        if isinstance(week_ids.dtype, pd.CategoricalDtype):
+            keys = self.calendar_keys(pd.Series(week_ids.cat.categories.astype(str)))
+            return keys[week_ids.cat.codes.to_numpy()]
+        return ((iso_mondays(week_ids) - self.first_monday).days // 7 + 1).to_numpy()
+
+    def lookup(self, natural, values):
+        """Surrogate keys of natural key values (categoricals are mapped per category)"""
+        members = self.members[natural]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            keys = members.get_indexer(values.cat.categories.astype(str))
+            keys = np.append(keys, -1)[values.cat.codes.to_numpy()]
+        else:
+            keys = members.get_indexer(np.asarray(values, dtype=str))
+        if (keys < 0).any():
+            unknown = pd.unique(np.asarray(values, dtype=object)[keys < 0])[:5]
+            raise ValueError(f"{natural} values missing from the dimension: {list(unknown)}")
+        return keys + 1
+
+    def _fact(self, df):
+        columns = {}
+        for column in df.columns:
+            if column == 'transaction_id':
+                columns['transaction_no'] = parse_transaction_ids(df[column])
+            elif column in FACT_KEYS:
+                natural, key = FACT_KEYS[column]
+                columns[key] = self.lookup(natural, df[column])
+            elif column in PROMO_WEEK_KEYS:
+                columns[column] = np.asarray(df[column], dtype=str)
+                columns[PROMO_WEEK_KEYS[column]] = self.calendar_keys(df[column])
+            else:
+                columns[column] = df[column].to_numpy()
+        return pd.DataFrame(columns)
+
+
+class WeekFingerprints:
+    """Row count and checksum of the fact rows of every (table, week_key).
+
+    The checksum is the wrapping sum of a 64-bit hash of each row as loaded
+    (surrogate keys, transaction numbers, measures), so it does not depend on
+    row order, appended rows simply add to it, and a changed value anywhere in
+    a week changes that week's checksum.
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.checksums = {}
+
+    @classmethod
+    def from_database(cls, conn):
+        fingerprints = cls()
+        for table in FINGERPRINT_TABLES:
+            rows = conn.execute("SELECT week_key, row_count, checksum FROM load_fingerprints WHERE table_name = ?",
+                                (table,)).fetchall()
+            if rows:
+                week_keys, counts, checksums = (np.array(column, dtype=np.int64) for column in zip(*rows))
+                fingerprints._grow(table, week_keys.max() + 1)
+                fingerprints.counts[table][week_keys] = counts
+                fingerprints.checksums[table][week_keys] = checksums.view(np.uint64)
+        return fingerprints
+
+    def _grow(self, table, size):
+        counts = self.counts.get(table, np.zeros(0, dtype=np.int64))
+        if len(counts) < size:
+            self.counts[table] = np.concatenate([counts, np.zeros(size - len(counts), dtype=np.int64)])
+            self.checksums[table] = np.concatenate([self.checksums.get(table, np.zeros(0, dtype=np.uint64)),
+                                                    np.zeros(size - len(counts), dtype=np.uint64)])
+
+    def add(self, table, rows):
+        """Count a frame of fact rows (as inserted) into their weeks"""
+        if not len(rows):
+            return
+        week_keys = rows['week_key'].to_numpy(dtype=np.int64)
+        self._grow(table, week_keys.max() + 1)
+        np.add.at(self.counts[table], week_keys, 1)
+        np.add.at(self.checksums[table], week_keys, pd.util.hash_pandas_object(rows, index=False).to_numpy())
+
+    def weeks(self, table):
+        """week_keys with rows"""
+        return np.flatnonzero(self.counts.get(table, np.zeros(0, dtype=np.int64)))
+
+    def get(self, table, week_key):
+        """(row count, checksum) of one week; (0, 0) when it has no rows"""
+        if week_key >= len(self.counts.get(table, ())):
+            return 0, 0
+        return int(self.counts[table][week_key]), int(self.checksums[table][week_key])
+
+    def update(self, other, table, week_keys):
+        """Take the fingerprints of ``week_keys`` from another WeekFingerprints"""
+        for week_key in week_keys:
+            count, checksum = other.get(table, week_key)
+            self._grow(table, week_key + 1)
+            self.counts[table][week_key] = count
+            self.checksums[table][week_key] = checksum
+
+    def save(self, conn, table, week_keys=None):
+        """Store the fingerprints of ``week_keys`` (default: every week with rows) of a table"""
+        week_keys = self.weeks(table) if week_keys is None else np.asarray(week_keys, dtype=np.int64)
+        if not len(week_keys):
+            return
+        self._grow(table, week_keys.max() + 1)
+        rows = list(zip([table] * len(week_keys), week_keys.tolist(), self.counts[table][week_keys].tolist(),
+                        self.checksums[table][week_keys].view(np.int64).tolist()))
+        conn.executemany("DELETE FROM load_fingerprints WHERE table_name = ? AND week_key = ?",
+                         [row[:2] for row in rows])
+        conn.executemany("INSERT INTO load_fingerprints VALUES (?, ?, ?, ?)", rows)
+
+
+class YearPartitions:
+    """Year-partitioned storage of the weekly fact tables of a SQLite database.
+
+    The fact_sales and fact_inventory rows of each calendar year live in their
+    own file next to the main database (chi_limited_2023.db, ...), listed in
+    fact_partitions and attached as schema y2023. Views stored in the main
+    file cannot read attached files, so attach() gives each connection TEMP
+    views instead: fact_sales and fact_inventory as the UNION ALL of the
+    years, and v_fact_sales / v_fact_inventory with the dimension joins inside
+    every branch. Only connections opened with connect() have these views; a
+    plain sqlite3 connection sees no fact tables. read_sql() prunes: a query
+    filtered on dim_time's year or week_id reads only the files of those
+    years (see prune()). TEMP triggers record changed weeks for
+    refresh_summaries(), which re-aggregates from the files of those weeks only.
+
+    A frozen year is compacted, attached read-only and refused by insert() and
+    delete_weeks(). map() queries each file over its own connection, in
+    parallel. Commits spanning several files are atomic per file only.
+    """
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.db_path = next(file for _, name, file in conn.execute("PRAGMA database_list") if name == 'main')
+        self.years = {year: bool(frozen) for year, frozen
+                      in conn.execute("SELECT year, frozen FROM fact_partitions ORDER BY year")}
+        self.files = dict(conn.execute("SELECT year, file_name FROM fact_partitions"))
+        self._load_calendar()
+
+    @classmethod
+    def create(cls, conn):
+        """Start partitioning a new database, before its facts are loaded"""
+        for statement in table_ddl('fact_partitions'):
+            conn.execute(statement)
+        conn.commit()
+        return cls(conn)
+
+    @staticmethod
+    def schema(year):
+        return f"y{year}"
+
+    def path(self, year):
+        """File of a year's partition (chi_limited.db -> chi_limited_2023.db)"""
+        if year in self.files:
+            return os.path.join(os.path.dirname(self.db_path), self.files[year])
+        root, ext = os.path.splitext(self.db_path)
+        return f"{root}_{year}{ext}"
+
+    def _load_calendar(self):
+        rows = np.array(self.conn.execute("SELECT week_key, year FROM dim_time").fetchall(), dtype=np.int64)
+        self.week_years = np.zeros(rows[:, 0].max() + 1 if len(rows) else 0, dtype=np.int64)
+        if len(rows):
+            self.week_years[rows[:, 0]] = rows[:, 1]
+
+    def year_of(self, week_keys):
+        """Calendar year of week keys"""
+        week_keys = np.asarray(week_keys, dtype=np.int64)
+        if len(week_keys) and week_keys.max() >= len(self.week_years):  # weeks added since: reread the calendar
+            self._load_calendar()
+        return self.week_years[week_keys]
+
+    def attach(self):
+        """Attach the year files not attached yet and (re)create the TEMP views and triggers"""
+        attached = {name for _, name, _ in self.conn.execute("PRAGMA database_list")}
+        for year, frozen in self.years.items():
+            if self.schema(year) not in attached:
+                self._attach(year, frozen)
+        self._create_views()
+
+    def _attach(self, year, frozen):
+        path = Path(self.path(year)).resolve().as_uri() + ('?mode=ro' if frozen else '')
+        self.conn.execute(f"ATTACH DATABASE ? AS {self.schema(year)}", (path,))
+
+    def add(self, years, indexed=True):
+        """Create empty partitions for the years without one (outside a transaction: SQLite cannot attach in one)"""
+        for year in sorted(set(int(year) for year in years) - set(self.years)):
+            path = self.path(year)
+            for stale in (path, path + '-wal', path + '-shm'):  # left by an earlier build
+                if os.path.exists(stale):
+                    os.remove(stale)
+            self._attach(year, False)
+            for table in PARTITIONED_TABLES:
+                self.conn.execute(self.table_sql(table, year))
+                for idx_sql in INDEXES:
+                    if indexed and index_table(idx_sql) == table:
+                        self.conn.execute(self.index_sql(idx_sql, year))
+            self.conn.execute("INSERT INTO fact_partitions (year, file_name) VALUES (?, ?)",
+                              (year, os.path.basename(path)))
+            self.years[year] = False
+            self.files[year] = os.path.basename(path)
+        self.conn.commit()
+        self._load_calendar()
+        self._create_views()
+
+    def table_sql(self, table, year):
+        """CREATE TABLE of a fact table in a year's file (the dimensions it references are in another file)"""
+        lines = [line for line in TABLES[table].split('\n') if 'FOREIGN KEY' not in line]
+        ddl = re.sub(r',(\s*\))', r'\1', '\n'.join(lines))
+        return ddl.replace(f"CREATE TABLE {table}", f"CREATE TABLE {self.schema(year)}.{table}", 1)
+
+    def index_sql(self, idx_sql, year):
+        """A CREATE INDEX of INDEXES, for a year's file"""
+        return re.sub(r'\bINDEX\s+(\w+)', rf'INDEX IF NOT EXISTS {self.schema(year)}.\1', idx_sql, count=1)
+
+    def _writable(self, year):
+        if year not in self.years:
+            raise ValueError(f"No partition for {year}; add() it before loading its rows")
+        if self.years[year]:
+            raise ValueError(f"Partition {year} is frozen; thaw it with freeze({year}, False) first")
+
+    def insert(self, table, rows):
+        """Insert fact rows into the files of their years (inside the caller's transaction)"""
+        if not len(rows):
+            return
+        counter = re.search(r'(\w+) INTEGER PRIMARY KEY AUTOINCREMENT', TABLES[table])
+        if counter and counter.group(1) not in rows.columns:
+            # AUTOINCREMENT numbers per file: number the rows across the years, never reusing an id
+            rows = rows.assign(**{counter.group(1): self._last_id(table) + np.arange(1, len(rows) + 1)})
+        years = self.year_of(rows['week_key'])
+        for year in np.unique(years).tolist():
+            self._writable(year)
+            insert_rows(self.conn, f"{self.schema(year)}.{table}", rows[years == year])
+
+    def _last_id(self, table):
+        return max([self.conn.execute(f"SELECT COALESCE(MAX(seq), 0) FROM {self.schema(year)}.sqlite_sequence "
+                                      f"WHERE name = ?", (table,)).fetchone()[0] for year in self.years] + [0])
+
+    def delete_weeks(self, table, week_keys):
+        """Delete the rows of some weeks from the files of their years"""
+        week_keys = np.asarray(week_keys, dtype=np.int64)
+        years = self.year_of(week_keys)
+        for year in np.unique(years).tolist():
+            self._writable(year)
+            self.conn.executemany(f"DELETE FROM {self.schema(year)}.{table} WHERE week_key = ?",
+                                  [(week_key,) for week_key in week_keys[years == year].tolist()])
+
+    def per_partition(self, sql, years=None):
+        """A statement reading a partitioned table, once per year file (of ``years``); others unchanged"""
+        table = reads_partitioned(sql)
+        if table is None:
+            return [sql]
+        pattern = r'\b(FROM|JOIN)\s+(' + '|'.join(PARTITIONED_TABLES) + r')\b'
+        return [re.sub(pattern, rf'\1 {self.schema(year)}.\2', sql)
+                for year in self.years if years is None or year in years]
+
+    def prune(self, sql):
+        """A query reading its partitioned tables from the files of the years its WHERE clause selects.
+
+        SQLite cannot skip UNION ALL branches, and it scans the whole union
+        when the view is joined. Queries filtered by literal comparisons of
+        dim_time's year or week_id read the matching year files instead, each
+        limited to the weeks the filter keeps. dim_time must be joined to every
+        fact table on week_key. Other statements are returned unchanged.
+        """
+        masked = mask_sql(sql)
+        condition = self.calendar_filter(sql, masked)
+        if condition is None or not self.years:
+            return sql
+        years, whole = self.selected_years(condition)
+        parts, end = [], 0
+        for match in re.finditer(TABLE_REFERENCE.format(tables='|'.join(PARTITIONED_TABLES)), masked, re.IGNORECASE):
+            keyword, table, alias = match.groups()
+            if len(years) == 1:
+                source = f"{keyword} {self.schema(years[0])}.{table}" + (f" {alias}" if alias else '')
+            else:
+                weeks = '' if whole else f"WHERE week_key IN (SELECT week_key FROM main.dim_time WHERE {condition})"
+                weeks = weeks if years else "WHERE 0"
+                branches = [f"SELECT * FROM {self.schema(year)}.{table} {weeks}" for year in years or self.years]
+                source = f"{keyword} ({' UNION ALL '.join(branches)}) AS {alias or table}"
+            parts += [sql[end:match.start()], source]
+            end = match.end()
+        return ''.join(parts) + sql[end:]
+
+    def calendar_filter(self, sql, masked=None):
+        """The dim_time conditions of a query's WHERE clause, or None if its facts cannot be pruned safely"""
+        masked = masked or mask_sql(sql)
+        if len(re.findall(r'\bSELECT\b', masked, re.IGNORECASE)) != 1:
+            return None  # subqueries, CTEs and compounds may filter some parts only
+        calendar = re.search(TABLE_REFERENCE.format(tables='dim_time'), masked, re.IGNORECASE)
+        facts = list(re.finditer(TABLE_REFERENCE.format(tables='|'.join(PARTITIONED_TABLES)), masked, re.IGNORECASE))
+        where = re.search(r'\bWHERE\b(.*?)(?:\b(?:GROUP\s+BY|HAVING|ORDER\s+BY|LIMIT|WINDOW)\b|$)',
+                          masked, re.IGNORECASE | re.DOTALL)
+        if not (calendar and facts and where):
+            return None
+        if re.search(r'\b(?:OR|NOT|CASE)\b', re.sub(r'\bIS\s+NOT\b', 'IS', where.group(1), flags=re.IGNORECASE),
+                     re.IGNORECASE):
+            return None  # the filter must be a conjunction
+        alias = calendar.group(3) or 'dim_time'
+        for fact in facts:
+            fact_alias = fact.group(3) or fact.group(2)
+            if not re.search(rf'\b{alias}\.week_key\s*=\s*{fact_alias}\.week_key\b'
+                             rf'|\b{fact_alias}\.week_key\s*=\s*{alias}\.week_key\b', masked, re.IGNORECASE):
+                return None
+        filters = [sql[match.start(2):match.end(2)] for match in CALENDAR_FILTER.finditer(masked, *where.span(1))
+                   if (match.group(1) or alias).lower() == alias.lower()]
+        return ' AND '.join(filters) if filters else None
+
+    def selected_years(self, condition):
+        """Partition years holding the weeks of a dim_time condition, and whether it keeps all their weeks"""
+        selected = dict(self.conn.execute(f"SELECT year, COUNT(*) FROM main.dim_time WHERE {condition} GROUP BY year"))
+        years = sorted(year for year in selected if year in self.years)
+        weeks = dict(zip(*np.unique(self.week_years[self.week_years > 0], return_counts=True)))
+        return years, all(selected[year] == weeks.get(year) for year in years)
+
+    def _drop_views(self):
+        temp = self.conn.execute("SELECT type, name FROM temp.sqlite_master WHERE type IN ('view', 'trigger')")
+        for kind, name in temp.fetchall():
+            self.conn.execute(f"DROP {kind.upper()} temp.{name}")
+
+    def _create_views(self):
+        self._drop_views()
+        if not self.years:
+            return
+        for table in PARTITIONED_TABLES:
+            branches = [f"SELECT * FROM {self.schema(year)}.{table}" for year in self.years]
+            self.conn.execute(f"CREATE TEMP VIEW {table} AS " + '\nUNION ALL\n'.join(branches))
+        for name, view_sql in FACT_VIEWS.items():
+            if reads_partitioned(view_sql):
+                self.conn.execute(self._union_view(name, view_sql))
+        if self.conn.execute("SELECT 1 FROM main.sqlite_master WHERE name = 'summary_stale_weeks'").fetchone():
+            for year in self.years:
+                if not self.years[year]:
+                    for table in PARTITIONED_TABLES:
+                        for trigger in stale_week_triggers(table, self.schema(year)):
+                            self.conn.execute(trigger)
+
+    def _union_view(self, name, view_sql):
+        """CREATE TEMP VIEW of a fact view as the UNION ALL of the view over each year file.
+
+        A compound SELECT can only be ordered by its result columns, so the
+        view's ORDER BY expression is carried through as an extra column.
+        """
+        select, order = re.split(r'\bORDER BY\b', re.sub(r'^\s*CREATE VIEW \w+ AS', '', view_sql))
+        select = select.strip().replace('SELECT', f"SELECT {order.strip()} AS row_order,", 1)
+        branches = self.per_partition(select)
+        columns = [column[0] for column in self.conn.execute(f"SELECT * FROM ({branches[0]}) LIMIT 0").description]
+        return (f"CREATE TEMP VIEW {name} AS SELECT {', '.join(columns[1:])} FROM (\n"
+                + '\nUNION ALL\n'.join(branches) + "\n) ORDER BY row_order")
+
+    def freeze(self, year, frozen=True):
+        """Compact a year's file and attach it read-only from now on (``frozen=False`` thaws it)"""
+        if year not in self.years:
+            raise ValueError(f"No partition for {year}")
+        self.conn.commit()
+        self._drop_views()  # VACUUM would resolve the file's table names to the TEMP views
+        if frozen:
+            self.conn.execute(f"VACUUM {self.schema(year)}")
+            self.conn.execute(f"ANALYZE {self.schema(year)}")
+        self.conn.execute("UPDATE fact_partitions SET frozen = ? WHERE year = ?", (int(frozen), year))
+        self.conn.commit()
+        self.conn.execute(f"DETACH DATABASE {self.schema(year)}")
+        self.years[year] = frozen
+        self.attach()
+
+    def map(self, sql, years=None, workers=None):
+        """Run a query on each year file over its own read-only connection, in parallel.
+
+        The year's facts are the connection's main schema and the main
+        database is attached after it, so ``sql`` reads as for an unpartitioned
+        database. Returns the results with each row's year in a leading
+        ``partition`` column.
+        """
+        import sqlite3
+        from concurrent.futures import ThreadPoolExecutor
+
+        main = Path(self.db_path).resolve().as_uri() + '?mode=ro'
+
+        def run(year):
+            part = sqlite3.connect(Path(self.path(year)).resolve().as_uri() + '?mode=ro', uri=True)
+            try:
+                part.execute("ATTACH DATABASE ? AS star", (main,))
+                return pd.read_sql_query(sql, part)
+            finally:
+                part.close()
+
+        years = [year for year in self.years if years is None or year in years]
+        if not years:
+            return pd.DataFrame()
+        with ThreadPoolExecutor(workers) as pool:
+            frames = list(pool.map(run, years))
+        return pd.concat(frames, keys=years, names=['partition', None]).reset_index(level=0).reset_index(drop=True)
+
+
+class DatabaseWriter:
+    """Loads generated tables straight into a fresh database, skipping the file round trip.
+
+    The database is created empty and bulk-loaded in one transaction; indexes,
+    statistics, summary tables and views are built on close(). An exception in
+    a ``with`` block rolls the load back instead (abort()).
+
+    Tables must be written dimensions first (see LOAD_ORDER); natural keys are
+    replaced by surrogate keys on the way in (see SurrogateKeys). Week
+    fingerprints are recorded, so sql/update_database.py can later bring the
+    database up to date incrementally.
+    """
+
+    def __init__(self, db_path, engine='sqlite', cache_mb=CACHE_MB):
+        self.db_path = db_path
+        self.engine = engine
+        self.rows = {}
+        self.keys = SurrogateKeys()
+        self.fingerprints = WeekFingerprints()
+        self.conn = connect(db_path, engine, fresh=True)
+        bulk_mode(self.conn, engine, cache_mb)
+        create_tables(self.conn, engine)
+        create_load_state(self.conn, engine)
+        self.conn.execute("BEGIN")
+
+    def write(self, table, df):
+        for target, rows in self.keys.frames(table, df):
+            insert_rows(self.conn, target, rows, self.engine)
+            self.rows[target] = self.rows.get(target, 0) + len(rows)
+            if target in FINGERPRINT_TABLES:
+                self.fingerprints.add(target, rows)
+
+    def close(self):
+        if self.conn is None:
+            return
+        for table in FINGERPRINT_TABLES:
+            self.fingerprints.save(self.conn, table)
+        self.conn.commit()
+        build_bridge(self.conn)
+        create_indexes(self.conn, self.engine, analyze=False)
+        create_summaries(self.conn, self.engine)
+        update_statistics(self.conn, self.engine)
+        normal_mode(self.conn, self.engine)
+        create_views(self.conn)
+        bump_data_version(self.conn)
+        self.conn.commit()
+        if self.engine == 'sqlite':
+            incremental_mode(self.conn)  # readers are not blocked by later updates
+        self.conn.close()
+        self.conn = None
+
+    def abort(self):
+        """Roll back the rows written so far and close, building nothing"""
+        if self.conn is None:
+            return
+        self.conn.rollback()
+        self.conn.close()
+        self.conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.abort()
+            return False
+        self.close()
@@ -0,0 +1,101 @@
+"""
+CHI LIMITED - FESTIVE CALENDAR
+Season and festive-period rules for any date range, evaluated on whole arrays
+
+Festive periods come from two rule tables: fixed-date holidays that recur on
+the same days every year, and lunar holidays (Ramadan and Eid al-Fitr) listed
+per year. Lunar windows past either end of the table are projected by whole
+Islamic years (~354.37 days), so multi-decade calendars stay seasonal instead
+of falling back to 'Regular'.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Nigerian seasons by month (index 0 unused)
+SEASON_BY_MONTH = np.array([
+    '',
+    'Harmattan', 'Harmattan', 'Hot_Dry', 'Hot_Dry', 'Hot_Dry', 'Hot_Dry',
+    'Hot_Dry', 'Rainy', 'Rainy', 'Rainy', 'Harmattan', 'Harmattan',
+])
+
+# Fixed-date holidays: (festive period, (month, day) first, (month, day) last)
+FIXED_HOLIDAYS = [
+    ('Back_to_School', (9, 1), (9, 30)),
+    ('Christmas', (12, 18), (12, 31)),
+]
+
+# Lunar holidays: (Ramadan first day, Ramadan last day, Eid last day); Eid
+# starts the day after Ramadan ends. 2022-2024 are the windows the demand
+# model was calibrated on; later years follow the expected moon sightings.
+LUNAR_HOLIDAYS = [
+    ('2022-04-01', '2022-04-30', '2022-05-10'),
+    ('2023-03-23', '2023-04-21', '2023-04-28'),
+    ('2024-03-11', '2024-04-09', '2024-04-17'),
+    ('2025-03-01', '2025-03-30', '2025-04-06'),
+    ('2026-02-18', '2026-03-19', '2026-03-26'),
+    ('2027-02-08', '2027-03-09', '2027-03-16'),
+    ('2028-01-28', '2028-02-25', '2028-03-03'),
+    ('2029-01-16', '2029-02-13', '2029-02-20'),
+    ('2030-01-06', '2030-02-04', '2030-02-11'),
+]
+
+ISLAMIC_YEAR_DAYS = 354.367
+
+
+def seasons(months):
+    """Season name for each month number"""
+    return SEASON_BY_MONTH[np.asarray(months)]
+
+
+def lunar_windows(first, last):
+    """(Ramadan start, Ramadan end, Eid end) Timestamps of every lunar window overlapping [first, last]"""
+    table = [tuple(pd.Timestamp(day) for day in row) for row in LUNAR_HOLIDAYS]
+
+    def shifted(row, years):
+        offset = pd.Timedelta(days=round(years * ISLAMIC_YEAR_DAYS))
+        return tuple(day + offset for day in row)
+
+    windows = list(table)
+    years = 1
+    while windows[0][0] > first:
+        windows.insert(0, shifted(table[0], -years))
+        years += 1
+    years = 1
+    while windows[-1][2] < last:
+        windows.append(shifted(table[-1], years))
+        years += 1
+    return [window for window in windows if window[2] >= first and window[0] <= last]
+
+
+def festive_periods(dates):
+    """Festive period name for each date; lunar holidays take precedence over fixed ones"""
+    dates = pd.DatetimeIndex(dates).normalize()
+    festive = np.full(len(dates), 'Regular', dtype=object)
+    if not len(dates):
+        return festive
+
+    month_day = dates.month.to_numpy() * 100 + dates.day.to_numpy()
+    for name, (first_month, first_day), (last_month, last_day) in FIXED_HOLIDAYS:
+        festive[(month_day >= first_month * 100 + first_day) & (month_day <= last_month * 100 + last_day)] = name
+
+    days = dates.to_numpy()
+    for ramadan_start, ramadan_end, eid_end in lunar_windows(dates.min(), dates.max()):
+        festive[(days >= ramadan_start.to_datetime64()) & (days <= ramadan_end.to_datetime64())] = 'Ramadan'
+        festive[(days > ramadan_end.to_datetime64()) & (days <= eid_end.to_datetime64())] = 'Eid'
+    return festive
+
+
+def calendar_columns(dates):
+    """Month, quarter, year, season and festive columns shared by the weekly and daily dimensions"""
+    dates = pd.DatetimeIndex(dates)
+    months = dates.month.to_numpy().astype(np.int64)
+    festive = festive_periods(dates)
+    return {
+        'month_name': dates.month_name().to_numpy(),
+        'month_number': months,
+        'quarter': np.char.add('Q', ((months - 1) // 3 + 1).astype(str)),
+        'year': dates.year.to_numpy().astype(np.int64),
+        'season': seasons(months),
+        'festive_period': festive,
+    }
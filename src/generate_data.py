@@ -1,29 +1,46 @@
 """
 CHI LIMITED - DATA GENERATION SCRIPT
-Generates 156 weeks of realistic sales, inventory, and promotional data
+Generates weekly sales, inventory, and promotional data (156 weeks by default)
+
+Usage:
+    python src/generate_data.py                      # standard 3-year dataset
+    python src/generate_data.py --weeks 520 --sku-multiplier 10 --region-multiplier 2
+    python src/generate_data.py --append 1           # add one more week to data/raw/
+    python src/generate_data.py --database chi_limited.db --format none   # straight into SQLite, no files
+    python src/generate_data.py --help               # all scale options
+
+As a library (importing it generates nothing):
+    from generate_data import generate_time_dim, generate_promotions, iter_sales
+    for df_sales in iter_sales(weeks=range(52, 104)):   # only the chunks covering year 2
+        ...
 """
 
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import argparse
 import random
+import json
 import os
 
-# Set random seeds for reproducibility
-np.random.seed(42)
-random.seed(42)
-
-print("="*80)
-print("CHI LIMITED - DATA GENERATION STARTING...")
-print("="*80)
-print()
+from database import ENGINES, DatabaseWriter
+from festive_calendar import calendar_columns
+from promo_index import PromoIndex
+from star_schema import COLUMN_TYPES, StarSchema
+from table_io import FORMATS, TableWriter, append_table, read_table, write_table
 
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
+# Defaults for the command line (see parse_args)
 START_DATE = datetime(2022, 1, 3)  # First Monday of 2022
 NUM_WEEKS = 156  # 3 years
+PROMOS_PER_YEAR = (80, 120)
+SEED = 42
 
 # Product catalog (42 SKUs)
 PRODUCTS = [
@@ -100,189 +117,198 @@ REGIONS = [
 
 CHANNELS = ['Modern_Trade', 'Traditional_Trade']
 
+# Output location and streaming chunk size. FACT_SALES / FACT_INVENTORY are
+# generated and appended to disk CHUNK_WEEKS weeks at a time, so peak memory
+# depends on the chunk size rather than on the total number of weeks.
+OUTPUT_DIR = 'data/raw/'
+STATE_FILE = 'generator_state.json'  # append checkpoint, kept next to the tables
+CHUNK_WEEKS = 13  # one quarter
+
+# Random streams. Every shard draws from its own generator, derived from the
+# run seed plus the shard's coordinates (never from the worker it runs on), so
+# output is byte-identical for any number of worker processes.
+SALES_STREAM, INVENTORY_STREAM, PROMO_STREAM = 0, 1, 2
+SKU_BLOCK = 64  # SKUs per sales shard
+
+# Demand model multipliers
+SEASON_MULT = {'Hot_Dry': 1.35, 'Rainy': 0.85, 'Harmattan': 1.05}
+FESTIVE_MULT = {'Ramadan': 1.25, 'Eid': 1.65, 'Christmas': 1.80,
+                'Back_to_School': 1.40, 'Regular': 1.00}
+YOY_GROWTH = {2022: 1.00, 2023: 1.12, 2024: 1.26}
+INFLATION_RATES = {2022: 1.00, 2023: 1.18, 2024: 1.40}
+CATEGORY_BASE = {'Juice': (800, 1500), 'Dairy': (600, 1200), 'Snacks': (400, 800)}
+NOISE_RANGES = {
+    'low': (0.90, 1.10),
+    'medium': (0.80, 1.20),
+    'high': (0.65, 1.35)
+}
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
-def get_season(month):
-    """Determine Nigerian season"""
-    if month in [11, 12, 1, 2]:
-        return 'Harmattan'
-    elif month in [3, 4, 5, 6, 7]:
-        return 'Hot_Dry'
-    else:
-        return 'Rainy'
-
-def get_festive_period(date_obj):
-    """Determine festive period"""
-    year = date_obj.year
-    month = date_obj.month
-    
-    # Simplified festive periods
-    if year == 2022:
-        if month == 4:
-            return 'Ramadan'
-        elif month == 5 and date_obj.day <= 10:
-            return 'Eid'
-        elif month == 9:
-            return 'Back_to_School'
-        elif month == 12 and date_obj.day >= 18:
-            return 'Christmas'
-    elif year == 2023:
-        if month == 3 and date_obj.day >= 23:
-            return 'Ramadan'
-        elif month == 4 and date_obj.day <= 21:
-            return 'Ramadan'
-        elif month == 4 and 21 < date_obj.day <= 28:
-            return 'Eid'
-        elif month == 9:
-            return 'Back_to_School'
-        elif month == 12 and date_obj.day >= 18:
-            return 'Christmas'
-    elif year == 2024:
-        if month == 3 and date_obj.day >= 11:
-            return 'Ramadan'
-        elif month == 4 and date_obj.day <= 9:
-            return 'Ramadan'
-        elif month == 4 and 10 <= date_obj.day <= 17:
-            return 'Eid'
-        elif month == 9:
-            return 'Back_to_School'
-        elif month == 12 and date_obj.day >= 18:
-            return 'Christmas'
-    
-    return 'Regular'
+def extrapolate_by_year(table, year):
+    """Look up a per-year factor, extending the calibrated years linearly"""
+    if year in table:
+        return table[year]
+    first, last = min(table), max(table)
+    step = (table[last] - table[first]) / (last - first)
+    anchor = last if year > last else first
+    return round(table[anchor] + step * (year - anchor), 4)
 
 def apply_inflation(base_price, year):
     """Apply Nigerian inflation"""
-    rates = {2022: 1.00, 2023: 1.18, 2024: 1.40}
-    return round(base_price * rates.get(year, 1.0), 2)
-
-def add_noise(value, level='medium'):
-    """Add realistic market noise"""
-    ranges = {
-        'low': (0.90, 1.10),
-        'medium': (0.80, 1.20),
-        'high': (0.65, 1.35)
-    }
-    low, high = ranges[level]
-    return int(value * random.uniform(low, high))
-
-# ============================================================================
-# TABLE 1: DIM_PRODUCT
-# ============================================================================
-
-print("📦 Generating DIM_PRODUCT...")
-product_data = []
-for p in PRODUCTS:
-    product_data.append({
-        'product_id': p[0],
-        'product_name': p[1],
-        'brand': p[2],
-        'category': p[3],
-        'pack_size_ml': p[4],
-        'pack_format': p[5],
-        'target_segment': p[6],
-        'unit_price_ngn_2024': p[7],
-        'cogs_percentage': p[8]
-    })
-
-df_product = pd.DataFrame(product_data)
-print(f"   ✓ {len(df_product)} products created")
+    return round(base_price * extrapolate_by_year(INFLATION_RATES, year), 2)
+
+def get_yoy_growth(year):
+    """YoY demand growth, extrapolated linearly past the calibrated years"""
+    return extrapolate_by_year(YOY_GROWTH, year)
+
+def shard_rng(seed, *key):
+    """NumPy generator for one shard, keyed by (stream, coordinates...)"""
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=tuple(int(k) for k in key)))
+
+def ordered_map(executor, fn, tasks, window):
+    """Run tasks on an executor (or inline when it is None), yielding results in order.
+
+    At most ``window`` tasks are in flight, so finished shards never pile up
+    in memory faster than the caller writes them out.
+    """
+    if executor is None:
+        for task in tasks:
+            yield fn(*task)
+        return
+    pending = deque()
+    for task in tasks:
+        pending.append(executor.submit(fn, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def scale_catalog(items, multiplier, derive):
+    """Scale a catalog to round(len(items) * multiplier) entries.
+
+    The original entries come first; further entries are synthetic copies made
+    by ``derive(item, variant)`` with variant = 2, 3, ... A multiplier below 1
+    keeps a leading subset of the catalog.
+    """
+    total = max(1, int(round(len(items) * multiplier)))
+    return [items[i % len(items)] if i < len(items) else derive(items[i % len(items)], i // len(items) + 1)
+            for i in range(total)]
+
+def derive_product(product, variant):
+    """Synthetic SKU cloned from an existing one (same category economics)"""
+    return (f"{product[0]}-V{variant:02d}", f"{product[1]} (Variant {variant})") + product[2:]
+
+def derive_region(region, variant):
+    """Synthetic region cloned from an existing one (same demographics)"""
+    return (f"{region[0]}{variant:02d}", f"{region[1]} {variant}") + region[2:]
 
 # ============================================================================
-# TABLE 2: DIM_GEOGRAPHY
+# DIMENSION AND PROMOTION TABLES
 # ============================================================================
 
-print("🗺️  Generating DIM_GEOGRAPHY...")
-geography_data = []
-for r in REGIONS:
-    geography_data.append({
-        'region_id': r[0],
-        'region_name': r[1],
-        'urbanization_index': r[2],
-        'population_millions': r[3],
-        'wealth_index': r[4]
+def generate_product_dim(products):
+    """DIM_PRODUCT from catalog tuples"""
+    return pd.DataFrame(products, columns=[
+        'product_id', 'product_name', 'brand', 'category', 'pack_size_ml',
+        'pack_format', 'target_segment', 'unit_price_ngn_2024', 'cogs_percentage'
+    ])
+
+def generate_geography_dim(regions):
+    """DIM_GEOGRAPHY from region tuples"""
+    return pd.DataFrame(regions, columns=[
+        'region_id', 'region_name', 'urbanization_index', 'population_millions', 'wealth_index'
+    ])
+
+def iso_weeks(dates):
+    """ISO week ids ('2023-W07') and ISO week numbers of each date"""
+    iso = pd.DatetimeIndex(dates).isocalendar()
+    iso_year = iso['year'].to_numpy().astype(np.int64)
+    iso_week = iso['week'].to_numpy().astype(np.int64)
+    return np.char.add(np.char.add(iso_year.astype(str), '-W'), np.char.zfill(iso_week.astype(str), 2)), iso_week
+
+def generate_time_dim(start_date, num_weeks):
+    """DIM_TIME: one row per week starting at ``start_date``, built as whole columns"""
+    week_starts = pd.date_range(start_date, periods=num_weeks, freq='7D')
+    week_ids, iso_week = iso_weeks(week_starts)
+    calendar = calendar_columns(week_starts)
+
+    return pd.DataFrame({
+        'week_id': week_ids,
+        'week_start_date': week_starts.strftime('%Y-%m-%d'),
+        'week_end_date': (week_starts + pd.Timedelta(days=6)).strftime('%Y-%m-%d'),
+        'month_name': calendar['month_name'],
+        'month_number': calendar['month_number'],
+        'quarter': calendar['quarter'],
+        'year': calendar['year'],
+        'week_of_year': iso_week,
+        'is_holiday_week': (calendar['festive_period'] != 'Regular').astype(np.int64),
+        'season': calendar['season'],
+        'festive_period': calendar['festive_period'],
     })
 
-df_geography = pd.DataFrame(geography_data)
-print(f"   ✓ {len(df_geography)} regions created")
-
-# ============================================================================
-# TABLE 3: DIM_TIME
-# ============================================================================
-
-print("📅 Generating DIM_TIME...")
-time_data = []
-for week_num in range(NUM_WEEKS):
-    week_start = START_DATE + timedelta(weeks=week_num)
-    week_end = week_start + timedelta(days=6)
-    
-    time_data.append({
-        'week_id': f"{week_start.year}-W{week_start.isocalendar()[1]:02d}",
-        'week_start_date': week_start.strftime('%Y-%m-%d'),
-        'week_end_date': week_end.strftime('%Y-%m-%d'),
-        'month_name': week_start.strftime('%B'),
-        'month_number': week_start.month,
-        'quarter': f"Q{(week_start.month-1)//3 + 1}",
-        'year': week_start.year,
-        'week_of_year': week_start.isocalendar()[1],
-        'is_holiday_week': 1 if get_festive_period(week_start) != 'Regular' else 0,
-        'season': get_season(week_start.month),
-        'festive_period': get_festive_period(week_start)
+def generate_date_dim(start_date, num_days):
+    """Daily-grain calendar with the same season / festive attributes as DIM_TIME"""
+    days = pd.date_range(start_date, periods=num_days, freq='D')
+    week_ids, _ = iso_weeks(days)
+    calendar = calendar_columns(days)
+
+    return pd.DataFrame({
+        'date': days.strftime('%Y-%m-%d'),
+        'week_id': week_ids,
+        'day_name': days.day_name(),
+        'month_name': calendar['month_name'],
+        'month_number': calendar['month_number'],
+        'quarter': calendar['quarter'],
+        'year': calendar['year'],
+        'is_holiday': (calendar['festive_period'] != 'Regular').astype(np.int64),
+        'season': calendar['season'],
+        'festive_period': calendar['festive_period'],
     })
 
-df_time = pd.DataFrame(time_data)
-print(f"   ✓ {len(df_time)} weeks created")
+def generate_year_promotions(year_weeks, products, regions, channels, promos_per_year, seed, year):
+    """Campaigns starting in one calendar year, drawn from that year's own random stream"""
+    rng = random.Random(int(shard_rng(seed, PROMO_STREAM, year).integers(2**63)))
+    promotions = []
 
-# ============================================================================
-# TABLE 4: FACT_PROMOTIONS
-# ============================================================================
+    for _ in range(rng.randint(*promos_per_year)):
+        product = rng.choice(products)
+        region = rng.choice(regions)
+        channel = rng.choice(channels)
 
-print("🎯 Generating FACT_PROMOTIONS...")
-promotions = []
-promo_id = 1
-
-for year in [2022, 2023, 2024]:
-    # Generate 80-120 promos per year
-    for _ in range(random.randint(80, 120)):
-        product = random.choice(PRODUCTS)
-        region = random.choice(REGIONS)
-        channel = random.choice(CHANNELS)
-        
         # Random week in year
-        start_week_idx = random.randint(0, 51)  # Week 0-51 of year
-        year_weeks = df_time[df_time['year'] == year]
+        start_week_idx = rng.randint(0, 51)  # Week 0-51 of year
         if start_week_idx >= len(year_weeks):
             continue
-            
+
         promo_start_week = year_weeks.iloc[start_week_idx]['week_id']
-        duration = random.choice([1, 2, 2, 3, 4])  # Weighted toward shorter
-        
+        duration = rng.choice([1, 2, 2, 3, 4])  # Weighted toward shorter
+
         # Find end week
         end_idx = start_week_idx + duration - 1
         if end_idx >= len(year_weeks):
             end_idx = len(year_weeks) - 1
         promo_end_week = year_weeks.iloc[end_idx]['week_id']
-        
+
         # Promo type
-        promo_type = random.choice(['Price_Off', 'Price_Off', 'BOGOF', 'Bundle', 'Trade_Promo'])
-        
+        promo_type = rng.choice(['Price_Off', 'Price_Off', 'BOGOF', 'Bundle', 'Trade_Promo'])
+
         if promo_type == 'Price_Off':
-            discount = random.choice([10, 15, 20, 25, 30])
+            discount = rng.choice([10, 15, 20, 25, 30])
         elif promo_type == 'BOGOF':
             discount = 50
         elif promo_type == 'Bundle':
-            discount = random.choice([15, 20])
+            discount = rng.choice([15, 20])
         else:
-            discount = random.choice([5, 8, 10, 12])
-        
+            discount = rng.choice([5, 8, 10, 12])
+
         # Cost calculation
-        expected_volume = random.randint(1000, 5000) * duration
-        promo_cost = (product[7] * discount / 100) * expected_volume * random.uniform(0.8, 1.2)
-        
+        expected_volume = rng.randint(1000, 5000) * duration
+        promo_cost = (product[7] * discount / 100) * expected_volume * rng.uniform(0.8, 1.2)
+
         promotions.append({
-            'promo_id': f"PROMO-{promo_id:04d}",
             'product_id': product[0],
             'region_id': region[0],
             'channel_id': channel,
@@ -293,215 +319,626 @@ for year in [2022, 2023, 2024]:
             'promo_cost_ngn': round(promo_cost, 2),
             'incremental_volume_target': int(expected_volume * 0.4)
         })
-        promo_id += 1
-
-df_promotions = pd.DataFrame(promotions)
-print(f"   ✓ {len(df_promotions)} promotional campaigns created")
 
-# ============================================================================
-# TABLE 5: FACT_SALES (Main transaction data)
-# ============================================================================
+    return promotions
 
-print("💰 Generating FACT_SALES (this takes 2-3 minutes)...")
-sales_data = []
-transaction_id = 1
+def generate_promotions(df_time, products, regions, channels, promos_per_year=PROMOS_PER_YEAR,
+                        seed=SEED, executor=None, first_id=1):
+    """FACT_PROMOTIONS: a random (min, max) number of campaigns per calendar year.
 
-for week_idx, week_row in df_time.iterrows():
-    week_id = week_row['week_id']
-    year = week_row['year']
-    season = week_row['season']
-    festive = week_row['festive_period']
-    
-    # Seasonal multipliers
-    season_mult = {'Hot_Dry': 1.35, 'Rainy': 0.85, 'Harmattan': 1.05}
-    festive_mult = {'Ramadan': 1.25, 'Eid': 1.65, 'Christmas': 1.80, 
-                    'Back_to_School': 1.40, 'Regular': 1.00}
-    yoy_growth = {2022: 1.00, 2023: 1.12, 2024: 1.26}
-    
-    for product in PRODUCTS:
-        for region in REGIONS:
-            for channel in CHANNELS:
-                # Base demand
-                category_base = {'Juice': random.randint(800, 1500), 
-                                'Dairy': random.randint(600, 1200), 
-                                'Snacks': random.randint(400, 800)}
-                base_demand = category_base[product[3]]
-                
-                # Adjustments
-                base_demand *= region[4]  # Wealth index
-                if region[0] == 'RG-LAG':
-                    base_demand *= 1.6
-                
-                if channel == 'Modern_Trade':
-                    base_demand *= 0.42
-                else:
-                    base_demand *= 0.98
-                
-                # Apply seasonality
-                demand = base_demand * season_mult[season] * festive_mult[festive] * yoy_growth[year]
-                
-                # Category-specific boosts
-                if product[3] == 'Juice' and season == 'Hot_Dry':
-                    demand *= 1.25
-                if product[6] == 'Kids' and festive == 'Back_to_School':
-                    demand *= 1.50
-                
-                # Check for promotions
-                active_promos = df_promotions[
-                    (df_promotions['product_id'] == product[0]) &
-                    (df_promotions['region_id'] == region[0]) &
-                    (df_promotions['channel_id'] == channel) &
-                    (df_promotions['promo_start_week'] <= week_id) &
-                    (df_promotions['promo_end_week'] >= week_id)
-                ]
-                
-                promo_discount = 0
-                if len(active_promos) > 0:
-                    promo = active_promos.iloc[0]
-                    uplift = 1 + (promo['discount_percentage'] / 100) * random.uniform(1.5, 2.5)
-                    demand *= uplift
-                    unit_price = apply_inflation(product[7], year)
-                    promo_discount = unit_price * (promo['discount_percentage'] / 100)
-                
-                # Add noise
-                noise_level = 'high' if festive in ['Eid', 'Christmas'] else 'medium'
-                units_sold = add_noise(demand, noise_level)
-                units_sold = max(0, units_sold)
-                
-                # Financial calculations
-                unit_price = apply_inflation(product[7], year)
-                revenue = units_sold * unit_price
-                cogs = revenue * product[8]
-                
-                sales_data.append({
-                    'transaction_id': f"TXN-{transaction_id:06d}",
-                    'week_id': week_id,
-                    'product_id': product[0],
-                    'region_id': region[0],
-                    'channel_id': channel,
-                    'units_sold': units_sold,
-                    'revenue_ngn': round(revenue, 2),
-                    'cost_of_goods_sold': round(cogs, 2),
-                    'promo_discount_ngn': round(promo_discount * units_sold, 2),
-                    'baseline_demand': int(base_demand)
-                })
-                transaction_id += 1
-    
-    if (week_idx + 1) % 20 == 0:
-        print(f"   ⏳ {week_idx + 1}/{NUM_WEEKS} weeks processed...")
+    Each year is an independent shard (run on ``executor`` when one is given);
+    promo ids are assigned afterwards, in year order, starting at ``first_id``.
+    """
+    tasks = [(df_time[df_time['year'] == year], products, regions, channels, promos_per_year, seed, year)
+             for year in sorted(df_time['year'].unique())]
+    promotions = [promo for year_promos in ordered_map(executor, generate_year_promotions, tasks, len(tasks) or 1)
+                  for promo in year_promos]
+    for promo_id, promo in enumerate(promotions, start=first_id):
+        promo['promo_id'] = f"PROMO-{promo_id:04d}"
 
-df_sales = pd.DataFrame(sales_data)
-print(f"   ✓ {len(df_sales):,} sales transactions created")
+    return pd.DataFrame(promotions, columns=[
+        'promo_id', 'product_id', 'region_id', 'channel_id', 'promo_type', 'discount_percentage',
+        'promo_start_week', 'promo_end_week', 'promo_cost_ngn', 'incremental_volume_target'
+    ])
 
 # ============================================================================
-# TABLE 6: FACT_INVENTORY
+# FACT TABLES (vectorised sales engine and inventory recurrence)
 # ============================================================================
 
-print("📦 Generating FACT_INVENTORY...")
-inventory_data = []
-inventory_tracker = {}
+def simulate_sales(df_time, df_product, df_geography, channels, promo_discounts, rng):
+    """Simulate sales measures for a week x product x region x channel cube.
+
+    All demand factors are computed as broadcast NumPy arrays, so the cost is a
+    handful of vector operations regardless of how many SKUs or weeks are
+    generated. Returns a dict of measure name -> cube-shaped array.
+    """
+    n_weeks, n_products = len(df_time), len(df_product)
+    n_regions, n_channels = len(df_geography), len(channels)
+    shape = (n_weeks, n_products, n_regions, n_channels)
+
+    seasons = df_time['season'].to_numpy()
+    festives = df_time['festive_period'].to_numpy()
+    years = df_time['year'].to_numpy()
+    categories = df_product['category'].to_numpy()
+    channels = np.asarray(channels)
+
+    # Base demand: category range x wealth index x Lagos premium x channel share
+    low = np.array([CATEGORY_BASE[c][0] for c in categories])
+    high = np.array([CATEGORY_BASE[c][1] for c in categories])
+    base_demand = rng.integers(low[None, :, None, None], high[None, :, None, None],
+                               size=shape, endpoint=True).astype(float)
+    base_demand *= df_geography['wealth_index'].to_numpy()[None, None, :, None]
+    is_lagos = df_geography['region_id'].str.startswith('RG-LAG').to_numpy()
+    base_demand *= np.where(is_lagos, 1.6, 1.0)[None, None, :, None]
+    base_demand *= np.where(channels == 'Modern_Trade', 0.42, 0.98)[None, None, None, :]
+
+    # Seasonality: season x festive x YoY growth, one factor per week
+    week_mult = (np.array([SEASON_MULT[s] for s in seasons])
+                 * np.array([FESTIVE_MULT[f] for f in festives])
+                 * np.array([get_yoy_growth(y) for y in years]))
+    demand = base_demand * week_mult[:, None, None, None]
+
+    # Category-specific boosts, one factor per (week, product)
+    boost = np.ones((n_weeks, n_products))
+    boost[np.ix_(seasons == 'Hot_Dry', categories == 'Juice')] *= 1.25
+    boost[np.ix_(festives == 'Back_to_School', df_product['target_segment'].to_numpy() == 'Kids')] *= 1.50
+    demand *= boost[:, :, None, None]
+
+    # Promotions
+    on_promo = promo_discounts > 0
+    uplift = 1 + (promo_discounts / 100) * rng.uniform(1.5, 2.5, size=shape)
+    demand = np.where(on_promo, demand * uplift, demand)
+
+    # Noise: wider band during Eid/Christmas
+    noise_low, noise_high = NOISE_RANGES['medium']
+    wide = np.isin(festives, ['Eid', 'Christmas'])[:, None, None, None]
+    noise = rng.uniform(np.where(wide, NOISE_RANGES['high'][0], noise_low),
+                        np.where(wide, NOISE_RANGES['high'][1], noise_high),
+                        size=shape)
+    units_sold = np.maximum(0, (demand * noise).astype(np.int64))
+
+    # Financial calculations
+    prices = df_product['unit_price_ngn_2024'].to_numpy()
+    price_by_year = {y: [apply_inflation(price, y) for price in prices] for y in set(years)}
+    unit_price = np.array([price_by_year[y] for y in years])[:, :, None, None]
+    revenue = units_sold * unit_price
+    cogs = revenue * df_product['cogs_percentage'].to_numpy()[None, :, None, None]
+    promo_discount_ngn = unit_price * (promo_discounts / 100) * units_sold
+
+    return {
+        'units_sold': units_sold,
+        'revenue_ngn': np.round(revenue, 2),
+        'cost_of_goods_sold': np.round(cogs, 2),
+        'promo_discount_ngn': np.round(promo_discount_ngn, 2),
+        'baseline_demand': base_demand.astype(np.int64)
+    }
 
-for week_idx, week_row in df_time.iterrows():
-    week_id = week_row['week_id']
-    
-    for product in PRODUCTS:
-        for region in REGIONS:
-            # Get sales
-            week_sales = df_sales[
-                (df_sales['week_id'] == week_id) &
-                (df_sales['product_id'] == product[0]) &
-                (df_sales['region_id'] == region[0])
-            ]['units_sold'].sum()
-            
-            # Opening stock
-            if week_idx == 0:
-                opening_stock = int(week_sales * random.uniform(3, 6))
-            else:
-                key = (product[0], region[0])
-                opening_stock = inventory_tracker.get(key, int(week_sales * 4))
-            
-            # Replenishment
-            if opening_stock < week_sales * 2.5:
-                replenishment = int(week_sales * random.uniform(4, 6) - opening_stock)
-            else:
-                replenishment = 0
-            
-            closing_stock = max(0, opening_stock + replenishment - week_sales)
-            
-            # Stockouts
-            if closing_stock <= 0:
-                stockout_days = random.randint(1, 4)
-            elif closing_stock < week_sales * 0.5:
-                stockout_days = random.randint(1, 2) if random.random() < 0.3 else 0
-            else:
-                stockout_days = 0
-            
-            # Holding cost
-            avg_inv = (opening_stock + closing_stock) / 2
-            holding_cost = avg_inv * product[7] * product[8] * (0.18 / 52)
-            
-            inventory_data.append({
-                'week_id': week_id,
-                'product_id': product[0],
-                'region_id': region[0],
-                'opening_stock_units': int(opening_stock),
-                'closing_stock_units': int(closing_stock),
-                'stockout_days': stockout_days,
-                'inventory_holding_cost_ngn': round(holding_cost, 2)
-            })
-            
-            inventory_tracker[(product[0], region[0])] = closing_stock
-
-df_inventory = pd.DataFrame(inventory_data)
-print(f"   ✓ {len(df_inventory):,} inventory records created")
+def sales_frame(df_time, df_product, df_geography, channels, measures, first_txn=1, schema=None):
+    """Flatten simulated sales measures into compact FACT_SALES rows.
+
+    Rows come out in (week, product, region, channel) order with consecutive
+    transaction numbers starting at ``first_txn``. Keys are categoricals over
+    ``schema`` (by default the dimensions passed in); transaction ids are
+    formatted when the frame is written.
+    """
+    if schema is None:
+        schema = StarSchema.from_frames(df_time, df_product, df_geography, channels)
+    n_weeks, n_products, n_regions, n_channels = measures['units_sold'].shape
+    n_rows = measures['units_sold'].size
+    week_codes = schema.encode('week_id', df_time['week_id'])
+    product_codes = schema.encode('product_id', df_product['product_id'])
+    region_codes = schema.encode('region_id', df_geography['region_id'])
+    channel_codes = schema.encode('channel_id', channels)
+
+    df_sales = pd.DataFrame({
+        'transaction_no': np.arange(first_txn, first_txn + n_rows, dtype=np.int64),
+        'week_id': schema.categorical('week_id', np.repeat(week_codes, n_products * n_regions * n_channels)),
+        'product_id': schema.categorical('product_id', np.tile(np.repeat(product_codes, n_regions * n_channels), n_weeks)),
+        'region_id': schema.categorical('region_id', np.tile(np.repeat(region_codes, n_channels), n_weeks * n_products)),
+        'channel_id': schema.categorical('channel_id', np.tile(channel_codes, n_weeks * n_products * n_regions)),
+    })
+    types = COLUMN_TYPES['fact_sales']
+    for name, values in measures.items():
+        df_sales[name] = values.ravel().astype(types.get(name, values.dtype))
+    return df_sales
+
+def simulate_sales_shard(chunk_time, df_product, df_geography, channels, promo_discounts, seed, chunk_idx, block_idx):
+    """Process-pool task: sales measures for one week chunk x SKU block"""
+    rng = shard_rng(seed, SALES_STREAM, chunk_idx, block_idx)
+    return simulate_sales(chunk_time, df_product, df_geography, channels, promo_discounts, rng)
+
+def simulate_inventory(df_time, df_product, df_geography, weekly_units, rng, opening_stock=None, schema=None):
+    """Simulate FACT_INVENTORY from a (weeks x product x region) array of units sold.
+
+    The stock recurrence is inherently sequential in time, so it steps one week
+    at a time, but every SKU-region pair is advanced together as an array.
+    Rows come out in (week, product, region) order.
+
+    ``opening_stock`` carries the closing position of a previous chunk; when it
+    is None the first week's stock is seeded from its sales. Returns the
+    inventory frame (compact keys over ``schema``, as in sales_frame) and the
+    closing stock of the last week.
+    """
+    if schema is None:
+        schema = StarSchema.from_frames(df_time, df_product, df_geography, [])
+    n_weeks, n_products, n_regions = weekly_units.shape
+    shape = (n_products, n_regions)
+
+    opening = np.empty_like(weekly_units)
+    closing = np.empty_like(weekly_units)
+    stockout_days = np.empty_like(weekly_units)
+
+    stock = opening_stock
+    for week_idx in range(n_weeks):
+        week_sales = weekly_units[week_idx]
+
+        # Opening stock: seeded from first-week sales, then carried forward
+        if stock is None:
+            stock = (week_sales * rng.uniform(3, 6, size=shape)).astype(np.int64)
+
+        # Replenishment
+        replenishment = np.where(
+            stock < week_sales * 2.5,
+            (week_sales * rng.uniform(4, 6, size=shape) - stock).astype(np.int64),
+            0
+        )
+        closing_stock = np.maximum(0, stock + replenishment - week_sales)
+
+        # Stockouts
+        sold_out = rng.integers(1, 4, size=shape, endpoint=True)
+        running_low = np.where(rng.random(size=shape) < 0.3, rng.integers(1, 2, size=shape, endpoint=True), 0)
+        stockout_days[week_idx] = np.where(closing_stock <= 0, sold_out,
+                                           np.where(closing_stock < week_sales * 0.5, running_low, 0))
+
+        opening[week_idx] = stock
+        closing[week_idx] = closing_stock
+        stock = closing_stock
+
+    # Holding cost (18% annual carrying rate on cost value)
+    unit_cost = (df_product['unit_price_ngn_2024'] * df_product['cogs_percentage']).to_numpy()
+    holding_cost = (opening + closing) / 2 * unit_cost[None, :, None] * (0.18 / 52)
+
+    week_codes = schema.encode('week_id', df_time['week_id'])
+    product_codes = schema.encode('product_id', df_product['product_id'])
+    region_codes = schema.encode('region_id', df_geography['region_id'])
+    types = COLUMN_TYPES['fact_inventory']
+
+    df_inventory = pd.DataFrame({
+        'week_id': schema.categorical('week_id', np.repeat(week_codes, n_products * n_regions)),
+        'product_id': schema.categorical('product_id', np.tile(np.repeat(product_codes, n_regions), n_weeks)),
+        'region_id': schema.categorical('region_id', np.tile(region_codes, n_weeks * n_products)),
+        'opening_stock_units': opening.ravel().astype(types['opening_stock_units']),
+        'closing_stock_units': closing.ravel().astype(types['closing_stock_units']),
+        'stockout_days': stockout_days.ravel().astype(types['stockout_days']),
+        'inventory_holding_cost_ngn': np.round(holding_cost, 2).ravel()
+    })
+    return df_inventory, stock
+
+def week_chunks(num_weeks, chunk_weeks=CHUNK_WEEKS, first_chunk=0):
+    """(chunk_idx, start, stop) week ranges of the fact generation; the index keys the random streams"""
+    return [(chunk_idx, start, min(start + chunk_weeks, num_weeks))
+            for chunk_idx, start in enumerate(range(0, num_weeks, chunk_weeks), start=first_chunk)]
+
+def iter_sales_measures(df_time, df_product, df_geography, channels, promo_index, chunks,
+                        sku_block=SKU_BLOCK, seed=SEED, executor=None, workers=1):
+    """Simulated sales cubes for the given week chunks, in order.
+
+    Sales are simulated per (week chunk, SKU block) shard, on ``executor`` when
+    one is given, and the shards of a chunk are stitched back together in
+    (week, product, region, channel) order. Chunks are independent of each
+    other, so any subset of ``week_chunks`` gives the same values as a full
+    run. Yields (chunk_idx, start, stop, measures).
+    """
+    region_ids = df_geography['region_id']
+    blocks = [(start, min(start + sku_block, len(df_product))) for start in range(0, len(df_product), sku_block)]
+
+    def shard_tasks():
+        for chunk_idx, chunk_start, chunk_stop in chunks:
+            for block_idx, (block_start, block_stop) in enumerate(blocks):
+                block_product = df_product.iloc[block_start:block_stop]
+                promo_discounts = promo_index.discount_cube(block_product['product_id'], region_ids, channels,
+                                                            week_range=(chunk_start, chunk_stop))
+                yield (df_time.iloc[chunk_start:chunk_stop], block_product, df_geography, channels,
+                       promo_discounts, seed, chunk_idx, block_idx)
+
+    results = ordered_map(executor, simulate_sales_shard, shard_tasks(), window=2 * max(1, workers))
+    for chunk_idx, chunk_start, chunk_stop in chunks:
+        shards = [next(results) for _ in blocks]
+        yield chunk_idx, chunk_start, chunk_stop, {
+            name: np.concatenate([shard[name] for shard in shards], axis=1) for name in shards[0]
+        }
+
+def iter_fact_chunks(df_time, df_product, df_geography, channels, promo_index,
+                     chunk_weeks=CHUNK_WEEKS, sku_block=SKU_BLOCK, seed=SEED, executor=None, workers=1,
+                     opening_stock=None, first_chunk=0, first_txn=1):
+    """Lazily generate FACT_SALES and FACT_INVENTORY one week chunk at a time.
+
+    The inventory recurrence advances over each chunk's sales, carrying the
+    stock position into the next one. To continue an earlier run (see
+    append_weeks), pass its closing stock, the index of its next chunk and its
+    next transaction number. Yields (chunk_time, df_sales, df_inventory).
+    """
+    schema = StarSchema.from_frames(df_time, df_product, df_geography, channels)
+    chunks = week_chunks(len(df_time), chunk_weeks, first_chunk)
+    stock = opening_stock
+    txn = first_txn
+    for chunk_idx, chunk_start, chunk_stop, measures in iter_sales_measures(
+            df_time, df_product, df_geography, channels, promo_index, chunks,
+            sku_block=sku_block, seed=seed, executor=executor, workers=workers):
+        chunk_time = df_time.iloc[chunk_start:chunk_stop]
+        df_sales = sales_frame(chunk_time, df_product, df_geography, channels, measures,
+                               first_txn=txn, schema=schema)
+
+        weekly_units = measures['units_sold'].sum(axis=3)
+        df_inventory, stock = simulate_inventory(chunk_time, df_product, df_geography, weekly_units,
+                                                 shard_rng(seed, INVENTORY_STREAM, chunk_idx), opening_stock=stock,
+                                                 schema=schema)
+        txn += len(df_sales)
+        yield chunk_time, df_sales, df_inventory
+
+def closing_stock(df_inventory, n_products, n_regions):
+    """Closing stock of the last week of an inventory frame, as a (product x region) array"""
+    last_week = df_inventory['closing_stock_units'].to_numpy()[-n_products * n_regions:]
+    return last_week.astype(np.int64).reshape(n_products, n_regions)
+
+def write_fact_tables(df_time, df_product, df_geography, channels, promo_index,
+                      output_dir=OUTPUT_DIR, chunk_weeks=CHUNK_WEEKS, sku_block=SKU_BLOCK,
+                      seed=SEED, executor=None, workers=1, fmt='csv',
+                      opening_stock=None, first_chunk=0, first_txn=1, append=False, database=None):
+    """Generate FACT_SALES and FACT_INVENTORY in shards, appending each week chunk to disk.
+
+    See iter_fact_chunks for the generation and the continuation arguments;
+    ``append=True`` adds the rows to the existing tables. ``fmt`` is 'csv' or
+    'parquet' (partitioned by year), or None to write no files. Each chunk is
+    also inserted into ``database`` (a database.DatabaseWriter) if given.
+    Returns (sales_rows, inventory_rows, total_revenue, closing_stock).
+    """
+    writers = []
+    if fmt is not None:
+        writers = [TableWriter(output_dir, 'fact_sales', fmt, append=append),
+                   TableWriter(output_dir, 'fact_inventory', fmt, append=append)]
+    sales_rows = inventory_rows = weeks_written = 0
+    total_revenue = 0.0
+    stock = opening_stock
+    for chunk_time, df_sales, df_inventory in iter_fact_chunks(
+            df_time, df_product, df_geography, channels, promo_index,
+            chunk_weeks=chunk_weeks, sku_block=sku_block, seed=seed, executor=executor, workers=workers,
+            opening_stock=opening_stock, first_chunk=first_chunk, first_txn=first_txn):
+        chunk_years = chunk_time['year'].to_numpy()
+        for writer, df in zip(writers, (df_sales, df_inventory)):
+            writer.write(df, years=np.repeat(chunk_years, len(df) // len(chunk_time)))
+        if database is not None:
+            database.write('fact_sales', df_sales)
+            database.write('fact_inventory', df_inventory)
+
+        sales_rows += len(df_sales)
+        inventory_rows += len(df_inventory)
+        total_revenue += df_sales['revenue_ngn'].sum()
+        weeks_written += len(chunk_time)
+        stock = closing_stock(df_inventory, len(df_product), len(df_geography))
+        print(f"   ⏳ {weeks_written}/{len(df_time)} weeks written...")
+
+    for writer in writers:
+        writer.close()
+    return sales_rows, inventory_rows, total_revenue, stock
+
+def iter_sales(weeks=None, start_date=START_DATE, num_weeks=NUM_WEEKS, products=PRODUCTS, regions=REGIONS,
+               channels=CHANNELS, promos_per_year=PROMOS_PER_YEAR, chunk_weeks=CHUNK_WEEKS,
+               sku_block=SKU_BLOCK, seed=SEED, executor=None, workers=1):
+    """Lazily generate FACT_SALES of a dataset, one week chunk (DataFrame) at a time.
+
+    ``weeks`` is an optional range or slice of consecutive week positions
+    (e.g. ``range(52, 104)`` for the second year); only the chunks
+    overlapping it are simulated, and the rows (transaction ids included) are
+    the same as in the full dataset generated with the same arguments.
+    """
+    df_product = generate_product_dim(products)
+    df_geography = generate_geography_dim(regions)
+    df_time = generate_time_dim(start_date, num_weeks)
+    df_promotions = generate_promotions(df_time, products, regions, channels, promos_per_year, seed=seed)
+    promo_index = PromoIndex(df_promotions, df_time['week_id'])
+    schema = StarSchema.from_frames(df_time, df_product, df_geography, channels)
+
+    if weeks is None:
+        weeks = slice(None)
+    weeks = range(num_weeks)[weeks if isinstance(weeks, slice) else slice(weeks.start, weeks.stop)]
+    first, stop = weeks.start, weeks.stop
+    chunks = [chunk for chunk in week_chunks(num_weeks, chunk_weeks) if chunk[1] < stop and chunk[2] > first]
+    rows_per_week = len(df_product) * len(df_geography) * len(channels)
+
+    for _, chunk_start, chunk_stop, measures in iter_sales_measures(
+            df_time, df_product, df_geography, channels, promo_index, chunks,
+            sku_block=sku_block, seed=seed, executor=executor, workers=workers):
+        df_sales = sales_frame(df_time.iloc[chunk_start:chunk_stop], df_product, df_geography, channels,
+                               measures, first_txn=chunk_start * rows_per_week + 1, schema=schema)
+        lo, hi = max(first, chunk_start), min(stop, chunk_stop)
+        yield df_sales.iloc[(lo - chunk_start) * rows_per_week:(hi - chunk_start) * rows_per_week]
 
 # ============================================================================
-# SAVE TO CSV
+# CHECKPOINT AND APPEND MODE
 # ============================================================================
 
-print()
-print("💾 Saving to CSV files...")
-
-# Create data/raw directory if it doesn't exist
-output_dir = 'data/raw/'
-os.makedirs(output_dir, exist_ok=True)
-
-df_product.to_csv(f'{output_dir}dim_product.csv', index=False)
-df_geography.to_csv(f'{output_dir}dim_geography.csv', index=False)
-df_time.to_csv(f'{output_dir}dim_time.csv', index=False)
-df_promotions.to_csv(f'{output_dir}fact_promotions.csv', index=False)
-df_sales.to_csv(f'{output_dir}fact_sales.csv', index=False)
-df_inventory.to_csv(f'{output_dir}fact_inventory.csv', index=False)
-
-print("   ✓ All files saved!")
+def save_state(output_dir, state):
+    """Write the append checkpoint (replacing the previous one atomically)"""
+    path = os.path.join(output_dir, STATE_FILE)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+def load_state(output_dir):
+    """Read the append checkpoint left by the last run in ``output_dir``"""
+    path = os.path.join(output_dir, STATE_FILE)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No generator checkpoint at {path}; run a full generation first")
+    with open(path) as f:
+        return json.load(f)
+
+def append_weeks(output_dir, num_weeks, executor=None, workers=1):
+    """Generate weeks N+1..N+num_weeks after the checkpoint in ``output_dir``.
+
+    Scale, seed and format come from the checkpoint. The inventory recurrence
+    resumes from the stored closing stock, transaction numbers and random
+    streams continue where the last run stopped, and campaigns running past
+    week N stay active. A year's campaigns are planned (over the whole year)
+    when its first week is generated; the YoY trend is a function of the year.
+    Only the new rows are written. Returns (df_new_time, df_new_promotions,
+    sales_rows, inventory_rows, total_revenue) for the appended weeks.
+    """
+    state = load_state(output_dir)
+    products = scale_catalog(PRODUCTS, state['sku_multiplier'], derive_product)
+    regions = scale_catalog(REGIONS, state['region_multiplier'], derive_region)
+    channels = state['channels']
+    fmt = state['format']
+    df_product = generate_product_dim(products)
+    df_geography = generate_geography_dim(regions)
+
+    # Calendar running to the end of the last year touched by the new weeks
+    first_week, last_week = state['weeks'], state['weeks'] + num_weeks
+    df_calendar = generate_time_dim(datetime.strptime(state['start_date'], '%Y-%m-%d'), last_week + 53)
+    df_new_time = df_calendar.iloc[first_week:last_week].reset_index(drop=True)
+
+    new_years = sorted(set(df_new_time['year'].tolist()) - set(state['promo_years']))
+    df_new_promotions = generate_promotions(
+        df_calendar[df_calendar['year'].isin(new_years)], products, regions, channels,
+        tuple(state['promos_per_year']), seed=state['seed'], executor=executor, first_id=state['promotions'] + 1
+    )
+    df_promotions = pd.concat([read_table(output_dir, 'fact_promotions'), df_new_promotions], ignore_index=True)
+
+    append_table(df_new_time, output_dir, 'dim_time', fmt)
+    append_table(df_new_promotions, output_dir, 'fact_promotions', fmt)
+
+    sales_rows, inventory_rows, total_revenue, closing_stock = write_fact_tables(
+        df_new_time, df_product, df_geography, channels, PromoIndex(df_promotions, df_new_time['week_id']),
+        output_dir=output_dir, chunk_weeks=state['chunk_weeks'], sku_block=state['sku_block'],
+        seed=state['seed'], executor=executor, workers=workers, fmt=fmt,
+        opening_stock=np.array(state['closing_stock'], dtype=np.int64), first_chunk=state['next_chunk'],
+        first_txn=state['next_transaction'], append=True
+    )
+
+    state.update(
+        weeks=last_week,
+        next_chunk=state['next_chunk'] + -(-num_weeks // state['chunk_weeks']),
+        next_transaction=state['next_transaction'] + sales_rows,
+        promotions=state['promotions'] + len(df_new_promotions),
+        promo_years=sorted(state['promo_years'] + new_years),
+        closing_stock=closing_stock.tolist(),
+    )
+    save_state(output_dir, state)
+    return df_new_time, df_new_promotions, sales_rows, inventory_rows, total_revenue
 
 # ============================================================================
-# SUMMARY
+# COMMAND LINE
 # ============================================================================
 
-print()
-print("="*80)
-print("✅ DATA GENERATION COMPLETE!")
-print("="*80)
-print()
-print(f"📊 Summary:")
-print(f"   • Products: {len(df_product)}")
-print(f"   • Regions: {len(df_geography)}")
-print(f"   • Weeks: {len(df_time)}")
-print(f"   • Promotions: {len(df_promotions)}")
-print(f"   • Sales Transactions: {len(df_sales):,}")
-print(f"   • Inventory Records: {len(df_inventory):,}")
-print()
-print(f"💰 Total Revenue (3 years): ₦{df_sales['revenue_ngn'].sum():,.2f}")
-print(f"📈 Avg Weekly Revenue: ₦{df_sales.groupby('week_id')['revenue_ngn'].sum().mean():,.2f}")
-print()
-print("📁 Files created in data/raw/:")
-print("   1. dim_product.csv")
-print("   2. dim_geography.csv")
-print("   3. dim_time.csv")
-print("   4. fact_promotions.csv")
-print("   5. fact_sales.csv")
-print("   6. fact_inventory.csv")
-print()
-print("🎉 Ready for Day 2: SQL Database Setup!")
-print("="*80)
\ No newline at end of file
+def parse_args(argv=None):
+    """Scale parameters for the generated dataset"""
+    parser = argparse.ArgumentParser(
+        description="Generate the CHI Limited star schema as CSV files. Fact rows = "
+                    "weeks x SKUs x regions x channels (156 x 48 x 6 x 2 by default)."
+    )
+    parser.add_argument('--weeks', type=int, default=NUM_WEEKS,
+                        help=f"number of weeks to generate (default: {NUM_WEEKS})")
+    parser.add_argument('--start-date', type=lambda s: datetime.strptime(s, '%Y-%m-%d'), default=START_DATE,
+                        help=f"Monday of the first week, YYYY-MM-DD (default: {START_DATE:%Y-%m-%d})")
+    parser.add_argument('--sku-multiplier', type=float, default=1.0,
+                        help="scale the product catalog; extra SKUs are variants of existing ones (default: 1)")
+    parser.add_argument('--region-multiplier', type=float, default=1.0,
+                        help="scale the region list; extra regions are copies of existing ones (default: 1)")
+    parser.add_argument('--channels', nargs='+', default=CHANNELS, metavar='CHANNEL',
+                        help=f"sales channels (default: {' '.join(CHANNELS)})")
+    parser.add_argument('--promos-per-year', type=int, nargs=2, default=PROMOS_PER_YEAR, metavar=('MIN', 'MAX'),
+                        help=f"range of campaigns generated per year (default: {PROMOS_PER_YEAR[0]} {PROMOS_PER_YEAR[1]})")
+    parser.add_argument('--chunk-weeks', type=int, default=CHUNK_WEEKS,
+                        help=f"weeks of fact data generated and written per chunk (default: {CHUNK_WEEKS})")
+    parser.add_argument('--sku-block', type=int, default=SKU_BLOCK,
+                        help=f"SKUs per sales shard (default: {SKU_BLOCK})")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="worker processes; output is identical for any value (default: CPU count)")
+    parser.add_argument('--output-dir', default=OUTPUT_DIR,
+                        help=f"directory for the output tables (default: {OUTPUT_DIR})")
+    parser.add_argument('--format', choices=FORMATS + ('none',), default='csv',
+                        help="csv, or parquet with fact tables partitioned by year (needs pyarrow), "
+                             "or none to write no files (with --database) (default: csv)")
+    parser.add_argument('--database', metavar='PATH',
+                        help="also load the tables straight into a fresh database at PATH "
+                             "(replaced if it exists), with indexes and views")
+    parser.add_argument('--engine', choices=ENGINES, default='sqlite',
+                        help="database engine for --database; duckdb needs the duckdb package (default: sqlite)")
+    parser.add_argument('--seed', type=int, default=SEED,
+                        help=f"random seed (default: {SEED})")
+    parser.add_argument('--append', type=int, metavar='WEEKS',
+                        help="add WEEKS more weeks to the dataset in --output-dir, resuming from its "
+                             f"checkpoint ({STATE_FILE}); scale, seed and format are taken from the checkpoint")
+
+    args = parser.parse_args(argv)
+    if min(args.weeks, args.chunk_weeks, args.sku_block, args.workers) < 1:
+        parser.error("--weeks, --chunk-weeks, --sku-block and --workers must be at least 1")
+    if args.append is not None and args.append < 1:
+        parser.error("--append must be at least 1")
+    if args.append is not None and args.database is not None:
+        parser.error("--append extends the files in --output-dir; rebuild the database with sql/create_database.py")
+    if args.format == 'none' and args.database is None:
+        parser.error("--format none needs --database")
+    if args.sku_multiplier <= 0 or args.region_multiplier <= 0:
+        parser.error("multipliers must be positive")
+    if not 0 <= args.promos_per_year[0] <= args.promos_per_year[1]:
+        parser.error("--promos-per-year needs 0 <= MIN <= MAX")
+    return args
+
+def main_append(args):
+    """Append mode: generate only the weeks after the stored checkpoint"""
+    print("="*80)
+    print(f"CHI LIMITED - APPENDING {args.append} WEEKS...")
+    print("="*80)
+    print()
+
+    with ProcessPoolExecutor(args.workers) if args.workers > 1 else nullcontext() as executor:
+        df_time, df_promotions, num_sales, num_inventory, total_revenue = append_weeks(
+            args.output_dir, args.append, executor=executor, workers=args.workers
+        )
+
+    print()
+    print(f"✅ Appended {df_time['week_id'].iloc[0]} .. {df_time['week_id'].iloc[-1]}")
+    print(f"   • Promotions: {len(df_promotions)} new")
+    print(f"   • Sales Transactions: {num_sales:,}")
+    print(f"   • Inventory Records: {num_inventory:,}")
+    print(f"💰 Revenue ({len(df_time)} weeks): ₦{total_revenue:,.2f}")
+
+def main(argv=None):
+    args = parse_args(argv)
+    output_dir = args.output_dir
+    if args.append is not None:
+        return main_append(args)
+
+    print("="*80)
+    print("CHI LIMITED - DATA GENERATION STARTING...")
+    print("="*80)
+    print()
+
+    products = scale_catalog(PRODUCTS, args.sku_multiplier, derive_product)
+    regions = scale_catalog(REGIONS, args.region_multiplier, derive_region)
+    channels = list(args.channels)
+
+    # ------------------------------------------------------------------------
+    # TABLES 1-4: dimensions and promotions
+    # ------------------------------------------------------------------------
+
+    print("📦 Generating DIM_PRODUCT...")
+    df_product = generate_product_dim(products)
+    print(f"   ✓ {len(df_product)} products created")
+
+    print("🗺️  Generating DIM_GEOGRAPHY...")
+    df_geography = generate_geography_dim(regions)
+    print(f"   ✓ {len(df_geography)} regions created")
+
+    print("📅 Generating DIM_TIME...")
+    df_time = generate_time_dim(args.start_date, args.weeks)
+    print(f"   ✓ {len(df_time)} weeks created")
+
+    fmt = None if args.format == 'none' else args.format
+    database = DatabaseWriter(args.database, args.engine) if args.database else nullcontext()
+
+    # Worker pool shared by promotion and sales shards (inline when --workers 1)
+    with ProcessPoolExecutor(args.workers) if args.workers > 1 else nullcontext() as executor, database:
+        print("🎯 Generating FACT_PROMOTIONS...")
+        # Campaigns are planned over whole calendar years, the last (partly generated) one too,
+        # so weeks appended later in that year (--append) have their campaigns in place
+        df_calendar = generate_time_dim(args.start_date, args.weeks + 53)
+        df_promotions = generate_promotions(df_calendar[df_calendar['year'].isin(df_time['year'].unique())],
+                                            products, regions, channels, args.promos_per_year,
+                                            seed=args.seed, executor=executor)
+        print(f"   ✓ {len(df_promotions)} promotional campaigns created")
+
+        print()
+        print("💾 Saving dimension and promotion tables...")
+        small_tables = {'dim_product': df_product, 'dim_geography': df_geography,
+                        'dim_time': df_time, 'fact_promotions': df_promotions}
+        if fmt is not None:
+            os.makedirs(output_dir, exist_ok=True)
+            for table, df in small_tables.items():
+                write_table(df, output_dir, table, fmt)
+            print("   ✓ Dimension and promotion files saved!")
+        if args.database:
+            for table, df in small_tables.items():
+                database.write(table, df)
+            print(f"   ✓ Dimension and promotion tables loaded into {args.database} ({args.engine})")
+        print()
+
+        # --------------------------------------------------------------------
+        # TABLES 5 & 6: FACT_SALES + FACT_INVENTORY (sharded, streamed to disk)
+        # --------------------------------------------------------------------
+
+        expected_rows = len(df_time) * len(df_product) * len(df_geography) * len(channels)
+        print(f"💰 Generating FACT_SALES and FACT_INVENTORY ({expected_rows:,} sales rows, "
+              f"{args.chunk_weeks}-week chunks, {args.workers} workers)...")
+        promo_index = PromoIndex(df_promotions, df_time['week_id'])
+        num_sales, num_inventory, total_revenue, closing_stock = write_fact_tables(
+            df_time, df_product, df_geography, channels, promo_index,
+            output_dir=output_dir, chunk_weeks=args.chunk_weeks, sku_block=args.sku_block,
+            seed=args.seed, executor=executor, workers=args.workers, fmt=fmt,
+            database=database if args.database else None
+        )
+        print(f"   ✓ {num_sales:,} sales transactions created")
+        print(f"   ✓ {num_inventory:,} inventory records created")
+        if args.database:
+            print(f"⚡ Creating indexes and views in {args.database}...")
+    # (leaving the block commits the database load and builds its indexes, statistics and views)
+
+    # Checkpoint for later --append runs (only the files can be appended to)
+    if fmt is not None:
+        save_state(output_dir, {
+            'start_date': f"{args.start_date:%Y-%m-%d}",
+            'seed': args.seed,
+            'sku_multiplier': args.sku_multiplier,
+            'region_multiplier': args.region_multiplier,
+            'channels': channels,
+            'promos_per_year': list(args.promos_per_year),
+            'chunk_weeks': args.chunk_weeks,
+            'sku_block': args.sku_block,
+            'format': args.format,
+            'weeks': len(df_time),
+            'next_chunk': -(-len(df_time) // args.chunk_weeks),
+            'next_transaction': num_sales + 1,
+            'promotions': len(df_promotions),
+            'promo_years': sorted(df_time['year'].unique().tolist()),
+            'closing_stock': closing_stock.tolist(),
+        })
+
+    # ------------------------------------------------------------------------
+    # SUMMARY
+    # ------------------------------------------------------------------------
+
+    print()
+    print("="*80)
+    print("✅ DATA GENERATION COMPLETE!")
+    print("="*80)
+    print()
+    print(f"📊 Summary:")
+    print(f"   • Products: {len(df_product)}")
+    print(f"   • Regions: {len(df_geography)}")
+    print(f"   • Channels: {len(channels)}")
+    print(f"   • Weeks: {len(df_time)}")
+    print(f"   • Promotions: {len(df_promotions)}")
+    print(f"   • Sales Transactions: {num_sales:,}")
+    print(f"   • Inventory Records: {num_inventory:,}")
+    print()
+    print(f"💰 Total Revenue ({len(df_time)} weeks): ₦{total_revenue:,.2f}")
+    print(f"📈 Avg Weekly Revenue: ₦{total_revenue / len(df_time):,.2f}")
+    print()
+    if fmt is not None:
+        print(f"📁 Tables created in {output_dir} ({fmt}):")
+    if args.database:
+        print(f"🗄️  Tables loaded into {args.database} ({args.engine}, indexed, with views):")
+    print("   1. dim_product")
+    print("   2. dim_geography")
+    print("   3. dim_time")
+    print("   4. fact_promotions")
+    print("   5. fact_sales")
+    print("   6. fact_inventory")
+    print()
+    print("🎉 Ready for Day 2: SQL Database Setup!")
+    print("="*80)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+CHI LIMITED - PROMOTION INDEX
+Resolves which promotion is active for a SKU / region / channel in a given week
+"""
+
+import numpy as np
+import pandas as pd
+
+
+class PromoIndex:
+    """Promotion calendar indexed by (product_id, region_id, channel_id).
+
+    Every key owns a sorted run of non-overlapping week intervals, each tagged
+    with the promotion that applies there. Where campaigns for the same key
+    overlap, the one listed first in ``df_promotions`` wins, which is what the
+    original per-row lookup (``active_promos.iloc[0]``) returned.
+
+    Intervals are stored as positions in ``week_ids`` (the DIM_TIME calendar in
+    chronological order), flattened into one array sorted by key then start
+    week, so a lookup is a single binary search.
+    """
+
+    def __init__(self, df_promotions, week_ids):
+        self.promotions = df_promotions.reset_index(drop=True)
+        self.week_ids = pd.Index(np.asarray(week_ids, dtype=str))
+        self.n_weeks = len(self.week_ids)
+
+        # Promo weeks -> calendar positions (clipped to the calendar)
+        starts = self.week_ids.searchsorted(self.promotions['promo_start_week'].astype(str), side='left')
+        ends = self.week_ids.searchsorted(self.promotions['promo_end_week'].astype(str), side='right') - 1
+
+        intervals = {}
+        for row, promo in enumerate(self.promotions[['product_id', 'region_id', 'channel_id']].itertuples(index=False)):
+            if starts[row] <= ends[row]:
+                intervals.setdefault(tuple(promo), []).append((starts[row], ends[row], row))
+
+        self.keys = pd.MultiIndex.from_tuples(list(intervals), names=['product_id', 'region_id', 'channel_id'])
+
+        seg_start, seg_end, seg_row = [], [], []
+        for key_code, key in enumerate(self.keys):
+            offset = key_code * self.n_weeks
+            for start, end, row in self._flatten(intervals[key]):
+                seg_start.append(offset + start)
+                seg_end.append(offset + end)
+                seg_row.append(row)
+
+        self._seg_start = np.array(seg_start, dtype=np.int64)
+        self._seg_end = np.array(seg_end, dtype=np.int64)
+        self._seg_row = np.array(seg_row, dtype=np.int64)
+
+    @staticmethod
+    def _flatten(intervals):
+        """Split overlapping (start, end, row) intervals into disjoint winning segments"""
+        points = sorted({start for start, _, _ in intervals} | {end + 1 for _, end, _ in intervals})
+        segments = []
+        for lo, hi in zip(points, points[1:]):
+            active = [row for start, end, row in intervals if start <= lo <= end]
+            if not active:
+                continue
+            row = min(active)
+            if segments and segments[-1][2] == row and segments[-1][1] == lo - 1:
+                segments[-1] = (segments[-1][0], hi - 1, row)
+            else:
+                segments.append((lo, hi - 1, row))
+        return segments
+
+    def __len__(self):
+        return len(self.promotions)
+
+    def lookup(self, week_ids, product_ids, region_ids, channel_ids):
+        """Row position in df_promotions of the active promo for each input row (-1 if none)"""
+        key_codes = self.keys.get_indexer(pd.MultiIndex.from_arrays(
+            [np.asarray(product_ids), np.asarray(region_ids), np.asarray(channel_ids)]))
+        week_pos = self.week_ids.get_indexer(np.asarray(week_ids, dtype=str))
+
+        if not len(self._seg_row):
+            return np.full(len(week_pos), -1, dtype=np.int64)
+
+        query = key_codes.astype(np.int64) * self.n_weeks + week_pos
+        seg = np.clip(np.searchsorted(self._seg_start, query, side='right') - 1, 0, None)
+        hit = ((key_codes >= 0) & (week_pos >= 0)
+               & (self._seg_start[seg] <= query) & (query <= self._seg_end[seg]))
+        return np.where(hit, self._seg_row[seg], -1)
+
+    def active(self, product_id, region_id, channel_id, week_id):
+        """The promotion (as a row of df_promotions) active in that week, or None"""
+        row = self.lookup([week_id], [product_id], [region_id], [channel_id])[0]
+        return None if row < 0 else self.promotions.iloc[row]
+
+    def discount_cube(self, product_ids, region_ids, channels, week_range=None):
+        """Dense week x product x region x channel array of active discount percentages.
+
+        ``week_range`` is an optional (start, stop) pair of calendar positions,
+        so callers generating a chunk of weeks only materialise that slice.
+        """
+        week_start, week_stop = week_range if week_range is not None else (0, self.n_weeks)
+        product_pos = {p: i for i, p in enumerate(product_ids)}
+        region_pos = {r: i for i, r in enumerate(region_ids)}
+        channel_pos = {c: i for i, c in enumerate(channels)}
+        discounts = np.zeros((week_stop - week_start, len(product_pos), len(region_pos), len(channel_pos)))
+        discount_pct = self.promotions['discount_percentage'].to_numpy()
+
+        for start, end, row in zip(self._seg_start, self._seg_end, self._seg_row):
+            product_id, region_id, channel_id = self.keys[start // self.n_weeks]
+            lo = max(start % self.n_weeks, week_start)
+            hi = min(end % self.n_weeks + 1, week_stop)
+            if lo < hi and product_id in product_pos and region_id in region_pos and channel_id in channel_pos:
+                discounts[lo - week_start:hi - week_start,
+                          product_pos[product_id],
+                          region_pos[region_id],
+                          channel_pos[channel_id]] = discount_pct[row]
+        return discounts
@@ -0,0 +1,130 @@
+"""
+CHI LIMITED - QUERY RESULT CACHE
+Serves repeated queries from memory (or disk) until a load changes the data
+
+Results are keyed on the normalized SQL (comments and layout outside string
+literals removed), the parameters and the data version stamp every load
+writes (bump_data_version in database.py). A load replaces the stamp, so a
+result of earlier data is never served, and the entries of other versions
+are dropped the first time a new version is seen. The most recently used
+results are kept in memory; with a directory they are also pickled to disk,
+so the next run of a report starts warm.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+from database import data_version, read_sql
+
+# Results kept in memory, least recently used evicted first
+MAX_ENTRIES = 128
+
+# String literals (kept as written), and runs of whitespace and comments
+SQL_TOKENS = re.compile(r"('(?:[^']|'')*')|((?:\s|--[^\n]*|/\*.*?\*/)+)", re.DOTALL)
+
+
+def normalize_sql(sql):
+    """SQL without comments, with single spaces between tokens and no trailing semicolon"""
+    def token(match):
+        literal, _ = match.groups()
+        return literal if literal else ' '
+    return SQL_TOKENS.sub(token, sql).strip().rstrip(';').rstrip()
+
+
+class QueryCache:
+    """LRU cache of query results (DataFrames) for one data version at a time.
+
+    read_sql() is a drop-in for database.read_sql() and may be called from
+    several threads (see QueryPool): the entries are shared under a lock, the
+    queries of concurrent misses run in parallel. A database without a version
+    stamp (loaded before stamps were written) is never cached.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, directory=None):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.version = None
+        self.hits = self.misses = 0
+        self.lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(sql, params=None, version=None):
+        payload = json.dumps([normalize_sql(sql), params, version], default=str, sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def read_sql(self, conn, sql, params=None, read=read_sql):
+        """Result of a query, from the cache when the data has not changed since it was run.
+
+        ``read`` runs the query on a miss (e.g. a QueryLog's read_sql, so only
+        queries that reach the database are recorded).
+        """
+        version = data_version(conn)
+        key = self.key(sql, params, version)
+        with self.lock:
+            if version is not None and version != self.version:
+                self._invalidate(version)
+            df = self._get(key) if version is not None else None
+            if df is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if df is None:
+            df = read(conn, sql, params)
+            if version is None:
+                return df
+            with self.lock:
+                if version == self.version:  # not invalidated by a newer load meanwhile
+                    self._put(key, df)
+        return df.copy()  # callers may modify their result; the cached one stays as computed
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{self.version}-{key}.pkl")
+
+    def _get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            return self.entries[key]
+        if self.directory and os.path.exists(self._path(key)):
+            import pandas as pd
+            df = pd.read_pickle(self._path(key))
+            self._remember(key, df)
+            return df
+        return None
+
+    def _put(self, key, df):
+        self._remember(key, df)
+        if self.directory:
+            path = self._path(key)
+            partial = f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+            df.to_pickle(partial)
+            os.replace(partial, path)  # concurrent readers never see a partial file
+
+    def _remember(self, key, df):
+        self.entries[key] = df
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _invalidate(self, version):
+        """Forget the results of every other data version"""
+        self.entries.clear()
+        self.version = version
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith('.pkl') and not name.startswith(f"{version}-"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def clear(self):
+        """Drop every cached result, in memory and on disk"""
+        self.entries.clear()
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.directory, name))
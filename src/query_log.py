@@ -0,0 +1,291 @@
+"""
+CHI LIMITED - QUERY INSTRUMENTATION
+Times every SQL statement a script runs and keeps a slow-query log
+
+QueryLog wraps query execution (read_sql, fetchall, execute) and whole
+blocks of database work (step) in a wall-clock timer. On SQLite it also
+installs a trace callback, which sees every statement the engine starts
+(including those run by executescript and inside database.py helpers), and a
+progress handler, which counts virtual-machine steps: the work a statement
+did, which grows with the rows it scanned even when it returns few.
+
+Every statement becomes one JSON record (a line of the log file):
+
+    time, kind (query / statement / step), name, fingerprint, sql,
+    duration_ms, rows, vm_steps, plan, slow (and error when it failed)
+
+The fingerprint hashes the SQL without layout, comments or literal values,
+so every run of the same query shares it, whatever its parameters. rows are
+the rows returned (queries) or changed (other statements). The plan is
+EXPLAIN QUERY PLAN (EXPLAIN on DuckDB), taken once per fingerprint. Records
+at or above the slow threshold are also appended to the slow-query log.
+Reading a log back with summarize() totals the records by fingerprint, so
+the views that drive load as the data grows stand out.
+
+Usage:
+    from query_log import QueryLog
+    log = QueryLog('logs/queries.jsonl', slow_path='logs/slow_queries.jsonl', slow_ms=250)
+    df = log.read_sql(conn, "SELECT ...", name='revenue by region')
+    with log.step(conn, 'create indexes'):
+        create_indexes(conn)
+
+    python src/query_log.py logs/slow_queries.jsonl   # slowest fingerprints first
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+import pandas as pd
+
+from database import engine_of, pruned, query_errors, read_sql
+from query_cache import normalize_sql
+
+# Queries at or above this duration go to the slow-query log
+SLOW_MS = 500
+
+# Slow-query log of the scripts (kept out of git)
+SLOW_LOG_PATH = 'logs/slow_queries.jsonl'
+
+# VM steps between progress handler calls (the resolution of vm_steps)
+PROGRESS_STEPS = 1000
+
+# Characters of SQL kept per record
+SQL_CHARS = 2000
+
+# String and numeric literals, replaced by ? in fingerprints
+LITERALS = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+# Statements a query plan is taken for
+PLANNED = re.compile(r'^\s*(SELECT|WITH)\b', re.IGNORECASE)
+
+
+def fingerprint(sql):
+    """Hash of the SQL without layout, comments or literal values (the same for every run of a query)"""
+    shape = LITERALS.sub('?', normalize_sql(sql))
+    return hashlib.sha256(shape.encode()).hexdigest()[:16]
+
+
+class _Tracer:
+    """Statements a SQLite connection starts while installed, with their VM steps and changed rows"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.ticks = 0
+        self.started = []  # [sql, start, ticks, total changes] per statement
+        conn.set_progress_handler(self._tick, PROGRESS_STEPS)
+        conn.set_trace_callback(self._trace)
+
+    def _tick(self):
+        self.ticks += 1
+        return 0  # never interrupt
+
+    def _trace(self, sql):
+        # Trigger programs are traced with the text of the statement that fired them
+        if self.started and self.started[-1][0] == sql:
+            return
+        self.started.append([sql, time.perf_counter(), self.ticks, self.conn.total_changes])
+
+    def close(self):
+        """Remove the callbacks; a (sql, seconds, vm_steps, changes) tuple per statement"""
+        end = [None, time.perf_counter(), self.ticks, self.conn.total_changes]
+        self.conn.set_progress_handler(None, 0)
+        self.conn.set_trace_callback(None)
+        marks = self.started + [end]
+        return [(sql, after[1] - start, (after[2] - ticks) * PROGRESS_STEPS, after[3] - changes)
+                for (sql, start, ticks, changes), after in zip(marks, marks[1:])
+                if sql.strip().upper() not in ('BEGIN', 'COMMIT')]
+
+
+class QueryLog:
+    """Structured timing records of SQL executions, with a slow-query log.
+
+    Records go to ``path`` (every record) and ``slow_path`` (records of at
+    least ``slow_ms``); either may be None. They are also kept in
+    ``records``. One log may be shared by threads running queries on
+    connections of their own (see QueryPool).
+    """
+
+    def __init__(self, path=None, slow_path=SLOW_LOG_PATH, slow_ms=SLOW_MS, plans=True):
+        self.path = path
+        self.slow_path = slow_path
+        self.slow_ms = slow_ms
+        self.plans = plans
+        self.records = []
+        self.plan_cache = {}
+        self.lock = threading.Lock()
+        for file_path in (path, slow_path):
+            if file_path:
+                os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+
+    @property
+    def slow(self):
+        return [record for record in self.records if record['slow']]
+
+    # ------------------------------------------------------------------
+    # Instrumented execution
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def timed(self, conn, sql, params=None, name=None):
+        """Time one query run inside the block; the block may set record['rows']"""
+        record = {'rows': None}
+        tracer = _Tracer(conn) if engine_of(conn) == 'sqlite' else None
+        start = time.perf_counter()
+        try:
+            yield record
+        except query_errors(engine_of(conn)) as exc:
+            record['error'] = str(exc.__cause__ or exc).splitlines()[0]  # pandas wraps the engine's error
+            raise
+        finally:
+            seconds = time.perf_counter() - start
+            statements = tracer.close() if tracer else []
+            self._write(self._record('query', name, sql, seconds, rows=record['rows'],
+                                     vm_steps=sum(s[2] for s in statements) if tracer else None,
+                                     plan=self.plan(conn, sql, params), error=record.get('error')))
+
+    @contextmanager
+    def step(self, conn, name, trace=True):
+        """Time a block of database work, and (SQLite, ``trace``) every statement it runs.
+
+        A block of many small statements (a bulk load's executemany) should
+        pass trace=False: it is then recorded as a whole, with the rows the
+        block sets in record['rows'].
+        """
+        record = {'rows': None}
+        tracer = _Tracer(conn) if trace and engine_of(conn) == 'sqlite' else None
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            seconds = time.perf_counter() - start
+            statements = tracer.close() if tracer else []
+            for sql, statement_seconds, vm_steps, changes in statements:
+                self._write(self._record('statement', name, sql, statement_seconds,
+                                         rows=None if PLANNED.match(sql) else changes,
+                                         vm_steps=vm_steps, plan=self.plan(conn, sql)))
+            self._write(self._record('step', name, None, seconds, rows=record['rows'],
+                                     vm_steps=sum(s[2] for s in statements) if tracer else None,
+                                     statements=len(statements) if tracer else None))
+
+    def read_sql(self, conn, sql, params=None, name=None):
+        """database.read_sql(), recorded"""
+        with self.timed(conn, sql, params, name) as record:
+            df = read_sql(conn, sql, params)
+            record['rows'] = len(df)
+        return df
+
+    def fetchall(self, conn, sql, params=(), name=None):
+        """Rows of a query run with conn.execute(), recorded"""
+        with self.timed(conn, sql, params, name) as record:
+            rows = conn.execute(sql, params).fetchall()
+            record['rows'] = len(rows)
+        return rows
+
+    def execute(self, conn, sql, params=(), name=None):
+        """conn.execute() of a statement that returns no rows, recorded with the rows it changed"""
+        with self.timed(conn, sql, params, name) as record:
+            cursor = conn.execute(sql, params)
+            rowcount = getattr(cursor, 'rowcount', -1)
+            record['rows'] = rowcount if rowcount >= 0 else None
+        return cursor
+
+    def plan(self, conn, sql, params=None):
+        """Query plan lines of a SELECT (taken once per fingerprint); None for other statements"""
+        if not self.plans or not PLANNED.match(sql):
+            return None
+        key = fingerprint(sql)
+        if key not in self.plan_cache:
+            try:
+                if engine_of(conn) == 'sqlite':
+                    rows = conn.execute(f"EXPLAIN QUERY PLAN {pruned(conn, sql)}", params or ()).fetchall()
+                    depth = {0: -1}
+                    lines = []
+                    for node, parent, _, detail in rows:
+                        depth[node] = depth.get(parent, -1) + 1
+                        lines.append('  ' * depth[node] + detail)
+                else:
+                    rows = conn.execute(f"EXPLAIN {sql}", params).fetchall() if params else \
+                        conn.execute(f"EXPLAIN {sql}").fetchall()
+                    lines = [line for _, text in rows for line in text.splitlines() if line.strip()]
+            except query_errors(engine_of(conn)):
+                lines = None  # e.g. a table the block dropped again
+            self.plan_cache[key] = lines
+        return self.plan_cache[key]
+
+    # ------------------------------------------------------------------
+    # Records
+    # ------------------------------------------------------------------
+
+    def _record(self, kind, name, sql, seconds, **fields):
+        duration_ms = round(seconds * 1000, 3)
+        record = {
+            'time': datetime.now().isoformat(timespec='milliseconds'),
+            'kind': kind,
+            'name': name,
+            'fingerprint': fingerprint(sql if sql is not None else name),
+            'sql': normalize_sql(sql)[:SQL_CHARS] if sql is not None else None,
+            'duration_ms': duration_ms,
+            **fields,
+            'slow': duration_ms >= self.slow_ms,
+        }
+        if record.get('error') is None:
+            record.pop('error', None)
+        return record
+
+    def _write(self, record):
+        line = json.dumps(record, default=str) + '\n'
+        with self.lock:
+            self.records.append(record)
+            for file_path in (self.path, self.slow_path if record['slow'] else None):
+                if file_path:
+                    with open(file_path, 'a', encoding='utf-8') as f:
+                        f.write(line)
+
+
+def read_log(*paths):
+    """Records of one or more JSON-lines logs as a DataFrame"""
+    records = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            records.extend(json.loads(line) for line in f if line.strip())
+    return pd.DataFrame(records)
+
+
+def summarize(records):
+    """Records (a DataFrame or list of dicts) totalled per fingerprint, the most time first"""
+    df = pd.DataFrame(records)
+    if df.empty:
+        return df
+    summary = df.groupby(['kind', 'fingerprint'], sort=False).agg(
+        name=('name', 'first'),
+        calls=('duration_ms', 'size'),
+        total_ms=('duration_ms', 'sum'),
+        max_ms=('duration_ms', 'max'),
+        rows=('rows', 'max'),
+        vm_steps=('vm_steps', 'max'),
+        sql=('sql', 'first'),
+    )
+    return summary.sort_values('total_ms', ascending=False).reset_index()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Summarize CHI Limited query logs by fingerprint")
+    parser.add_argument('logs', nargs='+', help="JSON-lines query logs (e.g. logs/slow_queries.jsonl)")
+    parser.add_argument('--top', type=int, default=20, help="fingerprints shown (default: 20)")
+    args = parser.parse_args()
+
+    summary = summarize(read_log(*args.logs))
+    print(f"{'Kind':<10} {'Fingerprint':<17} {'Calls':>6} {'Total ms':>11} {'Max ms':>10} {'Max rows':>10}  Name / SQL")
+    print("-" * 110)
+    for row in summary.head(args.top).itertuples(index=False):
+        label = row.sql if row.kind == 'statement' or not isinstance(row.name, str) else row.name
+        rows = f"{row.rows:,.0f}" if pd.notna(row.rows) else '-'
+        print(f"{row.kind:<10} {row.fingerprint:<17} {row.calls:>6,} {row.total_ms:>11,.1f} {row.max_ms:>10,.1f} "
+              f"{rows:>10}  {label[:60]}")
@@ -0,0 +1,92 @@
+"""
+CHI LIMITED - CONCURRENT QUERY EXECUTION
+Runs independent read queries at the same time over a pool of read-only connections
+
+Each worker thread borrows a connection opened read-only (mode=ro; the year
+files of a partitioned database are attached read-only too). SQLite releases
+the GIL while a statement runs, so the queries of a bundle run on separate
+cores and the bundle takes about as long as its slowest query, given a core
+per query. The pool only reads: databases are left in WAL mode when they are
+built or updated (incremental_mode in database.py), so a load running
+meanwhile does not block the readers, which keep seeing the last committed
+data. On DuckDB the workers share one read-only database through cursors.
+With a QueryLog every query that reaches the database is recorded (see
+src/query_log.py).
+
+Usage:
+    from query_pool import QueryPool
+    with QueryPool('chi_limited.db') as pool:
+        for result in pool.run({'revenue': "SELECT ...", 'stock': "SELECT ..."}):
+            print(result.name, f"{result.seconds:.3f}s", len(result.frame))
+"""
+
+import os
+import queue
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from database import connect, query_errors, read_sql
+
+# Outcome of one query: its DataFrame (None if it failed), run time and error (None if it ran)
+QueryResult = namedtuple('QueryResult', ['name', 'frame', 'seconds', 'error'])
+
+
+class QueryPool:
+    """A fixed number of read-only connections and a thread per connection.
+
+    run() executes a bundle of queries concurrently and returns their results
+    in the order given; submit() queues a single query and returns a Future.
+    With a QueryCache, results of unchanged data come from the cache; with a
+    QueryLog, the queries run on the database are timed and logged.
+    """
+
+    def __init__(self, db_path, engine='sqlite', size=None, cache=None, log=None):
+        self.engine = engine
+        self.size = size or os.cpu_count() or 1
+        self.cache = cache
+        self.log = log
+        self.errors = query_errors(engine)
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"Database not found: {db_path}")
+        self.database = connect(db_path, engine, read_only=True) if engine == 'duckdb' else None
+        self.idle = queue.Queue()
+        for _ in range(self.size):
+            self.idle.put(self.database.cursor() if self.database else connect(db_path, engine, read_only=True))
+        self.executor = ThreadPoolExecutor(self.size, thread_name_prefix='query')
+
+    def _execute(self, name, sql, params):
+        conn = self.idle.get()
+        start = time.perf_counter()
+        read = partial(self.log.read_sql, name=name) if self.log else read_sql
+        try:
+            frame = self.cache.read_sql(conn, sql, params, read=read) if self.cache else read(conn, sql, params)
+            return QueryResult(name, frame, time.perf_counter() - start, None)
+        except self.errors as exc:
+            return QueryResult(name, None, time.perf_counter() - start, exc)
+        finally:
+            self.idle.put(conn)
+
+    def submit(self, name, sql, params=None):
+        """Queue a query; the Future resolves to its QueryResult"""
+        return self.executor.submit(self._execute, name, sql, params)
+
+    def run(self, queries, params=None):
+        """Run named queries ({name: sql} or (name, sql) pairs) concurrently; QueryResults in the same order"""
+        pairs = queries.items() if isinstance(queries, dict) else queries
+        futures = [self.submit(name, sql, params) for name, sql in pairs]
+        return [future.result() for future in futures]
+
+    def close(self):
+        self.executor.shutdown()
+        while not self.idle.empty():
+            self.idle.get().close()
+        if self.database is not None:
+            self.database.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
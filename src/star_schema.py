@@ -0,0 +1,110 @@
+"""
+CHI LIMITED - COMPACT STAR SCHEMA
+Typed in-memory representation of the star schema shared by the generator
+and the table readers
+
+Fact rows reference dimensions by integer surrogate keys (the row position of
+the member in its dimension) held as pandas categoricals, so a 10x larger
+fact_sales stores one small integer per key instead of a Python string.
+Counts are int8/int16/int32 and money columns float64, so exported values
+stay exact to the cent; read_csv uses the same types (csv_dtypes).
+transaction_id strings ('TXN-000001') are only formatted on export;
+in memory the fact row carries its integer transaction_no.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Natural key column -> dimension it references
+KEY_COLUMNS = {
+    'week_id': 'dim_time',
+    'product_id': 'dim_product',
+    'region_id': 'dim_geography',
+    'channel_id': 'channels',
+}
+
+# Promotion weeks reference dim_time as well
+WEEK_REFERENCES = ('promo_start_week', 'promo_end_week')
+
+# Storage dtypes of the non-key columns, per table
+COLUMN_TYPES = {
+    'dim_product': {
+        'pack_size_ml': 'int32', 'unit_price_ngn_2024': 'float64', 'cogs_percentage': 'float64',
+    },
+    'dim_geography': {
+        'urbanization_index': 'float64', 'population_millions': 'float64', 'wealth_index': 'float64',
+    },
+    'dim_time': {
+        'month_number': 'int8', 'year': 'int16', 'week_of_year': 'int8', 'is_holiday_week': 'int8',
+    },
+    'fact_promotions': {
+        'discount_percentage': 'float64', 'promo_cost_ngn': 'float64', 'incremental_volume_target': 'int32',
+    },
+    'fact_sales': {
+        'transaction_no': 'int64', 'units_sold': 'int32', 'revenue_ngn': 'float64',
+        'cost_of_goods_sold': 'float64', 'promo_discount_ngn': 'float64', 'baseline_demand': 'int32',
+    },
+    'fact_inventory': {
+        'opening_stock_units': 'int32', 'closing_stock_units': 'int32', 'stockout_days': 'int8',
+        'inventory_holding_cost_ngn': 'float64',
+    },
+}
+
+TRANSACTION_PREFIX = 'TXN-'
+
+
+def format_transaction_ids(numbers):
+    """Export form of transaction numbers: 1 -> 'TXN-000001'"""
+    return np.char.add(TRANSACTION_PREFIX, np.char.zfill(np.asarray(numbers).astype(str), 6))
+
+
+def parse_transaction_ids(ids):
+    """Inverse of format_transaction_ids"""
+    return pd.Series(ids).str.slice(len(TRANSACTION_PREFIX)).astype('int64').to_numpy()
+
+
+class StarSchema:
+    """Key encodings of one generated dataset.
+
+    Surrogate keys are positions in the dimension tables (weeks in calendar
+    order), so fact frames can be built straight from integer codes and
+    decoded to natural keys only when written out.
+    """
+
+    def __init__(self, week_ids, product_ids, region_ids, channels):
+        self.members = {
+            'week_id': pd.Index(np.asarray(week_ids, dtype=str)),
+            'product_id': pd.Index(np.asarray(product_ids, dtype=str)),
+            'region_id': pd.Index(np.asarray(region_ids, dtype=str)),
+            'channel_id': pd.Index(np.asarray(channels, dtype=str)),
+        }
+        self.dtypes = {key: pd.CategoricalDtype(members) for key, members in self.members.items()}
+
+    @classmethod
+    def from_frames(cls, df_time, df_product, df_geography, channels):
+        return cls(df_time['week_id'], df_product['product_id'], df_geography['region_id'], channels)
+
+    def encode(self, key, values):
+        """Surrogate keys for natural key values (-1 for unknown members)"""
+        return self.members[key].get_indexer(np.asarray(values, dtype=str))
+
+    def categorical(self, key, codes):
+        """Categorical column built directly from surrogate keys"""
+        return pd.Categorical.from_codes(codes, dtype=self.dtypes[key])
+
+
+def export(df):
+    """Natural-key form of a frame for CSV/SQL output, formatting transaction ids"""
+    if 'transaction_no' not in df.columns:
+        return df
+    df = df.copy()
+    df.insert(0, 'transaction_id', format_transaction_ids(df.pop('transaction_no')))
+    return df
+
+
+def csv_dtypes(table):
+    """Explicit read_csv dtypes for a stored table: categorical keys, storage numeric types"""
+    dtypes = {key: 'category' for key in (*KEY_COLUMNS, *WEEK_REFERENCES)}
+    dtypes.update({column: dtype for column, dtype in COLUMN_TYPES.get(table, {}).items()
+                   if column != 'transaction_no'})
+    return dtypes
@@ -0,0 +1,286 @@
+"""
+CHI LIMITED - TABLE STORAGE
+Writes and reads the star schema tables as CSV or as partitioned Parquet
+
+Parquet output (requires pyarrow) stores the key columns dictionary-encoded,
+the measures with explicit numeric types, and the two large fact tables split
+into one directory per year (Hive layout, e.g.
+fact_sales/year=2023/part-00004.parquet), so readers can load only the
+columns and years they need.
+"""
+
+import hashlib
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from star_schema import COLUMN_TYPES, csv_dtypes, export
+
+FORMATS = ('csv', 'parquet')
+
+# Key columns stored as Arrow dictionaries (categoricals once read back)
+DICTIONARY_COLUMNS = {'week_id', 'product_id', 'region_id', 'channel_id',
+                      'promo_start_week', 'promo_end_week'}
+
+# Tables written as one Parquet directory per year
+PARTITIONED_TABLES = {'fact_sales', 'fact_inventory'}
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from None
+    return pyarrow, pyarrow.parquet
+
+
+def to_arrow(df, table):
+    """Arrow table with dictionary-encoded keys and the declared numeric types"""
+    pa, _ = _require_pyarrow()
+    types = COLUMN_TYPES.get(table, {})
+    arrays = []
+    for name in df.columns:
+        values = df[name]
+        if name in DICTIONARY_COLUMNS and isinstance(values.dtype, pd.CategoricalDtype):
+            arrays.append(pa.DictionaryArray.from_arrays(
+                values.cat.codes.to_numpy(), pa.array(values.cat.categories.astype(str))))
+        elif name in DICTIONARY_COLUMNS:
+            arrays.append(pa.array(values.astype(str)).dictionary_encode())
+        elif name in types:
+            arrays.append(pa.array(values.to_numpy().astype(types[name])))
+        else:
+            arrays.append(pa.array(values))
+    return pa.Table.from_arrays(arrays, names=list(df.columns))
+
+
+class TableWriter:
+    """Appends DataFrame chunks to one output table.
+
+    CSV tables go to ``<table>.csv`` with a single header row. Parquet tables go
+    to ``<table>.parquet``, or, for the partitioned fact tables, to one file per
+    (chunk, year) under ``<table>/year=YYYY/``. Pass ``years`` (one value per
+    row) when writing a partitioned table. Compact star-schema frames (see
+    star_schema) are converted to their export form on write.
+
+    With ``append=True`` the rows are added to an existing CSV file or
+    partitioned dataset instead of replacing it; single-file Parquet tables
+    cannot be appended to and must be rewritten with write_table. Writing a
+    table afresh removes its copy in the other format, so readers (which
+    prefer Parquet, see table_path) never pick up the data of an earlier run.
+    """
+
+    def __init__(self, output_dir, table, fmt='csv', append=False):
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format {fmt!r}; expected one of {FORMATS}")
+        self.output_dir = output_dir
+        self.table = table
+        self.fmt = fmt
+        self.rows = 0
+        self._parts = 0
+        self._parquet_writer = None
+        if not append:
+            _remove_other_formats(output_dir, table, fmt)
+
+        if fmt == 'csv':
+            self.path = os.path.join(output_dir, f'{table}.csv')
+            self._header = not (append and os.path.exists(self.path))
+        elif table in PARTITIONED_TABLES:
+            _require_pyarrow()
+            self.path = os.path.join(output_dir, table)
+            if append:
+                self._parts = _next_part(self.path)
+            else:
+                _clear_dataset(self.path)
+        elif append:
+            raise ValueError(f"Cannot append to single-file Parquet table {table!r}")
+        else:
+            _require_pyarrow()
+            self.path = os.path.join(output_dir, f'{table}.parquet')
+
+    def write(self, df, years=None):
+        df = export(df)
+        if self.fmt == 'csv':
+            first = self.rows == 0 and self._header
+            df.to_csv(self.path, index=False, mode='w' if first else 'a', header=first)
+        elif self.table in PARTITIONED_TABLES:
+            self._write_partitions(df, years)
+        else:
+            _, pq = _require_pyarrow()
+            arrow_table = to_arrow(df, self.table)
+            if self._parquet_writer is None:
+                self._parquet_writer = pq.ParquetWriter(self.path, arrow_table.schema)
+            self._parquet_writer.write_table(arrow_table)
+        self.rows += len(df)
+
+    def _write_partitions(self, df, years):
+        _, pq = _require_pyarrow()
+        years = np.asarray(years)
+        for year in np.unique(years):
+            part_dir = os.path.join(self.path, f'year={int(year)}')
+            os.makedirs(part_dir, exist_ok=True)
+            part = df[years == year]
+            pq.write_table(to_arrow(part, self.table), os.path.join(part_dir, f'part-{self._parts:05d}.parquet'))
+        self._parts += 1
+
+    def close(self):
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+            self._parquet_writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _remove_other_formats(output_dir, table, fmt):
+    """Delete the stored copies of a table in the formats other than ``fmt``"""
+    if fmt != 'csv':
+        paths = [os.path.join(output_dir, f'{table}.csv')]
+    else:
+        paths = [os.path.join(output_dir, f'{table}.parquet'), os.path.join(output_dir, table)]
+    for path in paths:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
+
+
+def _clear_dataset(path):
+    """Remove part files left by a previous run of a partitioned table"""
+    if not os.path.isdir(path):
+        return
+    for root, _, files in os.walk(path):
+        for name in files:
+            if name.endswith('.parquet'):
+                os.remove(os.path.join(root, name))
+
+
+def _next_part(path):
+    """Number for the next part file of a partitioned table"""
+    parts = [int(name[len('part-'):-len('.parquet')])
+             for _, _, files in os.walk(path) for name in files
+             if name.startswith('part-') and name.endswith('.parquet')]
+    return max(parts) + 1 if parts else 0
+
+
+def write_table(df, output_dir, table, fmt='csv'):
+    """Write a whole (small) table in one go"""
+    with TableWriter(output_dir, table, fmt) as writer:
+        writer.write(df)
+
+
+def append_table(df, output_dir, table, fmt='csv'):
+    """Add rows to a small table: appended to its CSV, or the Parquet file rewritten"""
+    if fmt == 'csv':
+        with TableWriter(output_dir, table, fmt, append=True) as writer:
+            writer.write(df)
+    else:
+        write_table(pd.concat([read_table(output_dir, table), df], ignore_index=True), output_dir, table, fmt)
+
+
+def table_path(data_dir, table):
+    """Path of a stored table: Parquet dataset/file if present, else CSV"""
+    for candidate in (os.path.join(data_dir, table), os.path.join(data_dir, f'{table}.parquet')):
+        if os.path.exists(candidate):
+            return candidate
+    return os.path.join(data_dir, f'{table}.csv')
+
+
+def read_table(data_dir, table, columns=None, years=None):
+    """Load a stored table, optionally only some columns and years.
+
+    Keys come back as categoricals and counts with their narrow storage types
+    (see star_schema). Parquet only reads the requested columns and year
+    directories; other tables are filtered after reading, by their year
+    column or their week_id (mapped to years through the dataset's dim_time).
+    Asking for the years of a table with neither raises ValueError.
+    """
+    path = table_path(data_dir, table)
+    partitioned = not path.endswith('.csv') and os.path.isdir(path)
+    calendar = _calendar_column(path, table) if years is not None and not partitioned else None
+    read_columns = columns if columns is None or calendar in (None, *columns) else [*columns, calendar]
+
+    if path.endswith('.csv'):
+        df = pd.read_csv(path, usecols=read_columns, dtype=csv_dtypes(table))
+    else:
+        _, pq = _require_pyarrow()
+        filters = [('year', 'in', list(years))] if years is not None and partitioned else None
+        df = pq.read_table(path, columns=read_columns, filters=filters).to_pandas()
+        if columns is None and 'year' in df.columns and partitioned:
+            df = df.drop(columns='year')  # Hive partition key, not a table column
+
+    if calendar == 'year':
+        df = df[df['year'].isin(years)]
+    elif calendar == 'week_id':
+        df = df[df['week_id'].isin(_year_weeks(data_dir, years))]
+    return df if read_columns is columns else df.drop(columns=calendar)
+
+
+def _calendar_column(path, table):
+    """Column a table is filtered by years on: its year, else its week_id"""
+    if path.endswith('.csv'):
+        names = pd.read_csv(path, nrows=0).columns
+    else:
+        _, pq = _require_pyarrow()
+        names = pq.read_schema(path).names
+    for column in ('year', 'week_id'):
+        if column in names:
+            return column
+    raise ValueError(f"Table {table!r} has no year or week_id column to select years by")
+
+
+def _year_weeks(data_dir, years):
+    """week_ids of the calendar years (as DIM_TIME assigns them, ISO years) of a dataset"""
+    if not os.path.exists(table_path(data_dir, 'dim_time')):
+        raise ValueError(f"No dim_time in {data_dir} to map years to weeks")
+    calendar = read_table(data_dir, 'dim_time', columns=['week_id', 'year'])
+    return calendar.loc[calendar['year'].isin(years), 'week_id'].astype(str)
+
+
+def iter_table(data_dir, table, chunk_rows=100_000, offset=0):
+    """Stream a stored table as DataFrames of at most ``chunk_rows`` rows.
+
+    Memory stays bounded by the chunk size whatever the table size. CSV is
+    parsed incrementally with the explicit star-schema dtypes (see
+    star_schema); Parquet is read one record batch at a time. ``offset``
+    starts a CSV file at that byte position, e.g. its size when it was last
+    read, to stream only the rows appended since.
+    """
+    path = table_path(data_dir, table)
+    if path.endswith('.csv') and offset:
+        if offset >= os.path.getsize(path):
+            return
+        with open(path, 'rb') as f:
+            columns = pd.read_csv(f, nrows=0).columns
+            f.seek(offset)
+            yield from pd.read_csv(f, header=None, names=columns, dtype=csv_dtypes(table), chunksize=chunk_rows)
+        return
+    if path.endswith('.csv'):
+        yield from pd.read_csv(path, dtype=csv_dtypes(table), chunksize=chunk_rows)
+        return
+
+    _require_pyarrow()
+    import pyarrow.dataset as ds
+    dataset = ds.dataset(path, format='parquet', partitioning='hive' if os.path.isdir(path) else None)
+    columns = [name for name in dataset.schema.names if not (name == 'year' and os.path.isdir(path))]
+    for batch in dataset.to_batches(columns=columns, batch_size=chunk_rows):
+        yield batch.to_pandas()
+
+
+def file_digest(path, size=None, start=0, hasher=None):
+    """SHA-256 of bytes ``start`` to ``size`` (default: the end) of a file; pass ``hasher`` to continue one"""
+    hasher = hasher or hashlib.sha256()
+    end = os.path.getsize(path) if size is None else size
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while f.tell() < end:
+            block = f.read(min(1 << 20, end - f.tell()))
+            if not block:
+                break
+            hasher.update(block)
+    return hasher
@@ -0,0 +1,40 @@
+"""Shared fixtures: the src/ modules on the path, and small generated datasets and databases"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+REPO = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO / 'src'))
+
+# Weeks of the small test datasets: every table is populated, and a build takes seconds
+WEEKS = 8
+
+
+def run_script(script, cwd, *args):
+    """Run a repository script (path relative to the repo) in ``cwd`` and return its output"""
+    result = subprocess.run([sys.executable, str(REPO / script), *map(str, args)],
+                            cwd=cwd, capture_output=True, text=True)
+    assert result.returncode == 0, result.stdout + result.stderr
+    return result.stdout
+
+
+@pytest.fixture
+def run():
+    return run_script
+
+
+@pytest.fixture
+def dataset(tmp_path):
+    """Directory holding a freshly generated data/raw/ of WEEKS weeks (CSV)"""
+    run_script('src/generate_data.py', tmp_path, '--weeks', WEEKS, '--workers', 1)
+    return tmp_path
+
+
+@pytest.fixture
+def database(dataset):
+    """SQLite database built from the ``dataset`` files with sql/create_database.py"""
+    run_script('sql/create_database.py', dataset)
+    return dataset / 'chi_limited.db'
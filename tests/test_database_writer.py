@@ -0,0 +1,32 @@
+"""DatabaseWriter: direct loads that build everything on close, or nothing on an error"""
+
+import pytest
+
+from database import LOAD_ORDER, DatabaseWriter, connect, data_version
+from table_io import read_table
+
+
+def test_direct_load_is_complete_and_ready_for_updates(tmp_path, run):
+    run('src/generate_data.py', tmp_path, '--weeks', 4, '--workers', 1, '--format', 'none',
+        '--database', 'direct.db')
+    with connect(str(tmp_path / 'direct.db')) as conn:
+        assert data_version(conn)
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == 'wal'
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'view'").fetchone()[0] > 0
+        assert conn.execute("SELECT COUNT(*) FROM fact_sales").fetchone()[0] > 0
+
+
+def test_error_inside_the_block_rolls_the_load_back(dataset, tmp_path):
+    path = str(tmp_path / 'aborted.db')
+    with pytest.raises(RuntimeError):
+        with DatabaseWriter(path) as writer:
+            for table in LOAD_ORDER[:3]:
+                writer.write(table, read_table(dataset / 'data' / 'raw', table))
+            raise RuntimeError("generator failed")
+    assert writer.conn is None
+
+    with connect(path) as conn:
+        assert data_version(conn) is None
+        assert conn.execute("SELECT COUNT(*) FROM dim_product").fetchone()[0] == 0
+        assert conn.execute("SELECT COUNT(*) FROM sqlite_master WHERE type = 'view'").fetchone()[0] == 0
@@ -0,0 +1,63 @@
+"""sql/update_database.py: an updated database equals one rebuilt from the same files"""
+
+import pandas as pd
+
+from conftest import WEEKS
+from database import FACT_VIEWS, SUMMARY_TABLES, TABLES, VIEWS, connect, data_version, read_sql, refresh_summaries
+
+# Everything a reader sees, and the fingerprints the next update compares with
+COMPARED = [*TABLES, *SUMMARY_TABLES, *VIEWS, *FACT_VIEWS, 'load_fingerprints']
+
+
+def assert_same_database(path, other):
+    """Same rows in every table and view (in any order: keys are assigned in load order)"""
+    with connect(str(path)) as a, connect(str(other)) as b:
+        for name in COMPARED:
+            x, y = (read_sql(conn, f"SELECT * FROM {name}") for conn in (a, b))
+            x, y = (df.sort_values(list(df.columns)).reset_index(drop=True) for df in (x, y))
+            pd.testing.assert_frame_equal(x, y, check_exact=False, rtol=1e-9, obj=name)
+
+
+def rebuild(run, directory):
+    run('sql/create_database.py', directory, '--db', 'rebuilt.db')
+    return directory / 'rebuilt.db'
+
+
+def test_append_then_update_equals_rebuild(database, run):
+    directory = database.parent
+    run('src/generate_data.py', directory, '--append', 4)
+    output = run('sql/update_database.py', directory)
+    assert 'fact_sales' in output
+    with connect(str(database)) as conn:
+        assert conn.execute("SELECT COUNT(DISTINCT week_key) FROM fact_sales").fetchone()[0] == WEEKS + 4
+    assert_same_database(database, rebuild(run, directory))
+
+
+def test_changed_week_is_replaced(database, run):
+    directory = database.parent
+    sales_path = directory / 'data' / 'raw' / 'fact_sales.csv'
+    sales = pd.read_csv(sales_path)
+    sales.loc[sales['week_id'] == sales['week_id'].iloc[-1], 'units_sold'] += 1
+    sales.to_csv(sales_path, index=False)
+
+    run('sql/update_database.py', directory)
+    assert_same_database(database, rebuild(run, directory))
+
+
+def test_update_without_changes_keeps_the_data_version(database, run):
+    with connect(str(database)) as conn:
+        version = data_version(conn)
+    run('sql/update_database.py', database.parent)
+    with connect(str(database)) as conn:
+        assert data_version(conn) == version
+
+
+def test_refresh_stamps_the_version_with_the_summaries(database, run):
+    with connect(str(database)) as conn:
+        version = data_version(conn)
+        statements = []
+        conn.set_trace_callback(statements.append)
+        refresh_summaries(conn, weeks=['2022-W01'])
+        conn.set_trace_callback(None)
+        assert not conn.in_transaction and data_version(conn) != version
+    assert statements.index('COMMIT') > max(i for i, sql in enumerate(statements) if 'data_version' in sql)
@@ -0,0 +1,79 @@
+"""YearPartitions: a partitioned database answers like a single file, reading only the years it needs"""
+
+import pytest
+
+from conftest import run_script
+from database import YearPartitions, connect, pruned, read_sql
+
+# Spans two calendar years (2022 and the start of 2023)
+WEEKS = 60
+
+REGION_REVENUE = """
+    SELECT g.region_name, SUM(s.revenue_ngn) AS revenue
+    FROM fact_sales s
+    JOIN dim_time t ON t.week_key = s.week_key
+    JOIN dim_geography g ON g.region_key = s.region_key
+    WHERE t.year = {year}
+    GROUP BY g.region_name
+    ORDER BY g.region_name
+"""
+
+
+@pytest.fixture(scope='module')
+def databases(tmp_path_factory):
+    """The same dataset loaded into a partitioned and a single-file database"""
+    directory = tmp_path_factory.mktemp('partitions')
+    run_script('src/generate_data.py', directory, '--weeks', WEEKS, '--workers', 1)
+    run_script('sql/create_database.py', directory, '--db', 'part.db', '--partition-by-year')
+    run_script('sql/create_database.py', directory, '--db', 'flat.db')
+    with connect(str(directory / 'part.db')) as part, connect(str(directory / 'flat.db')) as flat:
+        yield part, flat
+
+
+def plan(conn, sql):
+    return ' | '.join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+
+
+@pytest.mark.parametrize('sql', [
+    REGION_REVENUE.format(year=2023),
+    "SELECT t.week_id, SUM(i.closing_stock_units) AS stock FROM fact_inventory AS i "
+    "JOIN dim_time t ON i.week_key = t.week_key WHERE t.week_id BETWEEN '2022-W50' AND '2023-W02' "
+    "GROUP BY t.week_id ORDER BY t.week_id",
+    "select count(*) as n from fact_sales join dim_time on dim_time.week_key = fact_sales.week_key "
+    "where year in (2022, 2023) and units_sold > 0",
+    "SELECT COUNT(*) AS n FROM fact_sales s JOIN dim_time t ON t.week_key = s.week_key WHERE t.year = 2030",
+    "SELECT COUNT(*) AS n FROM fact_sales s JOIN dim_time t ON t.week_key = s.week_key "
+    "WHERE t.year = 2023 OR s.units_sold > 900",
+])
+def test_results_match_the_single_file_database(databases, sql):
+    part, flat = databases
+    assert read_sql(part, sql).equals(read_sql(flat, sql))
+
+
+def test_year_filter_reads_only_that_years_file(databases):
+    part, _ = databases
+    sql = pruned(part, REGION_REVENUE.format(year=2023))
+    assert 'FROM y2023.fact_sales s' in sql and 'y2022' not in sql
+    assert 'MATERIALIZE' not in plan(part, sql)  # the join is planned as on a single file
+
+
+def test_week_range_reads_only_its_weeks_of_each_year(databases):
+    part, _ = databases
+    sql = pruned(part, "SELECT SUM(s.units_sold) FROM fact_sales s JOIN dim_time t ON t.week_key = s.week_key "
+                       "WHERE t.week_id BETWEEN '2022-W52' AND '2023-W01'")
+    assert sql.count("WHERE week_key IN (SELECT week_key FROM main.dim_time WHERE week_id BETWEEN") == 2
+    assert YearPartitions(part).selected_years("year IN (2022, 2023)") == ([2022, 2023], True)
+
+
+@pytest.mark.parametrize('sql', [
+    "SELECT COUNT(*) FROM fact_sales s JOIN dim_time t ON t.week_key = s.week_key WHERE t.year = 2023 OR 1",
+    "SELECT COUNT(*) FROM fact_sales s JOIN dim_time t ON t.week_key = s.week_key WHERE NOT t.year = 2023",
+    "SELECT COUNT(*) FROM fact_sales s JOIN dim_time t ON t.week_key = s.week_key WHERE t.month_name = 'year = 2023'",
+    "SELECT COUNT(*) FROM fact_sales s JOIN dim_time t ON t.week_key = s.week_key WHERE t.year = ?",
+    "SELECT COUNT(*) FROM fact_sales s JOIN dim_time t ON t.week_key = s.week_key "
+    "WHERE s.units_sold > (SELECT AVG(units_sold) FROM fact_sales) AND t.year = 2023",
+    "SELECT COUNT(*) FROM fact_sales s, dim_time t WHERE t.year = 2023",
+])
+def test_statements_that_cannot_be_pruned_safely_are_unchanged(databases, sql):
+    part, _ = databases
+    assert YearPartitions(part).prune(sql) == sql
@@ -0,0 +1,60 @@
+"""PromoIndex: the active promotion per SKU / region / channel and week"""
+
+import numpy as np
+import pandas as pd
+
+from promo_index import PromoIndex
+
+WEEKS = [f"2022-W{week:02d}" for week in range(1, 21)]
+KEYS = [('P1', 'R1', 'MT'), ('P1', 'R2', 'MT'), ('P2', 'R1', 'TT')]
+
+
+def promotions(rows):
+    return pd.DataFrame(rows, columns=['product_id', 'region_id', 'channel_id',
+                                       'promo_start_week', 'promo_end_week', 'discount_percentage'])
+
+
+def first_listed(df_promotions, key, week_id):
+    """The original per-row lookup: the first campaign of the key covering the week"""
+    rows = [row for row, promo in df_promotions.iterrows()
+            if (promo['product_id'], promo['region_id'], promo['channel_id']) == key
+            and promo['promo_start_week'] <= week_id <= promo['promo_end_week']]
+    return rows[0] if rows else -1
+
+
+def test_overlapping_campaigns_resolve_to_the_first_listed():
+    df = promotions([
+        ('P1', 'R1', 'MT', '2022-W03', '2022-W08', 10),
+        ('P1', 'R1', 'MT', '2022-W06', '2022-W12', 20),
+        ('P1', 'R2', 'MT', '2022-W10', '2022-W10', 30),
+    ])
+    index = PromoIndex(df, WEEKS)
+    assert index.lookup(['2022-W02', '2022-W03', '2022-W07', '2022-W09', '2022-W13'],
+                        ['P1'] * 5, ['R1'] * 5, ['MT'] * 5).tolist() == [-1, 0, 0, 1, -1]
+    assert index.active('P1', 'R2', 'MT', '2022-W10')['discount_percentage'] == 30
+    assert index.active('P2', 'R1', 'TT', '2022-W10') is None
+    assert index.lookup(['2023-W01'], ['P1'], ['R1'], ['MT']).tolist() == [-1]  # outside the calendar
+
+
+def test_lookup_matches_the_per_row_search():
+    rng = np.random.default_rng(7)
+    rows = []
+    for _ in range(25):
+        start = rng.integers(0, len(WEEKS))
+        end = min(start + rng.integers(0, 6), len(WEEKS) - 1)
+        rows.append((*KEYS[rng.integers(len(KEYS))], WEEKS[start], WEEKS[end], int(rng.integers(5, 40))))
+    df = promotions(rows)
+    index = PromoIndex(df, WEEKS)
+
+    queries = [(key, week) for key in KEYS for week in WEEKS]
+    found = index.lookup([week for _, week in queries], *zip(*[key for key, _ in queries]))
+    assert found.tolist() == [first_listed(df, key, week) for key, week in queries]
+
+
+def test_discount_cube_slices_weeks():
+    df = promotions([('P1', 'R1', 'MT', '2022-W03', '2022-W05', 15)])
+    index = PromoIndex(df, WEEKS)
+    cube = index.discount_cube(['P1', 'P2'], ['R1'], ['MT', 'TT'], week_range=(3, 10))
+    assert cube.shape == (7, 2, 1, 2)
+    assert cube[:, 0, 0, 0].tolist() == [15, 15, 0, 0, 0, 0, 0]
+    assert cube.sum() == 30
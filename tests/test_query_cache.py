@@ -0,0 +1,88 @@
+"""QueryCache: results reused until a load stamps a new data version"""
+
+import sqlite3
+
+import pytest
+
+from database import bump_data_version, connect, data_version
+from query_cache import QueryCache, normalize_sql
+
+QUERY = "SELECT COUNT(*) AS n FROM t"
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(str(tmp_path / 'cache.db'))
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.execute("INSERT INTO t VALUES (1)")
+    bump_data_version(conn)
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def load_row(conn):
+    """What a loader does: change the data and stamp a new version"""
+    conn.execute("INSERT INTO t VALUES (2)")
+    bump_data_version(conn)
+    conn.commit()
+
+
+def test_repeated_query_is_served_from_cache(conn):
+    cache = QueryCache()
+    first = cache.read_sql(conn, QUERY)
+    second = cache.read_sql(conn, "SELECT COUNT(*) AS n\n  FROM t;  -- same query")
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert first.equals(second)
+
+
+def test_new_data_version_invalidates(conn):
+    cache = QueryCache()
+    assert cache.read_sql(conn, QUERY)['n'][0] == 1
+    version = data_version(conn)
+
+    load_row(conn)
+    assert data_version(conn) != version
+    assert cache.read_sql(conn, QUERY)['n'][0] == 2
+    assert cache.misses == 2
+
+
+def test_data_changed_without_stamp_is_not_detected(conn):
+    """The cache trusts the stamp: writers must bump it (DatabaseWriter, the load scripts)"""
+    cache = QueryCache()
+    cache.read_sql(conn, QUERY)
+    conn.execute("INSERT INTO t VALUES (2)")
+    conn.commit()
+    assert cache.read_sql(conn, QUERY)['n'][0] == 1
+
+
+def test_unstamped_database_is_never_cached(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / 'plain.db'))
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    cache = QueryCache()
+    cache.read_sql(conn, QUERY)
+    cache.read_sql(conn, QUERY)
+    assert cache.hits == 0 and not cache.entries
+
+
+def test_disk_tier_survives_a_new_cache_and_drops_old_versions(conn, tmp_path):
+    directory = tmp_path / 'qc'
+    QueryCache(directory=str(directory)).read_sql(conn, QUERY)
+    warm = QueryCache(directory=str(directory))
+    warm.read_sql(conn, QUERY)
+    assert warm.hits == 1
+
+    load_row(conn)
+    warm.read_sql(conn, QUERY)
+    assert [name.split('-')[0] for name in (p.name for p in directory.iterdir())] == [data_version(conn)]
+
+
+def test_cached_result_is_not_shared_with_callers(conn):
+    cache = QueryCache()
+    df = cache.read_sql(conn, QUERY)
+    df.loc[0, 'n'] = 99
+    assert cache.read_sql(conn, QUERY)['n'][0] == 1
+
+
+def test_normalize_sql_keeps_string_literals():
+    assert normalize_sql("SELECT  'a  -- b'  -- note\nFROM t ;") == "SELECT 'a  -- b' FROM t"
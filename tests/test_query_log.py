@@ -0,0 +1,62 @@
+"""QueryLog: fingerprints, records and the slow-query log"""
+
+import json
+
+import pytest
+
+from database import connect, query_errors
+from query_log import QueryLog, fingerprint, read_log, summarize
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = connect(str(tmp_path / 'log.db'))
+    conn.execute("CREATE TABLE t (x INTEGER, label TEXT)")
+    conn.executemany("INSERT INTO t VALUES (?, ?)", [(i, f"row {i}") for i in range(50)])
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def test_fingerprint_ignores_literals_layout_and_comments():
+    assert fingerprint("SELECT * FROM t WHERE x > 10 AND label = 'a'") == \
+        fingerprint("SELECT *\n  FROM t  -- filtered\n WHERE x > 2.5 AND label = 'it''s'")
+    assert fingerprint("SELECT * FROM t WHERE x > 1") != fingerprint("SELECT * FROM t WHERE x < 1")
+
+
+def test_queries_are_recorded_with_rows_and_plan(conn, tmp_path):
+    path = tmp_path / 'queries.jsonl'
+    log = QueryLog(str(path), slow_path=None)
+    log.read_sql(conn, "SELECT * FROM t WHERE x < 5", name='small')
+    log.read_sql(conn, "SELECT * FROM t WHERE x < 20", name='larger')
+    log.execute(conn, "UPDATE t SET label = 'x' WHERE x < 3")
+
+    small, larger, update = log.records
+    assert (small['rows'], larger['rows'], update['rows']) == (5, 20, 3)
+    assert small['fingerprint'] == larger['fingerprint']
+    assert small['plan'] and update['plan'] is None
+    assert [json.loads(line)['name'] for line in path.read_text().splitlines()] == ['small', 'larger', None]
+
+    summary = summarize(read_log(str(path)))
+    assert summary.loc[summary['name'] == 'small', 'calls'].item() == 2
+
+
+def test_failed_query_is_recorded_and_raised(conn):
+    log = QueryLog(slow_path=None)
+    with pytest.raises(query_errors()):
+        log.read_sql(conn, "SELECT * FROM missing")
+    assert 'no such table' in log.records[0]['error']
+
+
+def test_slow_threshold_writes_the_slow_log(conn, tmp_path):
+    slow_path = tmp_path / 'logs' / 'slow.jsonl'
+    log = QueryLog(slow_path=str(slow_path), slow_ms=0)
+    with log.step(conn, 'rebuild'):
+        conn.execute("CREATE INDEX idx_t_x ON t(x)")
+    records = [json.loads(line) for line in slow_path.read_text().splitlines()]
+    assert [record['kind'] for record in records] == ['statement', 'step']
+    assert records[-1]['name'] == 'rebuild' and records[-1]['statements'] == 1
+
+    quiet = QueryLog(slow_path=str(tmp_path / 'quiet.jsonl'), slow_ms=60_000)
+    quiet.read_sql(conn, "SELECT 1")
+    assert not quiet.slow and not (tmp_path / 'quiet.jsonl').exists()
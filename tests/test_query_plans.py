@@ -0,0 +1,35 @@
+"""benchmarks/query_plans.py: hot queries keep to their indexes"""
+
+import subprocess
+import sys
+
+from conftest import REPO, run_script
+
+sys.path.insert(0, str(REPO / 'benchmarks'))
+from query_plans import hot_query_scans
+
+
+def test_hot_queries_of_a_built_database_use_indexes(database):
+    output = run_script('benchmarks/query_plans.py', database.parent, '--db', database)
+    assert '✅ No hot query scans' in output
+
+
+def test_database_without_tables_fails(tmp_path):
+    empty = tmp_path / 'chi_limited.db'
+    empty.touch()
+    result = subprocess.run([sys.executable, str(REPO / 'benchmarks' / 'query_plans.py'), '--db', str(empty)],
+                            capture_output=True, text=True)
+    assert result.returncode == 1 and 'has no tables' in result.stdout
+
+
+def test_hot_query_scans_ignore_small_tables_and_cold_queries():
+    results = {
+        'summary_refresh:5': {'source': 'database.py', 'fact_scans': ['bridge_promo_week'], 'temp_btrees': []},
+        'sample_queries.py:query3': {'source': 'sample_queries.py', 'fact_scans': ['fact_promotions'],
+                                     'temp_btrees': []},
+        'exploration_queries.sql:13': {'source': 'exploration_queries.sql', 'fact_scans': ['fact_inventory'],
+                                       'temp_btrees': []},
+        'sample_queries.py:query9': {'source': 'sample_queries.py', 'error': 'no such table: t'},
+    }
+    assert hot_query_scans(results) == ['summary_refresh:5: scans bridge_promo_week in full',
+                                        'sample_queries.py:query9: does not prepare (no such table: t)']
@@ -0,0 +1,53 @@
+"""QueryPool: concurrent reads over read-only connections"""
+
+import pytest
+
+from database import bump_data_version, connect
+from query_cache import QueryCache
+from query_log import QueryLog
+from query_pool import QueryPool
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    path = str(tmp_path / 'pool.db')
+    conn = connect(path)
+    conn.execute("CREATE TABLE t (x INTEGER)")
+    conn.executemany("INSERT INTO t VALUES (?)", [(i,) for i in range(10)])
+    bump_data_version(conn)
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_missing_database_is_not_created(tmp_path):
+    path = tmp_path / 'missing.db'
+    with pytest.raises(FileNotFoundError):
+        QueryPool(str(path))
+    assert not path.exists()
+
+
+def test_results_come_back_in_the_order_given(db_path):
+    queries = {f"q{i}": f"SELECT COUNT(*) AS n FROM t WHERE x >= {i}" for i in range(6)}
+    with QueryPool(db_path, size=3) as pool:
+        results = pool.run(queries)
+    assert [r.name for r in results] == list(queries)
+    assert [r.frame['n'][0] for r in results] == [10 - i for i in range(6)]
+    assert all(r.error is None for r in results)
+
+
+def test_connections_are_read_only(db_path):
+    with QueryPool(db_path, size=1) as pool:
+        bad, good = pool.run([('write', "DELETE FROM t"), ('read', "SELECT COUNT(*) AS n FROM t")])
+    assert bad.frame is None and 'readonly' in str(bad.error)
+    assert good.error is None and good.frame['n'][0] == 10
+
+
+def test_cache_and_log_see_only_queries_run_on_the_database(db_path):
+    cache = QueryCache()
+    log = QueryLog(slow_path=None)
+    with QueryPool(db_path, size=2, cache=cache, log=log) as pool:
+        pool.run({'first': "SELECT SUM(x) AS s FROM t"})
+        pool.run({'again': "SELECT SUM(x) AS s FROM t"})
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert [record['name'] for record in log.records] == ['first']
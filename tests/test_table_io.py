@@ -0,0 +1,46 @@
+"""table_io: stored tables in CSV or Parquet"""
+
+import pytest
+
+from conftest import WEEKS
+from table_io import read_table, table_path, write_table
+
+pytest.importorskip('pyarrow')
+
+
+def weeks_read(directory):
+    return read_table(directory / 'data' / 'raw', 'fact_sales')['week_id'].nunique()
+
+
+@pytest.mark.parametrize('first, second', [('parquet', 'csv'), ('csv', 'parquet')])
+def test_regenerating_in_another_format_replaces_the_old_copy(tmp_path, run, first, second):
+    run('src/generate_data.py', tmp_path, '--weeks', WEEKS, '--workers', 1, '--format', first)
+    run('src/generate_data.py', tmp_path, '--weeks', WEEKS // 2, '--workers', 1, '--format', second)
+    data_dir = tmp_path / 'data' / 'raw'
+    assert weeks_read(tmp_path) == WEEKS // 2
+    if second == 'csv':
+        assert not list(data_dir.glob('*.parquet')) and not [p for p in data_dir.iterdir() if p.is_dir()]
+    else:
+        assert not list(data_dir.glob('*.csv'))
+
+
+def test_write_table_round_trip(dataset, tmp_path):
+    products = read_table(dataset / 'data' / 'raw', 'dim_product')
+    write_table(products, str(tmp_path), 'dim_product', 'parquet')
+    assert table_path(str(tmp_path), 'dim_product').endswith('.parquet')
+    assert read_table(str(tmp_path), 'dim_product').equals(products)
+
+
+@pytest.mark.parametrize('fmt', ['csv', 'parquet'])
+def test_years_select_fact_rows_by_calendar_year(tmp_path, run, fmt):
+    run('src/generate_data.py', tmp_path, '--weeks', 60, '--workers', 1, '--format', fmt)
+    data_dir = tmp_path / 'data' / 'raw'
+    sales = read_table(data_dir, 'fact_sales', columns=['week_id', 'units_sold'], years=[2023])
+    assert sorted(sales['week_id'].astype(str).str[:4].unique()) == ['2023']
+    assert sales['week_id'].nunique() == 60 - 52
+    assert list(read_table(data_dir, 'fact_inventory', columns=['closing_stock_units'], years=[2022]).columns) == \
+        ['closing_stock_units']
+    assert len(read_table(data_dir, 'dim_time', years=[2022, 2023])) == 60
+
+    with pytest.raises(ValueError):
+        read_table(data_dir, 'fact_promotions', years=[2023])